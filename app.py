@@ -9,6 +9,7 @@ from streamlit_folium import folium_static
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from sqlalchemy.exc import IntegrityError
 
 # Import local modules
 from src.database import SessionLocal, init_db
@@ -16,6 +17,7 @@ from src.models import Hospital, Patient, Referral, SeverityEnum, GenderEnum, St
 from src.agent import SmartReferralAgent
 from src.predictor import WaitTimePredictor, CapacityAnalyzer
 from src.maps_api import GoogleMapsClient
+from src.change_feed import capacity_feed
 
 
 # Page configuration
@@ -425,10 +427,16 @@ def show_hospitals():
                         phone=phone,
                         emergency_available=emergency
                     )
-                    db.add(new_hospital)
-                    db.commit()
-                    st.success(f"Rumah Sakit {name} berhasil ditambahkan!")
-                    st.rerun()
+                    try:
+                        db.add(new_hospital)
+                        db.commit()
+                    except IntegrityError:
+                        db.rollback()
+                        st.error(f"Rumah Sakit {name} dengan koordinat yang sama sudah terdaftar!")
+                    else:
+                        capacity_feed.publish(new_hospital.id, available_beds, source='app')
+                        st.success(f"Rumah Sakit {name} berhasil ditambahkan!")
+                        st.rerun()
     
     st.markdown("---")
     
@@ -600,18 +608,47 @@ def show_analytics():
     with tab1:
         st.subheader("Analisis Kapasitas Rumah Sakit")
         
-        hospitals = db.query(Hospital).all()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_labels = {
+                "Okupansi": "occupancy_rate",
+                "Tempat Tidur Tersedia": "available_beds",
+                "Total Tempat Tidur": "total_beds",
+                "Nama": "name"
+            }
+            sort_label = st.selectbox("Urutkan", list(sort_labels.keys()))
+        with col2:
+            descending = st.selectbox("Arah", ["Menurun", "Menaik"]) == "Menurun"
+        with col3:
+            status_filter = st.selectbox("Status", ["Semua", "low", "moderate", "high", "critical"])
         
-        if hospitals:
+        page_size = 50
+        page = st.number_input("Halaman", min_value=1, value=1, step=1, key="capacity_page")
+        result = analyzer.analyze_capacity_bulk(
+            db,
+            offset=(page - 1) * page_size,
+            limit=page_size,
+            sort_by=sort_labels[sort_label],
+            descending=descending,
+            status=None if status_filter == "Semua" else status_filter
+        )
+        
+        if result['items']:
+            total_pages = (result['total'] + page_size - 1) // page_size
+            st.caption(f"Menampilkan halaman {page} dari {total_pages} ({result['total']} rumah sakit)")
+            
+            forecaster = st.session_state.agent.capacity_forecaster.refresh_if_stale(db)
             capacity_data = []
-            for h in hospitals:
-                capacity = analyzer.analyze_hospital_capacity(db, h.id)
+            for item in result['items']:
+                capacity = item['capacity']
+                peak = forecaster.peak_occupancy(item['id'])
                 capacity_data.append({
-                    'Rumah Sakit': h.name,
+                    'Rumah Sakit': item['name'],
                     'Status': capacity['status'],
                     'Tersedia': capacity['available_beds'],
                     'Total': capacity['total_beds'],
-                    'Okupansi': f"{capacity['occupancy_rate']}%"
+                    'Okupansi': f"{capacity['occupancy_rate']}%",
+                    'Prediksi Puncak 24 Jam': f"{peak * 100:.1f}%" if peak is not None else "-"
                 })
             
             df = pd.DataFrame(capacity_data)
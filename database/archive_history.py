@@ -0,0 +1,46 @@
+"""
+History Retention Script
+Exports months of capacity_history / wait_time_history older than the
+retention window to compressed columnar files and removes them from the
+live tables
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import SessionLocal, init_db
+from src.retention import archive_history, HISTORY_TABLES
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main function for history retention"""
+    parser = argparse.ArgumentParser(description='Archive and drop old history months')
+    parser.add_argument('--archive-dir', type=str, default='data/archive', help='Directory for archived files')
+    parser.add_argument('--keep-months', type=int, default=6,
+                        help='Full months kept before the current month (default: 6)')
+    parser.add_argument('--tables', type=str, nargs='*', choices=list(HISTORY_TABLES), help='Tables to archive')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Rows per archive file')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        result = archive_history(db, args.archive_dir, keep_months=args.keep_months, tables=args.tables,
+                                 chunk_size=args.chunk_size, dry_run=args.dry_run)
+        for table, months in result.items():
+            total = sum(months.values())
+            action = 'would be archived' if args.dry_run else 'archived'
+            print(f"✅ {table}: {total} rows {action} across {len(months)} months")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
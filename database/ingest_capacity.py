@@ -0,0 +1,63 @@
+"""
+Capacity Feed Ingestion Script
+Loads bed-availability readings (hospital_id, available, occupied, timestamp)
+from CSV / JSON-lines files or listens for a newline-delimited JSON feed
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import SessionLocal
+from src.capacity_ingest import CapacityIngestor, serve
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main function for capacity ingestion"""
+    parser = argparse.ArgumentParser(description='Ingest hospital bed-availability feeds')
+    parser.add_argument('--file', type=str, nargs='*', help='CSV or JSON-lines file(s) with capacity readings')
+    parser.add_argument('--listen', type=str, help='host:port to accept newline-delimited JSON readings')
+    parser.add_argument('--flush-interval', type=float, default=60.0,
+                        help='Seconds to coalesce readings per hospital before writing (default: 60)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Hospitals per bulk statement')
+
+    args = parser.parse_args()
+
+    if not args.file and not args.listen:
+        print("Error: Either --file or --listen must be specified")
+        parser.print_help()
+        return
+
+    db = SessionLocal()
+    ingestor = CapacityIngestor(db, flush_interval=args.flush_interval, chunk_size=args.chunk_size)
+
+    try:
+        for path in args.file or []:
+            if not os.path.exists(path):
+                print(f"Error: File not found: {path}")
+                continue
+            count = ingestor.ingest_file(path)
+            print(f"✅ Accepted {count} readings from {os.path.basename(path)}")
+
+        if args.listen:
+            host, _, port = args.listen.rpartition(':')
+            serve(ingestor, host=host or '0.0.0.0', port=int(port))
+
+    except KeyboardInterrupt:
+        print("\nStopping capacity feed...")
+    finally:
+        ingestor.flush()
+        stats = ingestor.get_stats()
+        print(f"\n📊 Received: {stats['received']}, hospitals updated: {stats['written']}, "
+              f"history rows: {stats['history_rows']}, coalesced: {stats['coalesced']}, "
+              f"unknown hospitals: {stats['unknown_hospitals']}, "
+              f"rejected: {stats['rejected']}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
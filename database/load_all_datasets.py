@@ -8,8 +8,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.database import SessionLocal, engine
 from src.csv_loader import CSVDataLoader
+from src.import_manifest import ImportTracker
 from src.models import Hospital, WaitTimeHistory, CapacityHistory, Base
 from src.predictor import WaitTimePredictor
+from src.rollups import refresh_rollups
 from database.dataset_downloader import DatasetDownloader
 import logging
 from pathlib import Path
@@ -25,10 +27,15 @@ class DataPipeline:
     Comprehensive data pipeline for SmartRujuk+ system
     """
     
-    def __init__(self):
-        """Initialize data pipeline"""
+    def __init__(self, full_reload: bool = False):
+        """
+        Initialize data pipeline
+        Args:
+            full_reload: Reload every dataset file instead of skipping files
+                the import manifest shows unchanged
+        """
         self.db = SessionLocal()
-        self.loader = CSVDataLoader(self.db)
+        self.loader = CSVDataLoader(self.db, manifest=ImportTracker(self.db, force=full_reload))
         self.downloader = DatasetDownloader()
         self.stats = {
             'datasets_loaded': 0,
@@ -196,6 +203,17 @@ class DataPipeline:
             self.db.rollback()
             return 0
     
+    def refresh_rollups(self):
+        """Fold new history rows into the hourly/daily rollup tables"""
+        logger.info("\n" + "="*60)
+        logger.info("Refreshing History Rollups")
+        logger.info("="*60)
+        
+        result = refresh_rollups(self.db)
+        for source, advanced in result.items():
+            logger.info(f"✅ {source}: {advanced} new rows rolled up")
+        return result
+    
     def train_ml_models(self):
         """Train ML models with loaded data"""
         logger.info("\n" + "="*60)
@@ -264,6 +282,13 @@ class DataPipeline:
             logger.info(f"   Successfully Inserted: {loader_stats['total_inserted']}")
             logger.info(f"   Updated: {loader_stats['total_updated']}")
             logger.info(f"   Skipped: {loader_stats['total_skipped']}")
+            logger.info(f"   Unchanged Files Skipped: {loader_stats['unchanged_files']}")
+            logger.info(f"   Unchanged Rows Skipped: {loader_stats['unchanged_rows']}")
+            logger.info(f"   Resumed Rows Skipped: {loader_stats['resumed_rows']}")
+            logger.info(f"   Throughput: {loader_stats['rows_per_second']:.0f} rows/s, "
+                        f"{loader_stats['bytes_per_second'] / 1e6:.1f} MB/s")
+            logger.info(f"   Batch Commits: {loader_stats['batches_committed']} "
+                        f"(mean {loader_stats['mean_commit_ms']:.1f} ms)")
             
             if loader_stats['errors']:
                 logger.info(f"   Errors: {len(loader_stats['errors'])}")
@@ -299,6 +324,9 @@ class DataPipeline:
             if generate_training_data:
                 self.generate_training_data()
             
+            # Keep rollups current; training and analytics read them
+            self.refresh_rollups()
+            
             # Step 5: Train ML models if requested
             if train_models:
                 self.train_ml_models()
@@ -336,6 +364,8 @@ def main():
                        help='Skip ML model training')
     parser.add_argument('--download-first', action='store_true',
                        help='Download datasets before loading')
+    parser.add_argument('--full-reload', action='store_true',
+                       help='Reload dataset files even if the import manifest shows them unchanged')
     
     args = parser.parse_args()
     
@@ -347,7 +377,7 @@ def main():
         logger.info("")
     
     # Run pipeline
-    pipeline = DataPipeline()
+    pipeline = DataPipeline(full_reload=args.full_reload)
     
     generate_training = not args.no_training_data
     train_models = not args.no_train
@@ -8,6 +8,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.database import SessionLocal
 from src.csv_loader import CSVDataLoader
+from src.import_manifest import ImportTracker
 import argparse
 import logging
 
@@ -23,6 +24,12 @@ def main():
     parser.add_argument('--province', type=str, help='Filter by province name (optional)')
     parser.add_argument('--type', type=str, choices=['faskes', 'bed_ratio', 'auto'], 
                        default='auto', help='Type of CSV data (default: auto-detect)')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                       help='Stream CSVs in chunks of this many rows to bound memory (default: whole file)')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='Parser processes for --dir (-1: all cores, default: 1)')
+    parser.add_argument('--full', action='store_true',
+                       help='Reload files even if the import manifest shows them unchanged')
     
     args = parser.parse_args()
     
@@ -34,7 +41,7 @@ def main():
     
     # Initialize database session and loader
     db = SessionLocal()
-    loader = CSVDataLoader(db)
+    loader = CSVDataLoader(db, chunk_size=args.chunk_size, manifest=ImportTracker(db, force=args.full))
     
     try:
         print("=== SmartRujuk+ CSV Data Loader ===\n")
@@ -73,7 +80,7 @@ def main():
                 print(f"Error: Directory not found: {args.dir}")
                 return
             
-            results = loader.load_from_directory(args.dir)
+            results = loader.load_from_directory(args.dir, n_jobs=args.jobs)
             
             print("\n=== Loading Results ===")
             total_records = 0
@@ -83,6 +90,17 @@ def main():
             
             print(f"\n✅ Total: {total_records} records loaded from {len(results)} files")
         
+        stats = loader.get_stats()
+        print(f"\n⏱️  {stats['rows_read']} rows ({stats['bytes_read'] / 1e6:.1f} MB) in {stats['elapsed_seconds']:.1f}s: "
+              f"{stats['rows_per_second']:.0f} rows/s, {stats['bytes_per_second'] / 1e6:.1f} MB/s, "
+              f"{stats['batches_committed']} commits (mean {stats['mean_commit_ms']:.1f} ms, "
+              f"max {stats['max_commit_seconds'] * 1000:.1f} ms), {stats['error_count']} errors")
+        if stats['resumed_rows']:
+            print(f"↩️  Resumed interrupted imports: {stats['resumed_rows']} already committed rows skipped")
+        if stats['unchanged_files'] or stats['unchanged_rows']:
+            print(f"\n⏭️  Unchanged since last import: {stats['unchanged_files']} files skipped, "
+                  f"{stats['unchanged_rows']} rows of changed files skipped (use --full to reload)")
+        
         # Show summary
         from src.models import Hospital
         total_hospitals = db.query(Hospital).count()
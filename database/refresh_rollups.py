@@ -0,0 +1,37 @@
+"""
+History Rollup Refresh Script
+Folds new wait_time_history and capacity_history rows into the hourly and
+daily rollup tables; safe to run repeatedly (e.g. from cron)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import SessionLocal, init_db
+from src.rollups import refresh_rollups
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Main function for rollup refresh"""
+    parser = argparse.ArgumentParser(description='Refresh hourly/daily history rollups')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Hospitals recomputed per query')
+
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        result = refresh_rollups(db, chunk_size=args.chunk_size)
+        for source, advanced in result.items():
+            print(f"✅ {source}: {advanced} new rows rolled up")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,27 @@ CREATE TABLE IF NOT EXISTS hospitals (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_location (latitude, longitude),
-    INDEX idx_available_beds (available_beds)
+    INDEX idx_available_beds (available_beds),
+    -- upsert key of faskes imports. Existing databases may already hold
+    -- duplicates, which make the ALTER fail; merge them into the lowest id
+    -- first (the duplicates' rollup buckets are dropped and rebuilt from raw
+    -- history by the next database/refresh_rollups.py run):
+    -- CREATE TEMPORARY TABLE hospital_duplicates AS
+    --     SELECT h.id, k.keep_id FROM hospitals h
+    --     JOIN (SELECT name, latitude, longitude, MIN(id) AS keep_id FROM hospitals
+    --           GROUP BY name, latitude, longitude HAVING COUNT(*) > 1) k
+    --       ON h.name = k.name AND h.latitude = k.latitude AND h.longitude = k.longitude
+    --     WHERE h.id <> k.keep_id;
+    -- UPDATE referrals r JOIN hospital_duplicates d ON r.to_hospital_id = d.id SET r.to_hospital_id = d.keep_id;
+    -- UPDATE referrals r JOIN hospital_duplicates d ON r.from_hospital_id = d.id SET r.from_hospital_id = d.keep_id;
+    -- UPDATE capacity_history c JOIN hospital_duplicates d ON c.hospital_id = d.id SET c.hospital_id = d.keep_id;
+    -- UPDATE wait_time_history w JOIN hospital_duplicates d ON w.hospital_id = d.id SET w.hospital_id = d.keep_id;
+    -- DELETE FROM wait_time_rollup WHERE hospital_id IN (SELECT id FROM hospital_duplicates);
+    -- DELETE FROM capacity_rollup WHERE hospital_id IN (SELECT id FROM hospital_duplicates);
+    -- DELETE FROM rollup_watermark;
+    -- DELETE FROM hospitals WHERE id IN (SELECT id FROM hospital_duplicates);
+    -- ALTER TABLE hospitals ADD UNIQUE KEY uq_hospital_name_location (name, latitude, longitude);
+    UNIQUE KEY uq_hospital_name_location (name, latitude, longitude)
 );
 
 -- Patients table
@@ -71,7 +91,8 @@ CREATE TABLE IF NOT EXISTS capacity_history (
     occupied_beds INT NOT NULL,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (hospital_id) REFERENCES hospitals(id) ON DELETE CASCADE,
-    INDEX idx_hospital_time (hospital_id, timestamp)
+    INDEX idx_hospital_time (hospital_id, timestamp),
+    INDEX idx_capacity_time (timestamp)
 );
 
 -- Wait time history for predictive modeling
@@ -82,7 +103,94 @@ CREATE TABLE IF NOT EXISTS wait_time_history (
     wait_time_minutes INT NOT NULL,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (hospital_id) REFERENCES hospitals(id) ON DELETE CASCADE,
-    INDEX idx_hospital_severity (hospital_id, severity_level)
+    INDEX idx_hospital_severity (hospital_id, severity_level),
+    INDEX idx_wait_hospital_time (hospital_id, timestamp),
+    INDEX idx_wait_time (timestamp)
+);
+
+-- Hourly/daily wait time rollups (maintained incrementally from rollup_watermark)
+CREATE TABLE IF NOT EXISTS wait_time_rollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    granularity VARCHAR(8) NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    hospital_id INT NOT NULL,
+    severity_level ENUM('low', 'medium', 'high', 'critical') NOT NULL,
+    count INT NOT NULL,
+    mean_wait DOUBLE NOT NULL,
+    p90_wait DOUBLE NOT NULL,
+    min_wait INT NOT NULL,
+    max_wait INT NOT NULL,
+    FOREIGN KEY (hospital_id) REFERENCES hospitals(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_wait_rollup_bucket (granularity, hospital_id, severity_level, bucket_start),
+    INDEX idx_wait_rollup_time (granularity, bucket_start)
+);
+
+-- Hourly/daily capacity rollups (occupancy rate 0.0 to 1.0)
+CREATE TABLE IF NOT EXISTS capacity_rollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    granularity VARCHAR(8) NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    hospital_id INT NOT NULL,
+    count INT NOT NULL,
+    mean_occupancy DOUBLE NOT NULL,
+    p90_occupancy DOUBLE NOT NULL,
+    min_occupancy DOUBLE NOT NULL,
+    max_occupancy DOUBLE NOT NULL,
+    mean_available_beds DOUBLE NOT NULL,
+    mean_occupied_beds DOUBLE NOT NULL,
+    FOREIGN KEY (hospital_id) REFERENCES hospitals(id) ON DELETE CASCADE,
+    UNIQUE KEY uq_capacity_rollup_bucket (granularity, hospital_id, bucket_start),
+    INDEX idx_capacity_rollup_time (granularity, bucket_start)
+);
+
+-- Retired months of capacity_history / wait_time_history.
+-- MySQL cannot range-partition tables that carry foreign keys, so history
+-- is rotated by month instead: database/archive_history.py exports whole
+-- months older than the retention window to compressed columnar files
+-- (one row here per exported chunk) and deletes them from the live table.
+CREATE TABLE IF NOT EXISTS history_archive (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(64) NOT NULL,
+    month CHAR(7) NOT NULL,
+    first_id INT NOT NULL,
+    last_id INT NOT NULL,
+    row_count INT NOT NULL,
+    path VARCHAR(500) NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_archive_table_month (table_name, month)
+);
+
+-- Last import of each source CSV/ZIP (see src/import_manifest.py).
+-- Files whose size/mtime or content hash match a successful import are
+-- skipped; changed files only reprocess rows whose hash is not in row_hashes.
+-- Interrupted ('running') or failed imports of the same content resume from
+-- checkpoint_source/checkpoint_row, updated with every committed batch.
+CREATE TABLE IF NOT EXISTS import_manifest (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    path VARCHAR(500) NOT NULL UNIQUE,
+    kind VARCHAR(32) NOT NULL,
+    params TEXT,
+    size BIGINT NOT NULL,
+    mtime_ns BIGINT NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    row_hashes LONGBLOB,
+    status VARCHAR(16) NOT NULL,
+    checkpoint_source INT DEFAULT 0,
+    checkpoint_row BIGINT DEFAULT 0,
+    row_count INT DEFAULT 0,
+    inserted INT DEFAULT 0,
+    updated INT DEFAULT 0,
+    skipped INT DEFAULT 0,
+    removed INT DEFAULT 0,
+    error TEXT,
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Highest raw history id folded into the rollups
+CREATE TABLE IF NOT EXISTS rollup_watermark (
+    source VARCHAR(64) PRIMARY KEY,
+    last_id INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
 
 -- API configuration table for storing credentials and settings
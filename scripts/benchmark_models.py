@@ -0,0 +1,102 @@
+"""Script to benchmark wait-time model families on size, latency and accuracy.
+
+Usage:
+  python scripts/benchmark_models.py [--db-prod] [--families forest,compact_forest,hist_gbm] [--output bench.json]
+      [--feature-store DIR]
+
+By default runs on a demo in-memory DB seeded with synthetic hospitals and
+wait-time history (same distributions as `train_model.py`).
+With `--db-prod` uses configured `SessionLocal()` (read-only) and reads
+features from the shared store (default .cache/features, see
+`--feature-store`).
+"""
+import sys
+import os
+import json
+import argparse
+import datetime
+import random
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.evaluation import benchmark_model_families
+from src.features.store import WaitTimeFeatureStore, DEFAULT_STORE_PATH
+from src.database import Base
+from src.models import Hospital, WaitTimeHistory, SeverityEnum
+from src.predictor import MODEL_FAMILIES
+
+
+def create_inmemory_session():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    return Session()
+
+
+def seed_demo(session, n_hospitals: int = 20, n_rows: int = 3000):
+    hospitals = []
+    for i in range(1, n_hospitals + 1):
+        h = Hospital(name=f'H{i}', address=f'Address {i}', latitude=-6.2 + i * 0.01, longitude=106.8 + i * 0.01)
+        session.add(h)
+        hospitals.append(h)
+    session.commit()
+
+    severities = list(SeverityEnum)
+    base = {SeverityEnum.low: 45, SeverityEnum.medium: 75, SeverityEnum.high: 120, SeverityEnum.critical: 20}
+    rng = random.Random(42)
+    now = datetime.datetime.utcnow()
+    for i in range(n_rows):
+        hosp = hospitals[i % len(hospitals)]
+        sev = severities[i % len(severities)]
+        ts = now - datetime.timedelta(hours=i % 720)
+        factor = 1.5 if (8 <= ts.hour <= 12 or 17 <= ts.hour <= 20) else (0.7 if ts.hour <= 6 else 1.0)
+        wait = max(5, int(base[sev] * factor + rng.uniform(-10, 10)))
+        session.add(WaitTimeHistory(hospital_id=hosp.id, severity_level=sev, timestamp=ts, wait_time_minutes=wait))
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark wait-time model families')
+    parser.add_argument('--db-prod', action='store_true', help='Use configured production DB')
+    parser.add_argument('--families', type=str, default=','.join(MODEL_FAMILIES),
+                        help='Comma-separated model families to compare')
+    parser.add_argument('--output', type=str, help='Write the report to this JSON file')
+    parser.add_argument('--feature-store', type=str,
+                        help=f'Feature store directory (default: {DEFAULT_STORE_PATH} with --db-prod, '
+                             'a temporary directory otherwise)')
+    args = parser.parse_args()
+
+    if args.db_prod:
+        from src.database import SessionLocal
+        session = SessionLocal()
+        print('Using production DB')
+    else:
+        session = create_inmemory_session()
+        seed_demo(session)
+
+    # the in-memory demo DB is new every run, so its store must be too
+    store_dir = args.feature_store or (DEFAULT_STORE_PATH if args.db_prod else tempfile.mkdtemp(prefix='features-'))
+    families = [f.strip() for f in args.families.split(',') if f.strip()]
+    report = benchmark_model_families(session, families=families, feature_store=WaitTimeFeatureStore(store_dir))
+    if report is None:
+        print('Not enough wait time history to benchmark')
+        return
+
+    print(f"{'family':<16}{'bytes':>12}{'p50 ms':>10}{'p99 ms':>10}{'rows/s':>14}{'MAE':>10}")
+    for family, r in report['families'].items():
+        print(f"{family:<16}{r['model_bytes']:>12}{r['p50_latency_ms']:>10.3f}{r['p99_latency_ms']:>10.3f}"
+              f"{r['batch_rows_per_second']:>14.0f}{r['mae']:>10.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        print(f'Report written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""Script to benchmark the wait-time training pipeline at increasing data sizes.
+
+Usage:
+  python scripts/benchmark_scaling.py [--sizes 10000,100000,1000000,10000000]
+      [--families forest,compact_forest,hist_gbm] [--feature-sets base,geo]
+      [--backend arrays|sqlite] [--timeout 1800] [--output scaling.json]
+      [--faskes PATH [--faskes-cache .cache/faskes]]
+
+Each (size, family, feature set) case runs in a fresh child process on
+synthetic wait-time history drawn from `train_model.py`'s distributions, so
+peak RSS is measured per case (Unix only; reported as n/a elsewhere). With
+`--backend sqlite` rows are written to an in-memory SQLite DB and read back
+through `load_wait_time_frame`, adding the loader to the measured pipeline. Once a case fails or times out, larger
+sizes of the same family/feature set are skipped and reported as such.
+With `--faskes` hospital locations come from a BPJS faskes CSV/ZIP instead
+of random points; the parsed columns are cached once (see
+`src.data.faskes_cache`) and memory-mapped by every case process.
+"""
+import sys
+import os
+import json
+import argparse
+import multiprocessing
+import signal
+import time
+from queue import Empty
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is reported as unavailable
+    resource = None
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.predictor import MODEL_FAMILIES
+
+DEFAULT_SIZES = [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+FEATURE_SETS = ('base', 'geo')
+GEO_RADII_KM = [1.0, 5.0, 10.0]
+
+
+def _load_through_sqlite(rows, hospitals):
+    """Write synthetic rows to in-memory SQLite and read them back with the evaluation loader"""
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+    from src.database import Base
+    from src.models import Hospital, WaitTimeHistory, SeverityEnum
+    from src.evaluation import load_wait_time_frame
+
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.execute(insert(Hospital), [
+        {'id': int(h.hospital_id), 'name': f'H{h.hospital_id}', 'address': '-',
+         'latitude': float(h.latitude), 'longitude': float(h.longitude)}
+        for h in hospitals.itertuples()
+    ])
+
+    severities = {1: SeverityEnum.low, 2: SeverityEnum.medium, 3: SeverityEnum.high, 4: SeverityEnum.critical}
+    t0 = time.perf_counter()
+    chunk = 50000
+    for i in range(0, len(rows), chunk):
+        part = rows.iloc[i:i + chunk]
+        session.execute(insert(WaitTimeHistory), [
+            {'hospital_id': int(h), 'severity_level': severities[int(s)],
+             'timestamp': t.to_pydatetime(), 'wait_time_minutes': int(w)}
+            for h, s, t, w in zip(part['hospital_id'], part['severity'], part['timestamp'], part['wait_time'])
+        ])
+    session.commit()
+    write_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    loaded = load_wait_time_frame(session)
+    load_time = time.perf_counter() - t0
+    session.close()
+    return loaded, write_time, load_time
+
+
+def _faskes_locations(hospitals, source, cache_dir):
+    """Replace synthetic hospital locations with faskes coordinates (repeated if too few)"""
+    import numpy as np
+    from src.data.faskes_cache import ParsedFaskesCache
+
+    columns = ParsedFaskesCache(cache_dir).load(source)
+    if columns['latitude'].shape[0] == 0:
+        raise ValueError(f'no located facilities in {source}')
+    n = len(hospitals)
+    hospitals = hospitals.copy()
+    hospitals['latitude'] = np.resize(columns['latitude'], n)
+    hospitals['longitude'] = np.resize(columns['longitude'], n)
+    return hospitals
+
+
+def _geofeature_columns(hospitals):
+    from src.features.geospatial import neighbor_features_from_arrays
+    from src.features.store import radius_column
+    import numpy as np
+    import pandas as pd
+
+    features = neighbor_features_from_arrays(
+        hospitals['hospital_id'].to_numpy(), hospitals['latitude'].to_numpy(), hospitals['longitude'].to_numpy(),
+        GEO_RADII_KM, [5.0]
+    )
+    geo = {'hospital_id': hospitals['hospital_id'].to_numpy()}
+    for i, r in enumerate(GEO_RADII_KM):
+        geo[radius_column(r)] = features['counts'][:, i]
+    geo['kernel_density'] = features['densities'][:, 0].astype(np.float32)
+    return pd.DataFrame(geo)
+
+
+def run_case(case: dict) -> dict:
+    """Run one benchmark case in the current process"""
+    import numpy as np
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.model_selection import train_test_split
+    from src.evaluation import synthetic_wait_time_frame
+    from src.predictor import build_model
+
+    result = dict(case)
+    t0 = time.perf_counter()
+    rows, hospitals = synthetic_wait_time_frame(case['rows'], n_hospitals=case['hospitals'], seed=case['seed'])
+    result['generate_time_seconds'] = time.perf_counter() - t0
+
+    if case.get('faskes'):
+        t0 = time.perf_counter()
+        hospitals = _faskes_locations(hospitals, case['faskes'], case['faskes_cache'])
+        result['faskes_load_seconds'] = time.perf_counter() - t0
+
+    if case['backend'] == 'sqlite':
+        rows, result['write_time_seconds'], result['load_time_seconds'] = _load_through_sqlite(rows, hospitals)
+
+    columns = ['hospital_id', 'severity', 'hour', 'day_of_week']
+    if case['feature_set'] == 'geo':
+        t0 = time.perf_counter()
+        geo = _geofeature_columns(hospitals)
+        rows = rows.merge(geo, on='hospital_id', how='inner', sort=False)
+        columns += [c for c in geo.columns if c != 'hospital_id']
+        result['feature_time_seconds'] = time.perf_counter() - t0
+
+    X = rows[columns].to_numpy(dtype=np.float32)
+    y = rows['wait_time'].to_numpy()
+    del rows
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=case['seed'])
+
+    model = build_model(case['family'], random_state=case['seed'])
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train)
+    result['fit_time_seconds'] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    preds = model.predict(X_test)
+    predict_time = time.perf_counter() - t0
+    result['predict_rows_per_second'] = float(X_test.shape[0] / predict_time) if predict_time > 0 else None
+    result['mae'] = float(mean_absolute_error(y_test, preds))
+    result['n_features'] = len(columns)
+    result['peak_rss_mb'] = _peak_rss_mb()
+    result['status'] = 'ok'
+    return result
+
+
+def _peak_rss_mb():
+    """Peak RSS of this process in MB, or None where the resource module is missing"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, KiB on Linux
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+def _child(case, queue):
+    try:
+        queue.put(run_case(case))
+    except MemoryError:
+        queue.put(dict(case, status='error', error='MemoryError'))
+    except Exception as e:
+        queue.put(dict(case, status='error', error=f'{type(e).__name__}: {str(e)}'))
+
+
+def _exit_error(exitcode) -> str:
+    """Describe how a case process died without reporting a result"""
+    if exitcode is not None and exitcode < 0:
+        if -exitcode == getattr(signal, 'SIGKILL', 9):
+            return f'killed by signal {-exitcode} (likely out of memory)'
+        return f'killed by signal {-exitcode}'
+    return f'exit code {exitcode}'
+
+
+def run_isolated(case: dict, timeout: float) -> dict:
+    """
+    Run a case in a fresh process so peak RSS and crashes are per case
+    A process that dies without a result (e.g. OOM-killed) is reported as
+    an error as soon as it exits, not after the timeout.
+    """
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_child, args=(case, queue))
+    t0 = time.perf_counter()
+    deadline = t0 + timeout
+    proc.start()
+    result = None
+    timed_out = False
+    while result is None:
+        alive = proc.is_alive()
+        try:
+            # a child that just exited may still have its result in the pipe
+            result = queue.get(timeout=max(0.0, min(1.0, deadline - time.perf_counter())) if alive else 1.0)
+        except Empty:
+            if not alive:
+                break
+            if time.perf_counter() >= deadline:
+                timed_out = True
+                break
+    proc.join(0 if timed_out else 5)
+    if proc.is_alive():
+        proc.terminate()
+        proc.join()
+    if result is None:
+        status = 'timeout' if timed_out else 'error'
+        result = dict(case, status=status, error=None if timed_out else _exit_error(proc.exitcode))
+    result['wall_time_seconds'] = time.perf_counter() - t0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark wait-time training at increasing data sizes')
+    parser.add_argument('--sizes', type=str, default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help='Comma-separated row counts')
+    parser.add_argument('--families', type=str, default=','.join(MODEL_FAMILIES),
+                        help='Comma-separated model families')
+    parser.add_argument('--feature-sets', type=str, default=','.join(FEATURE_SETS),
+                        help='Comma-separated feature sets (base, geo)')
+    parser.add_argument('--backend', choices=['arrays', 'sqlite'], default='arrays',
+                        help='Generate arrays directly, or round-trip rows through in-memory SQLite')
+    parser.add_argument('--hospitals', type=int, default=200, help='Number of synthetic hospitals')
+    parser.add_argument('--timeout', type=float, default=1800, help='Seconds allowed per case')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default='scaling_benchmark.json', help='JSON report path')
+    parser.add_argument('--faskes', type=str, default=None,
+                        help='BPJS faskes CSV/ZIP whose coordinates replace the synthetic hospital locations')
+    parser.add_argument('--faskes-cache', type=str, default='.cache/faskes',
+                        help='Directory of parsed faskes columns (default .cache/faskes)')
+    args = parser.parse_args()
+
+    sizes = sorted(int(float(s)) for s in args.sizes.split(',') if s.strip())
+    families = [f.strip() for f in args.families.split(',') if f.strip()]
+    feature_sets = [f.strip() for f in args.feature_sets.split(',') if f.strip()]
+    for f in feature_sets:
+        if f not in FEATURE_SETS:
+            parser.error(f'unknown feature set: {f}')
+
+    if args.faskes:
+        # parse once here; case processes memory-map the cached columns
+        from src.data.faskes_cache import ParsedFaskesCache
+        t0 = time.perf_counter()
+        rows = ParsedFaskesCache(args.faskes_cache).load(args.faskes)['name'].shape[0]
+        print(f'{rows} located facilities from {args.faskes} ({time.perf_counter() - t0:.2f}s)')
+
+    results = []
+    broken = set()
+    print(f"{'rows':>10} {'family':<16}{'features':<10}{'status':<9}{'fit s':>10}{'pred rows/s':>14}{'RSS MB':>10}{'MAE':>8}")
+    for n in sizes:
+        for family in families:
+            for feature_set in feature_sets:
+                case = {'rows': n, 'family': family, 'feature_set': feature_set, 'backend': args.backend,
+                        'hospitals': args.hospitals, 'seed': args.seed,
+                        'faskes': args.faskes, 'faskes_cache': args.faskes_cache}
+                if (family, feature_set) in broken:
+                    result = dict(case, status='skipped', error='a smaller size already failed')
+                else:
+                    result = run_isolated(case, args.timeout)
+                    if result['status'] != 'ok':
+                        broken.add((family, feature_set))
+                results.append(result)
+
+                if result['status'] == 'ok':
+                    rss = 'n/a' if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:.0f}"
+                    print(f"{n:>10} {family:<16}{feature_set:<10}{'ok':<9}{result['fit_time_seconds']:>10.2f}"
+                          f"{result['predict_rows_per_second'] or 0:>14.0f}{rss:>10}{result['mae']:>8.2f}")
+                else:
+                    print(f"{n:>10} {family:<16}{feature_set:<10}{result['status']:<9} {result.get('error') or ''}")
+
+                # rewrite after every case so partial runs are kept
+                with open(args.output, 'w', encoding='utf-8') as fh:
+                    json.dump({'config': vars(args), 'results': results}, fh, indent=2)
+
+    print(f'Report written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,14 @@
 """Script to load sample faskes CSV, upsert into DB, and compare baseline vs augmented evaluation.
 
 Usage:
-    python scripts/merge_faskes.py [--db-prod]
+    python scripts/merge_faskes.py [--db-prod] [--time-series] [--cache-dir DIR] [--no-cache] [--refresh-cache]
 
 By default uses an in-memory DB seeded with small synthetic wait_time_history for demo.
 If `--db-prod` is provided, uses `SessionLocal()` from `src.database` to run on configured DB (reads only).
+With `--time-series` metrics come from rolling-origin folds instead of one random split.
+Results are cached as JSON under `--cache-dir` (default .cache/evaluation),
+keyed by a fingerprint of the hospital and wait-time tables plus the
+parameters; `--refresh-cache` recomputes, `--no-cache` bypasses the cache.
 """
 import sys
 import os
@@ -19,6 +23,7 @@ if ROOT not in sys.path:
 
 from src.data.faskes_loader import load_faskes_csv
 from src.evaluation import compare_baseline_vs_augmented
+from src.evaluation_cache import EvaluationCache
 from src.database import Base
 from src.models import Hospital, WaitTimeHistory, SeverityEnum
 
@@ -49,24 +54,35 @@ def seed_demo_data(session):
     session.commit()
 
 
+def compare(session, split):
+    if '--no-cache' in sys.argv:
+        return compare_baseline_vs_augmented(session, split=split)
+    cache_dir = sys.argv[sys.argv.index('--cache-dir') + 1] if '--cache-dir' in sys.argv else '.cache/evaluation'
+    cache = EvaluationCache(cache_dir)
+    return cache.cached(session, 'compare_baseline_vs_augmented', compare_baseline_vs_augmented,
+                        {'split': split}, refresh='--refresh-cache' in sys.argv)
+
+
 def main():
     use_prod = '--db-prod' in sys.argv
+    split = 'time_series' if '--time-series' in sys.argv else 'random'
     if use_prod:
         from src.database import SessionLocal
         session = SessionLocal()
         print('Using configured production DB via SessionLocal()')
         # load provided faskes CSV into DB (upsert)
         print('Loading data/faskes_sample.csv into DB...')
-        upserts = load_faskes_csv(session, 'data/faskes_sample.csv')
-        print(f'Upserted {upserts} faskes rows into Hospital table')
+        counts = load_faskes_csv(session, 'data/faskes_sample.csv')
+        print(f"Upserted faskes rows into Hospital table: {counts['inserted']} inserted, "
+              f"{counts['updated']} updated, {counts['skipped']} skipped")
         print('Running baseline vs augmented evaluation on production DB (read-only operations)...')
-        result = compare_baseline_vs_augmented(session)
+        result = compare(session, split)
         print('Result:', result)
     else:
         session = create_inmemory_session()
         seed_demo_data(session)
         print('Running baseline vs augmented evaluation on demo in-memory DB...')
-        result = compare_baseline_vs_augmented(session)
+        result = compare(session, split)
         print('Baseline metrics:', result['baseline'])
         print('Augmented metrics:', result['augmented'])
 
@@ -1,14 +1,29 @@
 """Script to run hyperparameter tuning and geospatial feature evaluation.
 
 Usage:
-  python scripts/tune_and_evaluate.py [--db-prod]
+  python scripts/tune_and_evaluate.py [--db-prod] [--checkpoint tuning_checkpoint.json] [--time-series] [--sweep]
+      [--cache-dir DIR] [--no-cache] [--refresh-cache] [--feature-store DIR]
 
 By default runs on a demo in-memory DB seeded from `data/faskes_sample.csv`.
 With `--db-prod` uses configured `SessionLocal()`.
+With `--checkpoint PATH` tuning scores are checkpointed to PATH and an
+interrupted run resumes from it.
+With `--time-series` evaluation and tuning use rolling-origin (TimeSeriesSplit)
+folds instead of random splits.
+With `--sweep` a grid of radius sets x kernel bandwidths is evaluated from
+one neighbour-distance computation (see `sweep_geofeatures`).
+Evaluation, sweep and tuning results are cached as JSON under `--cache-dir`
+(default .cache/evaluation), keyed by a fingerprint of the hospital and
+wait-time tables plus the parameters; `--refresh-cache` recomputes,
+`--no-cache` bypasses the cache.
+Evaluation, sweep and tuning read row features from one shared
+WaitTimeFeatureStore under `--feature-store` (default .cache/features with
+`--db-prod`, a temporary directory for the demo DB).
 """
 import sys
 import os
 import datetime
+import tempfile
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -17,7 +32,9 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 from src.data.faskes_loader import load_faskes_csv
-from src.evaluation import evaluate_with_geofeatures, run_hyperparameter_tuning
+from src.evaluation import evaluate_with_geofeatures, run_hyperparameter_tuning, sweep_geofeatures
+from src.evaluation_cache import EvaluationCache, value_digest
+from src.features.store import WaitTimeFeatureStore, DEFAULT_STORE_PATH
 from src.database import Base
 from src.models import Hospital, WaitTimeHistory, SeverityEnum
 
@@ -60,12 +77,54 @@ def main():
         if hosp:
             patient_locations[wt.id] = (hosp.latitude + 0.001 * (wt.id % 3), hosp.longitude + 0.001 * ((wt.id+1) % 3))
 
+    time_series = '--time-series' in sys.argv
+    split = 'time_series' if time_series else 'random'
+
+    cache = None
+    if '--no-cache' not in sys.argv:
+        cache_dir = sys.argv[sys.argv.index('--cache-dir') + 1] if '--cache-dir' in sys.argv else '.cache/evaluation'
+        cache = EvaluationCache(cache_dir)
+    refresh = '--refresh-cache' in sys.argv
+
+    if '--feature-store' in sys.argv:
+        store_dir = sys.argv[sys.argv.index('--feature-store') + 1]
+    else:
+        # the in-memory demo DB is new every run, so its store must be too
+        store_dir = DEFAULT_STORE_PATH if use_prod else tempfile.mkdtemp(prefix='features-')
+    feature_store = WaitTimeFeatureStore(store_dir)
+
+    def run(fn, bulky=None, **params):
+        # bulky inputs are passed to fn but keyed by their sha256, not stored in the key;
+        # the feature store is derived from the fingerprinted tables and not keyed at all
+        bulky = bulky or {}
+        if cache is None:
+            return fn(session, **params, **bulky, feature_store=feature_store)
+        keyed = dict(params, **{f'{name}_sha256': value_digest(value) for name, value in bulky.items()})
+        return cache.cached(session, fn.__name__,
+                            lambda db, **_: fn(db, **params, **bulky, feature_store=feature_store),
+                            keyed, refresh=refresh)
+
     print('Evaluating with geospatial features (patient distance, multi-radius, kernel density)')
-    r = evaluate_with_geofeatures(session, include_patient_distance=True, patient_locations=patient_locations, radii_km=[1.0,5.0,10.0], include_kernel=True)
+    r = run(evaluate_with_geofeatures, bulky={'patient_locations': patient_locations}, include_patient_distance=True, radii_km=[1.0,5.0,10.0], include_kernel=True, split=split)
     print('Evaluation result:', r)
 
-    print('Running quick hyperparameter tuning...')
-    tuning = run_hyperparameter_tuning(session, cv_splits=3, use_time_series=False)
+    if '--sweep' in sys.argv:
+        radius_sets = [[1.0], [5.0], [10.0], [1.0, 5.0], [1.0, 5.0, 10.0]]
+        bandwidths = [1.0, 2.0, 5.0, 10.0]
+        print(f'Sweeping {len(radius_sets) * len(bandwidths)} geofeature combinations...')
+        sweep = run(sweep_geofeatures, radius_sets=radius_sets, bandwidths_km=bandwidths, split=split)
+        if sweep:
+            print(f"Neighbour distances computed once in {sweep['distance_time_seconds']:.3f}s; "
+                  f"{sweep['n_combinations']} fits in {sweep['wall_time_seconds']:.1f}s")
+            for res in sweep['results'][:5]:
+                print(f"  radii={res['radii_km']} bandwidth={res['bandwidth_km']}: MAE={res['mae']:.2f}")
+
+    checkpoint_path = None
+    if '--checkpoint' in sys.argv:
+        checkpoint_path = sys.argv[sys.argv.index('--checkpoint') + 1]
+
+    print('Running successive-halving hyperparameter tuning...')
+    tuning = run(run_hyperparameter_tuning, cv_splits=3, use_time_series=time_series, checkpoint_path=checkpoint_path)
     print('Tuning results:', tuning)
 
 
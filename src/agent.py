@@ -11,6 +11,7 @@ from langchain_openai import ChatOpenAI
 from sqlalchemy.orm import Session
 from src.models import Hospital, Patient, Referral
 from src.predictor import WaitTimePredictor, CapacityAnalyzer
+from src.forecasting import CapacityForecaster
 from src.maps_api import GoogleMapsClient
 from dotenv import load_dotenv
 
@@ -21,6 +22,7 @@ class SmartReferralAgent:
         self.db = db
         self.wait_time_predictor = WaitTimePredictor()
         self.capacity_analyzer = CapacityAnalyzer()
+        self.capacity_forecaster = CapacityForecaster()
         self.maps_client = GoogleMapsClient()
         
         # Initialize OpenAI (optional, will work without it)
@@ -205,6 +207,13 @@ class SmartReferralAgent:
             # Sort by score and get best option
             scored_hospitals.sort(key=lambda x: x['score'])
             best = scored_hospitals[0]
+
+            # Cached next-24h occupancy forecast (refit at most every 15 minutes)
+            try:
+                self.capacity_forecaster.refresh_if_stale(self.db)
+                forecast_peak = self.capacity_forecaster.peak_occupancy(best['hospital'].id)
+            except Exception:
+                forecast_peak = None
             
             return {
                 'success': True,
@@ -217,6 +226,7 @@ class SmartReferralAgent:
                 'predicted_wait_time': best['wait_time'],
                 'available_beds': best['capacity']['available_beds'],
                 'occupancy_rate': best['capacity']['occupancy_rate'],
+                'forecast_peak_occupancy_24h': round(forecast_peak * 100, 2) if forecast_peak is not None else None,
                 'alternatives': [
                     {
                         'name': h['hospital'].name,
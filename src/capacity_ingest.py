@@ -0,0 +1,272 @@
+"""
+Bulk bed-availability ingestion.
+
+Accepts (hospital_id, available, occupied, timestamp) readings from files,
+sockets or direct calls and writes them once per flush window: the latest
+reading per hospital goes into one CASE-based UPDATE of
+hospitals.available_beds per chunk, and every reading is appended to
+capacity_history with one executemany INSERT per chunk, so trends and
+rollups see the full series.
+"""
+import csv
+import json
+import logging
+import socketserver
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List
+from sqlalchemy import case, insert, update
+from sqlalchemy.orm import Session
+from src.models import Hospital, CapacityHistory
+from src.change_feed import capacity_feed
+
+logger = logging.getLogger(__name__)
+
+
+def parse_timestamp(value) -> datetime:
+    """Parse ISO-8601 strings or epoch seconds; empty means now (UTC)"""
+    if value is None or value == '':
+        return datetime.utcnow()
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value)
+    text = str(value).strip()
+    try:
+        return datetime.utcfromtimestamp(float(text))
+    except ValueError:
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        # history timestamps are naive UTC
+        if parsed.tzinfo is not None:
+            parsed = datetime.utcfromtimestamp(parsed.timestamp())
+        return parsed
+
+
+def parse_reading(record: Dict) -> Dict:
+    """
+    Normalize one feed record
+    Accepts hospital_id, available/available_beds, occupied/occupied_beds, timestamp
+    """
+    available = record.get('available', record.get('available_beds'))
+    occupied = record.get('occupied', record.get('occupied_beds'))
+    return {
+        'hospital_id': int(record['hospital_id']),
+        'available_beds': int(available),
+        'occupied_beds': int(occupied),
+        'timestamp': parse_timestamp(record.get('timestamp')),
+    }
+
+
+class CapacityIngestor:
+    """
+    Buffers capacity readings and writes them in bulk
+    """
+
+    def __init__(self, db: Session, flush_interval: float = 60.0, max_pending: int = 10000,
+                 chunk_size: int = 1000, on_flush=None, change_feed=None):
+        """
+        Args:
+            db: Database session
+            flush_interval: Seconds between automatic flushes (coalescing window)
+            max_pending: Flush early once this many hospitals or readings are pending
+            chunk_size: Hospitals per UPDATE, readings per INSERT statement
+            on_flush: Optional callback(list of written readings) after each commit
+            change_feed: CapacityChangeFeed to publish to (default: process-wide feed)
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.chunk_size = chunk_size
+        self.on_flush = on_flush
+        self.change_feed = change_feed or capacity_feed
+        self._pending: Dict[int, Dict] = {}  # latest reading per hospital
+        self._history: List[Dict] = []  # every accepted reading
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # the session is not thread-safe
+        self._last_flush = time.monotonic()
+        self.stats = {
+            'received': 0,
+            'coalesced': 0,
+            'written': 0,
+            'history_rows': 0,
+            'unknown_hospitals': 0,
+            'rejected': 0,
+            'flushes': 0,
+        }
+
+    def submit(self, hospital_id: int, available: int, occupied: int, timestamp=None):
+        """Queue one reading; the latest reading per hospital sets available_beds"""
+        self.submit_reading({
+            'hospital_id': int(hospital_id),
+            'available_beds': int(available),
+            'occupied_beds': int(occupied),
+            'timestamp': parse_timestamp(timestamp),
+        })
+
+    def submit_reading(self, reading: Dict):
+        """Queue one normalized reading (see parse_reading)"""
+        if reading['available_beds'] < 0 or reading['occupied_beds'] < 0:
+            self.reject()
+            return
+        with self._lock:
+            self.stats['received'] += 1
+            self._history.append(reading)
+            current = self._pending.get(reading['hospital_id'])
+            if current is not None:
+                self.stats['coalesced'] += 1
+            if current is None or current['timestamp'] <= reading['timestamp']:
+                self._pending[reading['hospital_id']] = reading
+            due = (len(self._pending) >= self.max_pending or len(self._history) >= self.max_pending
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def reject(self):
+        """Count a malformed or invalid record (called from feed threads)"""
+        with self._lock:
+            self.stats['rejected'] += 1
+
+    def submit_many(self, records: Iterable[Dict]) -> int:
+        """Queue raw feed records; malformed ones are counted as rejected"""
+        count = 0
+        for record in records:
+            try:
+                reading = parse_reading(record)
+            except (KeyError, TypeError, ValueError) as e:
+                self.reject()
+                logger.debug(f"Rejected capacity record {record}: {str(e)}")
+                continue
+            self.submit_reading(reading)
+            count += 1
+        return count
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Write all pending readings
+        On a failed write the readings are queued again for the next flush
+        (a newer reading for the same hospital that arrived meanwhile still
+        sets available_beds).
+        Returns:
+            Number of hospitals updated
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, history = self._pending, self._history
+                self._pending, self._history = {}, []
+                self._last_flush = time.monotonic()
+
+            if not pending:
+                return 0
+
+            try:
+                written = self._write(pending, history)
+            except Exception as e:
+                logger.error(f"Error flushing capacity readings: {str(e)}")
+                self.db.rollback()
+                self._requeue(pending, history)
+                return 0
+
+        if written:
+            self.change_feed.publish_many(written, source='ingest')
+        if self.on_flush and written:
+            self.on_flush(written)
+        return len(written)
+
+    def _requeue(self, pending: Dict[int, Dict], history: List[Dict]):
+        with self._lock:
+            self._history = history + self._history
+            for hospital_id, reading in pending.items():
+                current = self._pending.get(hospital_id)
+                if current is None or current['timestamp'] < reading['timestamp']:
+                    self._pending[hospital_id] = reading
+
+    def _write(self, pending: Dict[int, Dict], history: List[Dict]) -> List[Dict]:
+        ids = list(pending.keys())
+        existing = set()
+        for i in range(0, len(ids), self.chunk_size):
+            chunk = ids[i:i + self.chunk_size]
+            existing.update(r[0] for r in self.db.query(Hospital.id).filter(Hospital.id.in_(chunk)).all())
+
+        readings = [pending[h] for h in ids if h in existing]
+
+        now = datetime.utcnow()
+        for i in range(0, len(readings), self.chunk_size):
+            mapping = {r['hospital_id']: r['available_beds'] for r in readings[i:i + self.chunk_size]}
+            self.db.execute(
+                update(Hospital)
+                .where(Hospital.id.in_(list(mapping.keys())))
+                .values(available_beds=case(mapping, value=Hospital.id), updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        rows = [r for r in history if r['hospital_id'] in existing]
+        for i in range(0, len(rows), self.chunk_size):
+            self.db.execute(insert(CapacityHistory), rows[i:i + self.chunk_size])
+
+        self.db.commit()
+        with self._lock:
+            self.stats['unknown_hospitals'] += len(ids) - len(readings)
+            self.stats['written'] += len(readings)
+            self.stats['history_rows'] += len(rows)
+            self.stats['flushes'] += 1
+        return readings
+
+    def ingest_file(self, path: str) -> int:
+        """
+        Ingest a CSV (header row) or JSON-lines file, then flush
+        Returns:
+            Number of accepted records
+        """
+        with open(path, newline='', encoding='utf-8') as fh:
+            if path.endswith('.jsonl') or path.endswith('.ndjson'):
+                count = self.submit_many(json.loads(line) for line in fh if line.strip())
+            else:
+                count = self.submit_many(csv.DictReader(fh))
+        self.flush()
+        return count
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return self.stats.copy()
+
+
+class _FeedHandler(socketserver.StreamRequestHandler):
+    """Newline-delimited JSON readings, one connection per feed"""
+
+    def handle(self):
+        ingestor = self.server.ingestor
+        for raw in self.rfile:
+            line = raw.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            try:
+                ingestor.submit_many([json.loads(line)])
+            except ValueError:
+                ingestor.reject()
+
+
+def serve(ingestor: CapacityIngestor, host: str = '0.0.0.0', port: int = 9100):
+    """
+    Accept newline-delimited JSON readings over TCP until interrupted.
+    A background thread flushes the window even when feeds go quiet.
+    """
+    stop = threading.Event()
+
+    def flush_loop():
+        while not stop.wait(ingestor.flush_interval):
+            ingestor.flush()
+
+    flusher = threading.Thread(target=flush_loop, daemon=True)
+    flusher.start()
+
+    with socketserver.ThreadingTCPServer((host, port), _FeedHandler) as server:
+        server.ingestor = ingestor
+        logger.info(f"Capacity feed listening on {host}:{port}")
+        try:
+            server.serve_forever()
+        finally:
+            stop.set()
+            ingestor.flush()
@@ -0,0 +1,120 @@
+"""
+In-process capacity change feed.
+
+Writers publish every change to a hospital's bed availability; the feed
+assigns a monotonically increasing version per hospital (and a global
+sequence number) and notifies subscribers synchronously. Caches compare
+versions instead of relying on short TTLs or re-reading hospital rows.
+"""
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CapacityChangeFeed:
+    """
+    Versioned change feed for hospital capacity
+    """
+
+    def __init__(self, log_size: int = 10000):
+        """
+        Args:
+            log_size: Recent changes kept for changes_since() polling
+        """
+        self._versions: Dict[int, int] = {}
+        self._sequence = 0
+        self._log = deque(maxlen=log_size)
+        self._subscribers: Dict[int, Callable[[List[Dict]], None]] = {}
+        self._next_token = 1
+        self._lock = threading.Lock()
+
+    @property
+    def sequence(self) -> int:
+        """Global sequence number of the latest change (0 if none)"""
+        return self._sequence
+
+    def version(self, hospital_id: int) -> int:
+        """Capacity version of a hospital (0 if never changed)"""
+        return self._versions.get(int(hospital_id), 0)
+
+    def versions(self, hospital_ids: Iterable[int]) -> Dict[int, int]:
+        return {int(h): self._versions.get(int(h), 0) for h in hospital_ids}
+
+    def subscribe(self, callback: Callable[[List[Dict]], None]) -> int:
+        """
+        Register a callback receiving each published batch of changes
+        Returns:
+            Token for unsubscribe()
+        """
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscribers[token] = callback
+        return token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def publish(self, hospital_id: int, available_beds: Optional[int] = None, source: str = '') -> int:
+        """
+        Publish one capacity change
+        Returns:
+            New version of the hospital
+        """
+        changes = self.publish_many([{'hospital_id': hospital_id, 'available_beds': available_beds}], source=source)
+        return changes[0]['version']
+
+    def publish_many(self, changes: Iterable[Dict], source: str = '') -> List[Dict]:
+        """
+        Publish a batch of changes ({'hospital_id', 'available_beds'}) and
+        notify subscribers once
+        Returns:
+            Published changes with 'version', 'sequence' and 'source' set
+        """
+        published = []
+        with self._lock:
+            for change in changes:
+                hospital_id = int(change['hospital_id'])
+                version = self._versions.get(hospital_id, 0) + 1
+                self._versions[hospital_id] = version
+                self._sequence += 1
+                record = {
+                    'hospital_id': hospital_id,
+                    'available_beds': change.get('available_beds'),
+                    'version': version,
+                    'sequence': self._sequence,
+                    'source': source,
+                }
+                self._log.append(record)
+                published.append(record)
+            subscribers = list(self._subscribers.values())
+
+        if published:
+            for callback in subscribers:
+                try:
+                    callback(published)
+                except Exception as e:
+                    logger.error(f"Capacity change subscriber failed: {str(e)}")
+        return published
+
+    def changes_since(self, sequence: int) -> Optional[List[Dict]]:
+        """
+        Changes published after a sequence number
+        Returns:
+            List of changes, or None if older changes were already evicted
+            from the log (callers should then invalidate everything)
+        """
+        with self._lock:
+            if sequence >= self._sequence:
+                return []
+            if self._log and self._log[0]['sequence'] > sequence + 1:
+                return None
+            return [c for c in self._log if c['sequence'] > sequence]
+
+
+# Process-wide feed used by default by all writers and caches
+capacity_feed = CapacityChangeFeed()
@@ -5,19 +5,130 @@ Supports:
 - BPJS Faskes Indonesia (israhabibi/list-faskes-bpjs-indonesia)
 - Bed to Population Ratio (yafethtb/dataset-rasio-bed-to-population-faskes-ii)
 """
+import numpy as np
 import pandas as pd
 import os
 import re
 import zipfile
 import tempfile
-from typing import List, Dict, Optional, Tuple
+import codecs
+import io
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import bindparam, case, update
 from sqlalchemy.orm import Session
 from src.models import Hospital
+from src.data.name_index import HospitalNameIndex
+from src.data.faskes_loader import hospital_upsert_statement, location_key, write_hospital_upserts
+from src.import_manifest import ImportTracker, row_hashes, unseen_mask
+from src.change_feed import capacity_feed
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pattern: ?q=LAT,LON or similar
+GMAPS_COORDINATE_PATTERN = r'q=(-?\d+\.?\d*),\s*(-?\d+\.?\d*)'
+
+# Map BPJS Faskes specific columns
+FASKES_COLUMN_MAPPING = {
+    'namafaskes': 'name',
+    'nama': 'name',
+    'nama_rs': 'name',
+    'alamatfaskes': 'address',
+    'alamat': 'address',
+    'latlongfaskes': 'gmaps_link',
+    'latlong': 'gmaps_link',
+    'tipefaskes': 'type',
+    'tipe': 'type',
+    'kodefaskes': 'code',
+    'kode': 'code',
+    'provinsi': 'province',
+    'kotakab': 'city',
+    'kota': 'city'
+}
+
+
+# Columns a faskes row overwrites on a hospital with the same (name, latitude,
+# longitude); bed counts are class estimates and keep the stored values
+UPSERT_COLUMNS = ('address', 'type', 'class', 'updated_at')
+# Columns written when a changed file moves a hospital, matched by (name, address)
+MOVE_COLUMNS = ('latitude', 'longitude', 'type', 'class', 'updated_at')
+
+# Bytes sniffed to pick an encoding before streaming the whole file
+ENCODING_SAMPLE_BYTES = 256 * 1024
+
+REPLACE_AND_COUNT = 'csv_loader_replace_and_count'
+_decode_errors = threading.local()
+
+
+def _replace_and_count(error: UnicodeDecodeError):
+    _decode_errors.replaced = _replaced_bytes() + (error.end - error.start)
+    return '\ufffd', error.end
+
+
+def _replaced_bytes() -> int:
+    return getattr(_decode_errors, 'replaced', 0)
+
+
+codecs.register_error(REPLACE_AND_COUNT, _replace_and_count)
+
+
+def sniff_encoding(sample: bytes) -> str:
+    """
+    Pick a CSV encoding from a leading byte sample
+    
+    UTF-8 (with or without BOM) when the sample decodes as UTF-8 (a
+    multi-byte character cut off at the end of the sample is allowed),
+    otherwise cp1252 (Windows exports), otherwise latin-1, which decodes
+    any byte.
+    
+    Args:
+        sample: First bytes of the file
+        
+    Returns:
+        Python codec name
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+class _CountingReader(io.RawIOBase):
+    """Raw stream wrapper counting the bytes read through it"""
+    
+    def __init__(self, raw: IO[bytes]):
+        self.raw = raw
+        self.bytes_read = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        data = self.raw.read(len(buffer))
+        buffer[:len(data)] = data
+        self.bytes_read += len(data)
+        return len(data)
+
+
+def _is_faskes_column(column: str) -> bool:
+    """Column projection for streamed faskes CSVs: only mapped columns are parsed"""
+    column = column.lower().strip()
+    return column in FASKES_COLUMN_MAPPING or column in FASKES_COLUMN_MAPPING.values()
+
 
 class CSVDataLoader:
     """
@@ -25,20 +136,26 @@ class CSVDataLoader:
     Supports multiple Kaggle dataset formats
     """
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, change_feed=None, chunk_size: Optional[int] = None,
+                 manifest: Optional[ImportTracker] = None, progress: Optional[Callable[[Dict], Any]] = None):
         """
         Initialize CSV data loader
         Args:
             db_session: SQLAlchemy database session
+            change_feed: CapacityChangeFeed notified of bed changes (default: process-wide feed)
+            chunk_size: Stream CSVs in chunks of this many rows, each filtered,
+                inserted and committed before the next is read (None: whole file)
+            manifest: ImportTracker used to skip unchanged files, load only
+                new or edited rows of changed ones and resume interrupted
+                imports from their last committed batch (None: always load in full)
+            progress: Called with get_stats() after every committed batch and chunk
         """
         self.db = db_session
-        self.stats = {
-            'total_processed': 0,
-            'total_inserted': 0,
-            'total_updated': 0,
-            'total_skipped': 0,
-            'errors': []
-        }
+        self.change_feed = change_feed or capacity_feed
+        self.chunk_size = chunk_size
+        self.manifest = manifest
+        self.progress = progress
+        self.reset_stats()
         
     def extract_coordinates_from_gmaps_link(self, gmaps_link: str) -> Tuple[float, float]:
         """
@@ -55,9 +172,7 @@ class CSVDataLoader:
             return (0.0, 0.0)
         
         try:
-            # Pattern: ?q=LAT,LON or similar
-            pattern = r'q=(-?\d+\.?\d*),\s*(-?\d+\.?\d*)'
-            match = re.search(pattern, str(gmaps_link))
+            match = re.search(GMAPS_COORDINATE_PATTERN, str(gmaps_link))
             
             if match:
                 lat = float(match.group(1))
@@ -75,6 +190,10 @@ class CSVDataLoader:
         """
         Extract CSV files from a ZIP archive
         
+        The loaders read members straight from the archive (see
+        _csv_sources); this is for callers that need the files on disk and
+        are responsible for removing them.
+        
         Args:
             zip_path: Path to ZIP file
             
@@ -85,8 +204,7 @@ class CSVDataLoader:
         
         try:
             with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # Get list of CSV files in the ZIP
-                csv_files = [f for f in zip_ref.namelist() if f.endswith('.csv') and not f.startswith('__MACOSX')]
+                csv_files = _zip_csv_members(zip_ref)
                 
                 if not csv_files:
                     logger.warning(f"No CSV files found in ZIP: {zip_path}")
@@ -121,279 +239,587 @@ class CSVDataLoader:
             province: Filter by province name (optional)
             
         Returns:
-            Number of hospitals loaded
+            Number of hospitals inserted or updated (0 if skipped as unchanged)
         """
         try:
             logger.info(f"Loading BPJS Faskes data from {csv_path}")
+            plan = self._plan_import(csv_path, 'faskes', {'province': province})
+            if plan is not None and plan['action'] == 'skip':
+                return 0
+            before = dict(self.stats, errors=len(self.stats['errors']))
+            hashes = []
             
-            # Check if file is a ZIP archive
-            if csv_path.endswith('.zip'):
-                logger.info(f"Detected ZIP file, extracting CSV files...")
-                csv_files = self.extract_csv_from_zip(csv_path)
-                
-                if not csv_files:
-                    logger.error("No CSV files found in ZIP archive")
-                    return 0
-                
-                # Process each CSV file in the ZIP
-                total_loaded = 0
-                for csv_file in csv_files:
-                    logger.info(f"Processing extracted file: {os.path.basename(csv_file)}")
-                    count = self._load_single_csv(csv_file, province)
-                    total_loaded += count
-                    
-                    # Clean up extracted file
-                    try:
-                        os.remove(csv_file)
-                    except:
-                        pass
-                
-                return total_loaded
-            else:
-                # Single CSV file
-                return self._load_single_csv(csv_path, province)
+            # CSV members of a ZIP archive are streamed without extraction
+            total_loaded = 0
+            found = False
+            for source, (name, opener) in enumerate(self._csv_sources(csv_path)):
+                found = True
+                if opener is not None:
+                    logger.info(f"Processing ZIP member: {name}")
+                total_loaded += self._load_single_csv(name, province, opener=opener, plan=plan, hashes=hashes,
+                                                      source=source)
+            
+            if not found:
+                logger.error("No CSV files found in ZIP archive")
+                self.stats['errors'].append(f"{csv_path}: No CSV files found")
+            self._record_import(plan, hashes, before)
+            return total_loaded
                 
         except Exception as e:
             logger.error(f"❌ Error loading CSV: {str(e)}")
             self.db.rollback()
             return 0
     
-    def _load_single_csv(self, csv_path: str, province: Optional[str] = None) -> int:
+    def extract_coordinates(self, gmaps_links: pd.Series) -> pd.DataFrame:
+        """
+        Vectorized extract_coordinates_from_gmaps_link over a column of links
+        
+        Args:
+            gmaps_links: Series of Google Maps URLs
+            
+        Returns:
+            DataFrame with 'latitude' and 'longitude' (0.0 where extraction
+            fails or the point is outside Indonesia), aligned with the input
+        """
+        coords = gmaps_links.astype('string').str.extract(GMAPS_COORDINATE_PATTERN)
+        lat = pd.to_numeric(coords[0], errors='coerce')
+        lon = pd.to_numeric(coords[1], errors='coerce')
+        valid = lat.between(-11, 6) & lon.between(95, 141)
+        return pd.DataFrame({
+            'latitude': lat.where(valid, 0.0).astype(float),
+            'longitude': lon.where(valid, 0.0).astype(float),
+        }, index=gmaps_links.index)
+    
+    def classify_facilities(self, facility_types: pd.Series) -> pd.DataFrame:
+        """
+        Vectorized facility class and estimated bed capacity from facility type
+        
+        Args:
+            facility_types: Series of facility type strings
+            
+        Returns:
+            DataFrame with 'class_' and 'total_beds', aligned with the input
+        """
+        types = facility_types.astype(str).str.lower()
+        rumah_sakit = types.str.contains('rumah sakit', regex=False)
+        puskesmas = ~rumah_sakit & types.str.contains('puskesmas', regex=False)
+        klinik = ~rumah_sakit & ~puskesmas & types.str.contains('klinik', regex=False)
+
+        def rs_class(letter):
+            return rumah_sakit & (types.str.contains(f'tipe {letter}', regex=False)
+                                  | types.str.contains(f'kelas {letter}', regex=False))
+
+        class_a, class_b, class_d = rs_class('a'), rs_class('b'), rs_class('d')
+        # first matching condition wins, as in the if/elif chain it replaces
+        conditions = [class_a, class_b, class_d, rumah_sakit, puskesmas, klinik]
+        return pd.DataFrame({
+            'class_': np.select(conditions, ['A', 'B', 'D', 'C', 'Puskesmas', 'Klinik'], default='C'),
+            'total_beds': np.select(conditions, [200, 150, 50, 100, 20, 10], default=50),
+        }, index=facility_types.index)
+    
+    def _csv_sources(self, path: str) -> Iterator[Tuple[str, Optional[Callable[[], IO[bytes]]]]]:
+        """
+        CSV inputs of a path: (path, None) for a plain CSV, or (member name,
+        opener) for each CSV member of a ZIP archive. Openers return a binary
+        stream read directly from the archive, valid while iterating.
+        """
+        if not path.endswith('.zip'):
+            yield path, None
+            return
+        with zipfile.ZipFile(path, 'r') as zip_ref:
+            members = _zip_csv_members(zip_ref)
+            if not members:
+                logger.warning(f"No CSV files found in ZIP: {path}")
+                return
+            logger.info(f"Found {len(members)} CSV file(s) in ZIP: {', '.join(members)}")
+            for member in members:
+                yield member, (lambda member=member: zip_ref.open(member))
+    
+    def _read_csv_chunks(self, csv_path: str, usecols=None,
+                         opener: Optional[Callable[[], IO[bytes]]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Read a CSV as DataFrame chunks of self.chunk_size rows (one frame when
+        chunk_size is None) in a single pass
+        
+        The encoding is sniffed once from the first ENCODING_SAMPLE_BYTES
+        (see sniff_encoding) and the file is decoded as it streams; bytes that
+        do not decode are replaced with U+FFFD instead of restarting the read.
+        The encoding and replaced byte count are recorded in
+        self.stats['encodings'][csv_path]; rows and bytes read are counted
+        in self.stats as each chunk is yielded.
+        With an opener (see _csv_sources) the CSV is read from the stream it
+        returns instead of csv_path.
+        """
+        raw = opener() if opener is not None else open(csv_path, 'rb')
+        try:
+            encoding = sniff_encoding(raw.read(ENCODING_SAMPLE_BYTES))
+            if raw.seekable():
+                raw.seek(0)
+            else:
+                raw.close()
+                raw = opener()
+            
+            counter = _CountingReader(raw)
+            text = io.TextIOWrapper(io.BufferedReader(counter), encoding=encoding, errors=REPLACE_AND_COUNT,
+                                    newline='')
+            replaced_before = _replaced_bytes()
+            bytes_before = 0
+            if self.chunk_size is None:
+                chunks = iter([pd.read_csv(text, usecols=usecols)])
+            else:
+                chunks = pd.read_csv(text, usecols=usecols, chunksize=self.chunk_size)
+            for chunk in chunks:
+                self.stats['rows_read'] += len(chunk)
+                self.stats['bytes_read'] += counter.bytes_read - bytes_before
+                bytes_before = counter.bytes_read
+                yield chunk
+            replaced = _replaced_bytes() - replaced_before
+        finally:
+            raw.close()
+        
+        self.stats['encodings'][csv_path] = {'encoding': encoding, 'replaced_bytes': replaced}
+        if replaced:
+            logger.warning(f"Read CSV with {encoding} encoding, {replaced} undecodable bytes replaced")
+        else:
+            logger.info(f"Successfully read CSV with {encoding} encoding")
+    
+    def _normalize_faskes_frame(self, df: pd.DataFrame, province: Optional[str] = None) -> pd.DataFrame:
+        """Standardize BPJS Faskes columns and apply province/type filters (per chunk when streaming)"""
+        # Standardize column names (handle various CSV formats)
+        df.columns = df.columns.str.lower().str.strip()
+        
+        # Rename columns based on mapping
+        for old_col, new_col in FASKES_COLUMN_MAPPING.items():
+            if old_col in df.columns and new_col not in df.columns:
+                df.rename(columns={old_col: new_col}, inplace=True)
+        
+        # Filter by province if specified
+        if province and 'province' in df.columns:
+            original_count = len(df)
+            df = df[df['province'].str.contains(province, case=False, na=False)]
+            logger.info(f"Filtered from {original_count} to {len(df)} rows by province: {province}")
+        
+        # Filter only Rumah Sakit types
+        if 'type' in df.columns:
+            original_count = len(df)
+            # Keep Rumah Sakit, Puskesmas, and Klinik Utama
+            df = df[df['type'].str.contains('Rumah Sakit|Puskesmas|Klinik Utama', case=False, na=False)]
+            logger.info(f"Filtered from {original_count} to {len(df)} rows by facility type")
+        
+        # Validate required columns
+        if 'name' not in df.columns or 'address' not in df.columns:
+            raise ValueError("Required columns 'name' or 'address' not found in CSV")
+        return df
+    
+    def located_faskes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rows of a normalized faskes frame that can become hospitals: name and
+        address present and coordinates parsed from gmaps_link (added as
+        'latitude'/'longitude' columns) other than (0, 0)
+        """
+        df = df[df['name'].notna() & df['address'].notna()]
+        if 'gmaps_link' in df.columns:
+            coords = self.extract_coordinates(df['gmaps_link'])
+        else:
+            coords = pd.DataFrame({'latitude': 0.0, 'longitude': 0.0}, index=df.index)
+        # Skip if coordinates are invalid (0,0)
+        located = (coords['latitude'] != 0.0) | (coords['longitude'] != 0.0)
+        return df[located].assign(latitude=coords['latitude'][located], longitude=coords['longitude'][located])
+    
+    def iter_faskes_frames(self, path: str, province: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Located faskes rows (see located_faskes) of a CSV or ZIP of CSVs, one
+        frame per chunk of self.chunk_size rows (per CSV when None)
+        """
+        for name, opener in self._csv_sources(path):
+            for chunk in self._read_csv_chunks(name, usecols=_is_faskes_column, opener=opener):
+                yield self.located_faskes(self._normalize_faskes_frame(chunk, province))
+    
+    def _existing_keys(self) -> Set[Tuple[str, str]]:
+        """All (name, address) pairs already in the hospitals table, fetched once"""
+        return set(self.db.query(Hospital.name, Hospital.address).all())
+    
+    def _hospital_records(self, df: pd.DataFrame, existing: Set[Tuple[str, str]]) -> pd.DataFrame:
+        """
+        Turn a normalized faskes frame into hospital rows to insert
+        Rows without name/address or valid coordinates, and (name, address)
+        pairs already present in the DB or earlier in the file, are dropped.
+        Returns:
+            DataFrame with Hospital column attributes
+        """
+        df = self.located_faskes(df)
+        records = pd.DataFrame({
+            'name': df['name'].astype(str),
+            'address': df['address'].astype(str),
+            'latitude': df['latitude'],
+            'longitude': df['longitude'],
+            'type': df['type'].astype(str) if 'type' in df.columns else 'Rumah Sakit',
+        }, index=df.index)
+
+        records = self._drop_existing(records, existing)
+        records = records.join(self.classify_facilities(records['type']))
+        records['available_beds'] = (records['total_beds'] * 0.5).astype(int)  # Assume 50% available
+        records['phone'] = None
+        records['emergency_available'] = True
+        return records
+    
+    def _drop_existing(self, records: pd.DataFrame, existing: Set[Tuple[str, str]]) -> pd.DataFrame:
+        """
+        Drop rows whose (name, address) is in `existing` or repeats an earlier
+        row, and rows repeating an earlier (name, latitude, longitude), which
+        uq_hospital_name_location would reject
+        """
+        # Check if hospital already exists (by name and address), in the DB or earlier in this file
+        keys = pd.MultiIndex.from_arrays([records['name'], records['address']])
+        located = records.duplicated(subset=['name', 'latitude', 'longitude'])
+        return records[~keys.isin(existing) & ~keys.duplicated() & ~located]
+    
+    def _current_hospitals(self, names: Set[str]) -> Tuple[Dict[Tuple, int], Dict[Tuple[str, str], int]]:
+        """
+        Ids of the hospitals named in `names`
+        Returns:
+            (location key -> id, (name, address) -> id)
+        """
+        by_location, by_address = {}, {}
+        if not names:
+            return by_location, by_address
+        for h in self.db.query(
+            Hospital.id, Hospital.name, Hospital.address, Hospital.latitude, Hospital.longitude
+        ).filter(Hospital.name.in_(list(names))).all():
+            by_location[location_key(h.name, h.latitude, h.longitude)] = h.id
+            by_address[(h.name, h.address)] = h.id
+        return by_location, by_address
+    
+    def _write_hospitals(self, records: pd.DataFrame, batch_size: int,
+                         checkpoint: Optional[Callable[[int], Any]] = None,
+                         update_existing: bool = False) -> Tuple[int, int]:
+        """
+        Upsert hospital rows on uq_hospital_name_location in batches,
+        committing and publishing capacity changes per batch
+        A row whose (name, latitude, longitude) is already in the DB updates
+        that hospital's UPSERT_COLUMNS. With update_existing (rows of a
+        changed file), a row matching a hospital by (name, address) at other
+        coordinates moves it instead of inserting a second one.
+        Args:
+            records: Hospital rows, indexed by raw CSV row
+            batch_size: Rows per statement and commit
+            checkpoint: Maps the next raw row to load to a statement executed
+                in each batch's transaction; dropped after a failed batch so
+                a resume does not skip its rows
+            update_existing: Update hospitals matched by (name, address)
+        Returns:
+            (hospitals inserted, hospitals updated)
+        """
+        stmt = hospital_upsert_statement(self.db, UPSERT_COLUMNS)
+        inserted = updated = 0
+        raw_rows = records.index
+        values = records.rename(columns={'class_': 'class'}).to_dict('records')
+        for start in range(0, len(values), batch_size):
+            batch = values[start:start + batch_size]
+            rows = f"CSV rows {raw_rows[start]}-{raw_rows[start + len(batch) - 1]}"
+            now = datetime.utcnow()
+            upserts, moves = [], []
+            try:
+                by_location, by_address = self._current_hospitals({v['name'] for v in batch})
+                for v in batch:
+                    v['latitude'], v['longitude'] = location_key(v['name'], v['latitude'], v['longitude'])[1:]
+                    v['created_at'] = v['updated_at'] = now
+                    moved_id = by_address.get((v['name'], v['address'])) if update_existing else None
+                    if moved_id is not None and location_key(v['name'], v['latitude'], v['longitude']) not in by_location:
+                        moves.append(dict({c: v[c] for c in MOVE_COLUMNS}, hospital_id=moved_id))
+                    else:
+                        upserts.append(v)
+                new_keys = {location_key(v['name'], v['latitude'], v['longitude']) for v in upserts} - set(by_location)
+                write_hospital_upserts(self.db, stmt, upserts, by_location, UPSERT_COLUMNS)
+                if moves:
+                    self.db.execute(
+                        update(Hospital.__table__)
+                        .where(Hospital.__table__.c.id == bindparam('hospital_id'))
+                        .values({c: bindparam(c) for c in MOVE_COLUMNS}),
+                        moves
+                    )
+                # ids of the new rows are needed for change-feed versions; matched on
+                # their keys so rows other writers insert meanwhile are not picked up
+                created, _ = self._current_hospitals({k[0] for k in new_keys})
+                beds = {location_key(v['name'], v['latitude'], v['longitude']): v['available_beds'] for v in upserts}
+                changes = [{'hospital_id': created[k], 'available_beds': int(beds[k])} for k in new_keys if k in created]
+                if checkpoint is not None:
+                    self.db.execute(checkpoint(int(raw_rows[start + len(batch) - 1]) + 1))
+                self._commit_batch()
+            except Exception as e:
+                self.db.rollback()
+                checkpoint = None
+                self.stats['errors'].append(f"{rows}: {str(e)}")
+                logger.error(f"Error writing {rows}: {str(e)}")
+                continue
+            self.change_feed.publish_many(changes, source='csv_loader')
+            inserted += len(new_keys)
+            updated += len(batch) - len(new_keys)
+            stats = self.get_stats()
+            logger.info(f"Progress: {inserted} hospitals inserted, {updated} updated, "
+                        f"{stats['rows_per_second']:.0f} rows/s, "
+                        f"{stats['bytes_per_second'] / 1e6:.1f} MB/s, commit {stats['mean_commit_ms']:.1f} ms")
+            self._report_progress()
+        return inserted, updated
+    
+    def _load_single_csv(self, csv_path: str, province: Optional[str] = None, batch_size: int = 5000,
+                         opener: Optional[Callable[[], IO[bytes]]] = None, plan: Optional[Dict] = None,
+                         hashes: Optional[List[np.ndarray]] = None, source: int = 0) -> int:
         """
         Load a single CSV file with BPJS Faskes data
         
+        With self.chunk_size set, the file is streamed: only the mapped
+        columns are parsed, filters run per chunk, and each chunk is
+        inserted and committed before the next one is read. With a plan,
+        every committed batch also moves the manifest checkpoint, in the
+        same transaction, up to the raw rows it covers. Rows of a changed
+        file (a plan with previous row hashes) are edits or additions, so
+        they update the hospitals they match instead of being skipped.
+        
         Args:
             csv_path: Path to CSV file
             province: Filter by province name (optional)
+            batch_size: Hospitals per INSERT batch and commit
+            opener: Stream factory for ZIP members (csv_path is then the member name)
+            plan: Import plan of the source file (see _plan_import); rows the
+                previous import covered, or before a resume checkpoint, are
+                dropped before parsing
+            hashes: Receives the row hashes of every chunk for the manifest
+            source: Index of this CSV among the source file's CSVs (ZIP members)
             
         Returns:
-            Number of hospitals loaded
+            Number of hospitals inserted or updated
         """
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_path, encoding=encoding)
-                    logger.info(f"Successfully read CSV with {encoding} encoding")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if df is None:
-                raise ValueError("Could not read CSV file with any supported encoding")
-            
-            logger.info(f"Loaded {len(df)} rows from CSV")
-            logger.info(f"Columns: {', '.join(df.columns)}")
-            
-            # Standardize column names (handle various CSV formats)
-            df.columns = df.columns.str.lower().str.strip()
-            
-            # Map BPJS Faskes specific columns
-            column_mapping = {
-                'namafaskes': 'name',
-                'nama': 'name',
-                'nama_rs': 'name',
-                'alamatfaskes': 'address',
-                'alamat': 'address',
-                'latlongfaskes': 'gmaps_link',
-                'latlong': 'gmaps_link',
-                'tipefaskes': 'type',
-                'tipe': 'type',
-                'kodefaskes': 'code',
-                'kode': 'code',
-                'provinsi': 'province',
-                'kotakab': 'city',
-                'kota': 'city'
-            }
-            
-            # Rename columns based on mapping
-            for old_col, new_col in column_mapping.items():
-                if old_col in df.columns and new_col not in df.columns:
-                    df.rename(columns={old_col: new_col}, inplace=True)
-            
-            # Filter by province if specified
-            if province and 'province' in df.columns:
-                original_count = len(df)
-                df = df[df['province'].str.contains(province, case=False, na=False)]
-                logger.info(f"Filtered from {original_count} to {len(df)} rows by province: {province}")
-            
-            # Filter only Rumah Sakit types
-            if 'type' in df.columns:
-                original_count = len(df)
-                # Keep Rumah Sakit, Puskesmas, and Klinik Utama
-                df = df[df['type'].str.contains('Rumah Sakit|Puskesmas|Klinik Utama', case=False, na=False)]
-                logger.info(f"Filtered from {original_count} to {len(df)} rows by facility type")
-            
-            # Validate required columns
-            if 'name' not in df.columns or 'address' not in df.columns:
-                raise ValueError("Required columns 'name' or 'address' not found in CSV")
-            
+            update_existing = plan is not None and plan['previous'] is not None
+            existing = set() if update_existing else self._existing_keys()
             count = 0
             skipped = 0
+            errors_before = len(self.stats['errors'])
             
-            for idx, row in df.iterrows():
-                try:
-                    self.stats['total_processed'] += 1
-                    
-                    # Skip if name or address is empty
-                    if pd.isna(row.get('name')) or pd.isna(row.get('address')):
-                        skipped += 1
-                        self.stats['total_skipped'] += 1
-                        continue
-                    
-                    # Extract coordinates from Google Maps link if available
-                    lat, lon = 0.0, 0.0
-                    if 'gmaps_link' in row and pd.notna(row.get('gmaps_link')):
-                        lat, lon = self.extract_coordinates_from_gmaps_link(row.get('gmaps_link'))
-                    
-                    # Skip if coordinates are invalid (0,0)
-                    if lat == 0.0 and lon == 0.0:
-                        skipped += 1
-                        self.stats['total_skipped'] += 1
-                        logger.debug(f"Skipping {row.get('name')} - invalid coordinates")
-                        continue
-                    
-                    # Check if hospital already exists (by name and address)
-                    existing = self.db.query(Hospital).filter(
-                        Hospital.name == str(row.get('name')),
-                        Hospital.address == str(row.get('address'))
-                    ).first()
-                    
-                    if existing:
-                        skipped += 1
-                        self.stats['total_skipped'] += 1
-                        logger.debug(f"Hospital {row.get('name')} already exists, skipping")
-                        continue
-                    
-                    # Determine facility type and class
-                    facility_type = str(row.get('type', 'Rumah Sakit'))
-                    facility_class = 'C'  # Default class
-                    
-                    # Estimate bed capacity based on facility type
-                    if 'rumah sakit' in facility_type.lower():
-                        total_beds = 100
-                        if 'tipe a' in facility_type.lower() or 'kelas a' in facility_type.lower():
-                            total_beds = 200
-                            facility_class = 'A'
-                        elif 'tipe b' in facility_type.lower() or 'kelas b' in facility_type.lower():
-                            total_beds = 150
-                            facility_class = 'B'
-                        elif 'tipe d' in facility_type.lower() or 'kelas d' in facility_type.lower():
-                            total_beds = 50
-                            facility_class = 'D'
-                    elif 'puskesmas' in facility_type.lower():
-                        total_beds = 20
-                        facility_class = 'Puskesmas'
-                    elif 'klinik' in facility_type.lower():
-                        total_beds = 10
-                        facility_class = 'Klinik'
-                    else:
-                        total_beds = 50
-                    
-                    # Create hospital record
-                    hospital = Hospital(
-                        name=str(row.get('name')),
-                        address=str(row.get('address')),
-                        latitude=lat,
-                        longitude=lon,
-                        type=facility_type,
-                        class_=facility_class,
-                        total_beds=total_beds,
-                        available_beds=int(total_beds * 0.5),  # Assume 50% available
-                        phone=None,
-                        emergency_available=True
-                    )
-                    
-                    self.db.add(hospital)
-                    count += 1
-                    self.stats['total_inserted'] += 1
-                    
-                    if count % 100 == 0:
-                        self.db.commit()
-                        logger.info(f"Progress: {count} hospitals loaded...")
-                    
-                except Exception as e:
-                    self.stats['errors'].append(f"Row {idx}: {str(e)}")
-                    logger.error(f"Error processing row {idx}: {str(e)}")
-                    continue
+            for i, chunk in enumerate(self._read_csv_chunks(csv_path, usecols=_is_faskes_column, opener=opener)):
+                if i == 0:
+                    logger.info(f"Columns: {', '.join(chunk.columns)}")
+                rows_read = len(chunk)
+                chunk_end = int(chunk.index[-1]) + 1 if rows_read else 0
+                chunk = self._unseen_rows(chunk, plan, hashes, source)
+                chunk = self._normalize_faskes_frame(chunk, province)
+                records = self._hospital_records(chunk, existing)
+                
+                self.stats['total_processed'] += len(chunk)
+                self.stats['total_skipped'] += len(chunk) - len(records)
+                skipped += len(chunk) - len(records)
+                
+                # checkpoints stop at the first failed batch of the file
+                checkpoint = None
+                if plan is not None and len(self.stats['errors']) == errors_before:
+                    checkpoint = lambda row: self.manifest.checkpoint_statement(plan, source, row)
+                inserted, updated = self._write_hospitals(records, batch_size, checkpoint, update_existing)
+                self.stats['total_inserted'] += inserted
+                self.stats['total_updated'] += updated
+                count += inserted + updated
+                # later chunks must not re-insert these
+                existing.update(zip(records['name'], records['address']))
+                if checkpoint is not None and len(self.stats['errors']) == errors_before and rows_read:
+                    # rows after the last inserted one were filtered out; cover them too
+                    self.db.execute(checkpoint(chunk_end))
+                    self.db.commit()
+                logger.info(f"Loaded {rows_read} rows from CSV, {count} hospitals inserted or updated so far")
+                self._report_progress()
             
-            self.db.commit()
             logger.info(f"✅ Successfully loaded {count} hospitals from BPJS Faskes CSV")
             logger.info(f"   Skipped: {skipped} records")
             return count
             
         except Exception as e:
             logger.error(f"❌ Error loading CSV: {str(e)}")
+            self.stats['errors'].append(f"{csv_path}: {str(e)}")
             self.db.rollback()
             return 0
     
-    def load_bed_ratio_csv(self, csv_path: str, province: Optional[str] = None) -> int:
+    def _plan_import(self, path: str, kind: str, params: Dict) -> Optional[Dict]:
+        """Manifest plan for a source file (None without a manifest); counts skipped files"""
+        if self.manifest is None:
+            return None
+        plan = self.manifest.plan(path, kind, params)
+        filename = os.path.basename(path)
+        if plan['action'] == 'skip':
+            self.stats['unchanged_files'] += 1
+            logger.info(f"⏭️  {filename} unchanged since last import, skipping")
+            return plan
+        if plan['action'] == 'diff':
+            logger.info(f"{filename} changed since last import, loading new and edited rows only")
+        elif plan['action'] == 'resume':
+            source, row = plan['start']
+            logger.info(f"Resuming {filename} from CSV #{source}, row {row}")
+        self.manifest.begin(plan)
+        return plan
+    
+    def _unseen_rows(self, df: pd.DataFrame, plan: Optional[Dict], hashes: Optional[List[np.ndarray]],
+                     source: int = 0) -> pd.DataFrame:
+        """
+        Collect row hashes for the manifest and drop rows the previous import
+        already loaded or that precede the plan's resume checkpoint
+        """
+        if plan is None:
+            return df
+        row_hash = row_hashes(df)
+        hashes.append(row_hash)
+        mask = unseen_mask(row_hash, plan['previous'])
+        self.stats['unchanged_rows'] += int(mask.shape[0] - mask.sum())
+        
+        start_source, start_row = plan['start']
+        if source < start_source:
+            resumed = np.zeros(len(df), dtype=bool)
+        elif source == start_source:
+            resumed = df.index.to_numpy() >= start_row
+        else:
+            return df[mask]
+        self.stats['resumed_rows'] += int((mask & ~resumed).sum())
+        return df[mask & resumed]
+    
+    def _record_import(self, plan: Optional[Dict], hashes: List[np.ndarray], before: Dict):
+        """Record a file's outcome (counts since the `before` stats snapshot) in the manifest"""
+        if plan is None:
+            return
+        errors = self.stats['errors'][before['errors']:]
+        self.manifest.record(plan, hashes, {
+            'row_count': sum(h.shape[0] for h in hashes),
+            'inserted': self.stats['total_inserted'] - before['total_inserted'],
+            'updated': self.stats['total_updated'] - before['total_updated'],
+            'skipped': self.stats['total_skipped'] - before['total_skipped'],
+        }, error='; '.join(errors) or None)
+    
+    def load_bed_ratio_csv(self, csv_path: str, province: Optional[str] = None, min_similarity: float = 0.6,
+                           batch_size: int = 1000) -> int:
         """
         Load hospital bed ratio data from CSV
         Updates existing hospitals with bed information
         
+        Hospital names are matched through an in-memory HospitalNameIndex
+        (normalized exact key, then trigram similarity) built once per file;
+        ambiguous names are left unmatched. Matched bed counts are applied
+        with bulk UPDATEs, committed per chunk of self.chunk_size rows.
+        
         Args:
-            csv_path: Path to CSV file
+            csv_path: Path to CSV file or ZIP file
             province: Filter by province name (optional)
+            min_similarity: Minimum trigram similarity for fuzzy name matches
+            batch_size: Hospitals per UPDATE statement
             
         Returns:
-            Number of hospitals updated
+            Number of hospitals updated (0 if skipped as unchanged)
         """
         try:
             logger.info(f"Loading bed ratio data from {csv_path}")
-            df = pd.read_csv(csv_path, encoding='utf-8')
-            
-            # Standardize column names
-            df.columns = df.columns.str.lower().str.strip()
-            
-            # Filter by province if specified
-            if province and 'provinsi' in df.columns:
-                df = df[df['provinsi'].str.contains(province, case=False, na=False)]
+            plan = self._plan_import(csv_path, 'bed_ratio', {'province': province, 'min_similarity': min_similarity})
+            if plan is not None and plan['action'] == 'skip':
+                return 0
+            before = dict(self.stats, errors=len(self.stats['errors']))
+            hashes = []
+            index = HospitalNameIndex.from_session(self.db, min_similarity=min_similarity)
             
-            count = 0
-            for _, row in df.iterrows():
-                try:
-                    # Try to match hospital by name
-                    hospital_name = row.get('nama_rs') or row.get('rumah_sakit') or row.get('name')
-                    if pd.isna(hospital_name):
-                        continue
-                    
-                    # Find hospital in database
-                    hospital = self.db.query(Hospital).filter(
-                        Hospital.name.contains(hospital_name)
-                    ).first()
-                    
-                    if hospital:
-                        # Update bed information
-                        total_beds = row.get('jumlah_bed') or row.get('total_beds') or row.get('tempat_tidur')
-                        if pd.notna(total_beds):
-                            hospital.total_beds = int(total_beds)
-                            hospital.available_beds = int(total_beds * 0.5)  # Assume 50% available
-                            count += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error processing bed ratio row: {str(e)}")
-                    continue
+            updated = set()
+            outcomes = Counter()
+            chunks = ((source, chunk) for source, (name, opener) in enumerate(self._csv_sources(csv_path))
+                      for chunk in self._read_csv_chunks(name, opener=opener))
+            for source, df in chunks:
+                chunk_end = int(df.index[-1]) + 1 if len(df) else 0
+                df = self._unseen_rows(df, plan, hashes, source)
+                # Standardize column names
+                df.columns = df.columns.str.lower().str.strip()
+                
+                # Filter by province if specified
+                if province and 'provinsi' in df.columns:
+                    df = df[df['provinsi'].str.contains(province, case=False, na=False)]
+                
+                names = _first_present(df, ['nama_rs', 'rumah_sakit', 'name'])
+                beds = pd.to_numeric(_first_present(df, ['jumlah_bed', 'total_beds', 'tempat_tidur']), errors='coerce')
+                rows = pd.DataFrame({'name': names, 'total_beds': beds}).dropna()
+                
+                # Try to match hospital by name, once per distinct name
+                matches = {}
+                for name in rows['name'].unique():
+                    hospital_id, how = index.match(name)
+                    outcomes[how] += 1
+                    matches[name] = hospital_id
+                rows = rows.assign(hospital_id=rows['name'].map(matches)).dropna(subset=['hospital_id'])
+                
+                # last row wins when several rows match the same hospital
+                beds_by_hospital = {
+                    int(h): int(b) for h, b in zip(rows['hospital_id'], rows['total_beds'])
+                }
+                checkpoint = None
+                if plan is not None and len(df):
+                    checkpoint = self.manifest.checkpoint_statement(plan, source, chunk_end)
+                self._update_beds(beds_by_hospital, batch_size, checkpoint)
+                updated.update(beds_by_hospital)
+                self._report_progress()
             
-            self.db.commit()
-            logger.info(f"Successfully updated {count} hospitals with bed ratio data")
-            return count
+            self.stats['total_updated'] += len(updated)
+            logger.info(f"Successfully updated {len(updated)} hospitals with bed ratio data "
+                        f"(names: {outcomes['exact']} exact, {outcomes['fuzzy']} fuzzy, "
+                        f"{outcomes['ambiguous']} ambiguous, {outcomes['none']} unmatched)")
+            self._record_import(plan, hashes, before)
+            return len(updated)
             
         except Exception as e:
             logger.error(f"Error loading bed ratio CSV: {str(e)}")
+            self.stats['errors'].append(f"{csv_path}: {str(e)}")
             self.db.rollback()
             return 0
     
+    def _update_beds(self, beds_by_hospital: Dict[int, int], batch_size: int, checkpoint=None):
+        """
+        Bulk-update total/available beds, commit, and publish the changes
+        A checkpoint statement, if given, is executed in the same transaction.
+        """
+        if checkpoint is not None:
+            self.db.execute(checkpoint)
+        if not beds_by_hospital:
+            if checkpoint is not None:
+                self.db.commit()
+            return
+        now = datetime.utcnow()
+        # Assume 50% available
+        available = {h: int(b * 0.5) for h, b in beds_by_hospital.items()}
+        ids = list(beds_by_hospital)
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            self.db.execute(
+                update(Hospital)
+                .where(Hospital.id.in_(chunk))
+                .values(
+                    total_beds=case({h: beds_by_hospital[h] for h in chunk}, value=Hospital.id),
+                    available_beds=case({h: available[h] for h in chunk}, value=Hospital.id),
+                    updated_at=now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        self._commit_batch()
+        self.change_feed.publish_many(
+            [{'hospital_id': h, 'available_beds': b} for h, b in available.items()], source='csv_loader'
+        )
+    
     def get_stats(self) -> Dict:
         """
         Get loading statistics
+        Throughput is measured since the loader was created or its stats reset.
         Returns:
-            Dictionary with statistics
+            Dictionary with statistics, plus 'elapsed_seconds',
+            'rows_per_second', 'bytes_per_second', 'mean_commit_ms' and
+            'error_count'
         """
-        return self.stats.copy()
+        stats = self.stats.copy()
+        elapsed = time.perf_counter() - self._started
+        stats['elapsed_seconds'] = elapsed
+        stats['rows_per_second'] = stats['rows_read'] / elapsed if elapsed > 0 else 0.0
+        stats['bytes_per_second'] = stats['bytes_read'] / elapsed if elapsed > 0 else 0.0
+        stats['mean_commit_ms'] = (
+            1000.0 * stats['commit_seconds'] / stats['batches_committed'] if stats['batches_committed'] else 0.0
+        )
+        stats['error_count'] = len(stats['errors'])
+        return stats
     
     def reset_stats(self):
         """Reset statistics counters"""
@@ -402,16 +828,58 @@ class CSVDataLoader:
             'total_inserted': 0,
             'total_updated': 0,
             'total_skipped': 0,
-            'errors': []
+            'unchanged_files': 0,
+            'unchanged_rows': 0,
+            'resumed_rows': 0,  # rows before a resume checkpoint, not reprocessed
+            'rows_read': 0,
+            'bytes_read': 0,
+            'batches_committed': 0,
+            'commit_seconds': 0.0,
+            'max_commit_seconds': 0.0,
+            'errors': [],
+            'encodings': {}
         }
+        self._started = time.perf_counter()
+    
+    def _commit_batch(self):
+        """Commit and record the commit latency"""
+        t0 = time.perf_counter()
+        self.db.commit()
+        latency = time.perf_counter() - t0
+        self.stats['batches_committed'] += 1
+        self.stats['commit_seconds'] += latency
+        self.stats['max_commit_seconds'] = max(self.stats['max_commit_seconds'], latency)
+    
+    def _report_progress(self):
+        if self.progress is None:
+            return
+        try:
+            self.progress(self.get_stats())
+        except Exception as e:
+            logger.error(f"Progress callback failed: {str(e)}")
     
-    def load_from_directory(self, directory_path: str, pattern: str = "*.csv") -> Dict[str, int]:
+    def load_from_directory(self, directory_path: str, pattern: str = "*.csv", n_jobs: int = 1,
+                            batch_size: int = 5000) -> Dict[str, int]:
         """
         Load all CSV files from a directory
         
+        With n_jobs != 1, faskes files are parsed and transformed in a process
+        pool while this process is the single writer: it drops (name, address)
+        pairs already in the DB (unless the file changed since its last
+        import) or loaded from an earlier file, upserts the rest and merges
+        per-file counts into self.stats. Files are written
+        in the same order as the sequential mode, so results are identical.
+        Manifest checkpoints advance per file in this mode (a worker's
+        records span several ZIP members), so an interrupted file resumes
+        from its start and relies on the (name, address) check.
+        Bed ratio files update existing hospitals and run after all faskes
+        files have been inserted.
+        
         Args:
             directory_path: Path to directory containing CSV files
             pattern: File pattern to match (default: *.csv)
+            n_jobs: Parser processes (1: sequential, -1: all cores)
+            batch_size: Hospitals per upsert batch in parallel mode
             
         Returns:
             Dictionary with filename and count of records loaded
@@ -419,18 +887,21 @@ class CSVDataLoader:
         import glob
         
         results = {}
-        csv_files = glob.glob(os.path.join(directory_path, pattern))
+        csv_files = sorted(glob.glob(os.path.join(directory_path, pattern)))
         
         logger.info(f"Found {len(csv_files)} CSV files in {directory_path}")
         
+        if n_jobs != 1:
+            faskes_files = [f for f in csv_files if not _is_bed_ratio_file(os.path.basename(f))]
+            results.update(self._load_faskes_parallel(faskes_files, n_jobs, batch_size))
+            csv_files = [f for f in csv_files if _is_bed_ratio_file(os.path.basename(f))]
+        
         for csv_file in csv_files:
             filename = os.path.basename(csv_file)
             logger.info(f"Processing {filename}")
             
             # Try to detect file type and load accordingly
-            if 'faskes' in filename.lower() or 'bpjs' in filename.lower():
-                count = self.load_bpjs_faskes_csv(csv_file)
-            elif 'bed' in filename.lower() or 'ratio' in filename.lower():
+            if _is_bed_ratio_file(filename):
                 count = self.load_bed_ratio_csv(csv_file)
             else:
                 # Default to BPJS faskes format
@@ -439,3 +910,125 @@ class CSVDataLoader:
             results[filename] = count
         
         return results
+    
+    def _load_faskes_parallel(self, paths: List[str], n_jobs: int, batch_size: int) -> Dict[str, int]:
+        """Parse faskes files in worker processes and insert them from this process"""
+        results = {}
+        if not paths:
+            return results
+        
+        plans = {}
+        for path in paths:
+            plan = self._plan_import(path, 'faskes', {'province': None})
+            if plan is not None and plan['action'] == 'skip':
+                results[os.path.basename(path)] = 0
+            else:
+                plans[path] = plan
+        if not plans:
+            return results
+        
+        max_workers = os.cpu_count() if n_jobs < 0 else n_jobs
+        existing = self._existing_keys()
+        loaded = set()
+        
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(plans))) as pool:
+            futures = [
+                (path, plan, pool.submit(_parse_faskes_file, path, None, self.chunk_size, plan))
+                for path, plan in plans.items()
+            ]
+            # write in submission order: parsing of later files overlaps with these inserts
+            for path, plan, future in futures:
+                filename = os.path.basename(path)
+                try:
+                    parsed = future.result()
+                except Exception as e:
+                    parsed = {'records': None, 'processed': 0, 'encodings': {}, 'hashes': [], 'counters': {},
+                              'error': str(e)}
+                self.stats['encodings'].update(parsed['encodings'])
+                for counter, value in parsed['counters'].items():
+                    self.stats[counter] += value
+                before = dict(self.stats, errors=len(self.stats['errors']))
+                if parsed['error']:
+                    self.stats['errors'].append(f"{filename}: {parsed['error']}")
+                    logger.error(f"❌ Error loading {filename}: {parsed['error']}")
+                    self._record_import(plan, parsed['hashes'], before)
+                    results[filename] = 0
+                    continue
+                
+                update_existing = plan is not None and plan['previous'] is not None
+                records = self._drop_existing(parsed['records'], loaded if update_existing else existing)
+                inserted, updated = self._write_hospitals(records, batch_size, update_existing=update_existing)
+                count = inserted + updated
+                existing.update(zip(records['name'], records['address']))
+                loaded.update(zip(records['name'], records['address']))
+                
+                self.stats['total_processed'] += parsed['processed']
+                self.stats['total_inserted'] += inserted
+                self.stats['total_updated'] += updated
+                self.stats['total_skipped'] += parsed['processed'] - count
+                self._record_import(plan, parsed['hashes'], before)
+                results[filename] = count
+                logger.info(f"✅ {filename}: {count} hospitals loaded, {parsed['processed'] - count} skipped")
+        
+        return results
+
+
+def _first_present(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """Per row, the first non-null value among the columns that exist"""
+    result = pd.Series(None, index=df.index, dtype=object)
+    for column in columns:
+        if column in df.columns:
+            result = result.combine_first(df[column])
+    return result
+
+
+def _zip_csv_members(zip_ref: zipfile.ZipFile) -> List[str]:
+    # Get list of CSV files in the ZIP
+    return [f for f in zip_ref.namelist() if f.endswith('.csv') and not f.startswith('__MACOSX')]
+
+
+def _is_bed_ratio_file(filename: str) -> bool:
+    filename = filename.lower()
+    if 'faskes' in filename or 'bpjs' in filename:
+        return False
+    return 'bed' in filename or 'ratio' in filename
+
+
+def _parse_faskes_file(path: str, province: Optional[str] = None, chunk_size: Optional[int] = None,
+                       plan: Optional[Dict] = None) -> Dict:
+    """
+    Process-pool worker for load_from_directory: parse a faskes CSV (or ZIP
+    of CSVs) into hospital rows without touching the database
+    Args:
+        plan: Import plan of the file (see CSVDataLoader._plan_import); rows
+            its previous import covered, or before its resume checkpoint,
+            are dropped
+    Returns:
+        Dictionary with 'records' (deduplicated within the file), 'processed'
+        (rows after filtering), 'encodings' (see _read_csv_chunks), 'hashes'
+        (row hashes per chunk, for the manifest), 'counters' (stats to add
+        to the writer's) and 'error' (None on success)
+    """
+    parser = CSVDataLoader(None, chunk_size=chunk_size)
+    frames = []
+    hashes = []
+    processed = 0
+    try:
+        for source, (name, opener) in enumerate(parser._csv_sources(path)):
+            for chunk in parser._read_csv_chunks(name, usecols=_is_faskes_column, opener=opener):
+                chunk = parser._unseen_rows(chunk, plan, hashes, source)
+                chunk = parser._normalize_faskes_frame(chunk, province)
+                processed += len(chunk)
+                frames.append(parser._hospital_records(chunk, set()))
+    except Exception as e:
+        frames, error = [], str(e)
+    else:
+        error = None if frames else 'No CSV files found'
+    
+    counters = {k: parser.stats[k] for k in ('rows_read', 'bytes_read', 'unchanged_rows', 'resumed_rows')}
+    result = {'records': None, 'processed': processed, 'encodings': parser.stats['encodings'],
+              'hashes': hashes, 'counters': counters, 'error': error}
+    if frames:
+        # repeats across chunks of the same file
+        result['records'] = parser._drop_existing(pd.concat(frames), set())
+    return result
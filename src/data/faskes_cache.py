@@ -0,0 +1,194 @@
+"""Columnar cache of parsed BPJS faskes datasets.
+
+Parsing a Kaggle faskes CSV (or ZIP of CSVs) means sniffing the encoding,
+renaming columns, filtering facility types and extracting coordinates from
+Google Maps links. The result only depends on the file's bytes, so it is
+stored once as typed NumPy arrays keyed by the file's sha256 and
+memory-mapped on later loads.
+
+On-disk layout (one directory per parsed file version; the previous
+version's directory is removed when a path's hash changes):
+    <cache_dir>/index.json                  path -> size, mtime_ns, sha256
+    <cache_dir>/<sha256[:32]>-v<N>/<column>.npy
+    <cache_dir>/<sha256[:32]>-v<N>/meta.json
+
+Text columns are fixed-width unicode arrays (empty string for missing
+values), coordinates float64. index.json lets unchanged files (same size
+and mtime) be loaded without hashing them again.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from src.csv_loader import CSVDataLoader
+from src.import_manifest import file_hash
+
+logger = logging.getLogger(__name__)
+
+# column -> dtype kind; text columns get the width of their longest value
+PARSED_COLUMNS = {
+    'name': 'U',
+    'address': 'U',
+    'latitude': np.float64,
+    'longitude': np.float64,
+    'type': 'U',
+    'class': 'U',
+    'province': 'U',
+    'city': 'U',
+    'code': 'U',
+}
+
+# bump when parsing changes so older entries are not reused
+PARSER_VERSION = 1
+
+
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series('', index=df.index)
+    return df[column].fillna('').astype(str)
+
+
+def parse_faskes_columns(path: str, chunk_size: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Parse a faskes CSV or ZIP into PARSED_COLUMNS arrays
+    Rows are filtered like CSVDataLoader does before inserting: facility
+    types it loads, name and address present, valid coordinates. No
+    province filter or de-duplication is applied.
+    Args:
+        path: CSV or ZIP path
+        chunk_size: Parse in chunks of this many rows (None: whole file)
+    Returns:
+        Dictionary column -> array, all of the same length
+    """
+    parser = CSVDataLoader(None, chunk_size=chunk_size)
+    parts = {column: [] for column in PARSED_COLUMNS}
+    for df in parser.iter_faskes_frames(path):
+        parts['name'].append(_text_column(df, 'name'))
+        parts['address'].append(_text_column(df, 'address'))
+        parts['latitude'].append(df['latitude'])
+        parts['longitude'].append(df['longitude'])
+        parts['type'].append(_text_column(df, 'type'))
+        parts['class'].append(parser.classify_facilities(_text_column(df, 'type'))['class_'])
+        parts['province'].append(_text_column(df, 'province'))
+        parts['city'].append(_text_column(df, 'city'))
+        parts['code'].append(_text_column(df, 'code'))
+
+    columns = {}
+    for column, kind in PARSED_COLUMNS.items():
+        values = np.concatenate([np.asarray(p) for p in parts[column]]) if parts[column] else np.empty(0)
+        columns[column] = values.astype(str) if kind == 'U' else values.astype(kind)
+    return columns
+
+
+class ParsedFaskesCache:
+    """
+    Parsed faskes columns keyed by source-file hash, memory-mapped on load
+    """
+
+    def __init__(self, path: str = '.cache/faskes', chunk_size: Optional[int] = None):
+        """
+        Args:
+            path: Cache directory (created if missing)
+            chunk_size: Parse in chunks of this many rows on a miss
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        os.makedirs(self.path, exist_ok=True)
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _index_path(self) -> str:
+        return os.path.join(self.path, 'index.json')
+
+    def _read_index(self) -> Dict:
+        try:
+            with open(self._index_path(), encoding='utf-8') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable faskes cache index: {str(e)}")
+            return {}
+
+    def _write_index(self, index: Dict):
+        tmp_path = self._index_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(index, fh, indent=2)
+        os.replace(tmp_path, self._index_path())
+
+    def source_hash(self, source: str) -> str:
+        """
+        sha256 of a source file, reused from the index while size and mtime
+        match; entries of a superseded version of the file are pruned
+        """
+        key = os.path.abspath(source)
+        st = os.stat(source)
+        index = self._read_index()
+        known = index.get(key)
+        if known and (known['size'], known['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+            return known['sha256']
+        digest = file_hash(source)
+        index[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+        self._write_index(index)
+        if known and known['sha256'] != digest:
+            self._prune(known['sha256'], index)
+        return digest
+
+    def _prune(self, digest: str, index: Dict):
+        """Remove every parser version's entry of `digest` unless another indexed path still has it"""
+        if any(known['sha256'] == digest for known in index.values()):
+            return
+        for name in os.listdir(self.path):
+            if name.startswith(f'{digest[:32]}-v'):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+                logger.info(f"Pruned superseded faskes cache entry {name}")
+
+    def entry_path(self, digest: str) -> str:
+        return os.path.join(self.path, f'{digest[:32]}-v{PARSER_VERSION}')
+
+    def load(self, source: str, refresh: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Parsed columns of a faskes CSV or ZIP, parsing and storing them on a miss
+        Args:
+            source: CSV or ZIP path
+            refresh: Reparse and overwrite even if cached
+        Returns:
+            Dictionary column -> read-only memory-mapped array
+        """
+        entry = self.entry_path(self.source_hash(source))
+        if refresh or not os.path.exists(os.path.join(entry, 'meta.json')):
+            self.stats['misses'] += 1
+            self._store(entry, source, parse_faskes_columns(source, self.chunk_size))
+        else:
+            self.stats['hits'] += 1
+        return {column: np.load(os.path.join(entry, f'{column}.npy'), mmap_mode='r') for column in PARSED_COLUMNS}
+
+    def frame(self, source: str, refresh: bool = False) -> pd.DataFrame:
+        """Parsed columns as a DataFrame (copies the mapped arrays)"""
+        return pd.DataFrame({column: np.asarray(values) for column, values in self.load(source, refresh).items()})
+
+    def _store(self, entry: str, source: str, columns: Dict[str, np.ndarray]):
+        # written to a sibling directory and renamed so readers never see a partial entry
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.path)
+        try:
+            for column, values in columns.items():
+                np.save(os.path.join(tmp_dir, f'{column}.npy'), values)
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as fh:
+                json.dump({
+                    'source': os.path.abspath(source),
+                    'rows': int(columns['name'].shape[0]),
+                    'dtypes': {column: values.dtype.str for column, values in columns.items()},
+                    'parser_version': PARSER_VERSION,
+                    'created_at': datetime.utcnow().isoformat(),
+                }, fh, indent=2)
+            if os.path.exists(entry):
+                shutil.rmtree(entry)
+            os.replace(tmp_dir, entry)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        logger.info(f"Cached {columns['name'].shape[0]} parsed faskes rows from {source} in {entry}")
@@ -1,73 +1,251 @@
 """Loader for Indonesian faskes CSV files into Hospital table.
 
-This module provides a simple CSV importer that upserts hospitals by
-matching on name and coordinates (latitude/longitude).
+This module provides a CSV importer that upserts hospitals keyed on the
+uq_hospital_name_location unique constraint (name, latitude, longitude).
+Rows are written in batches with the database's native upsert
+(INSERT ... ON DUPLICATE KEY UPDATE on MySQL, INSERT ... ON CONFLICT on
+SQLite/PostgreSQL) whose SET clause keeps current values where the CSV
+leaves a field empty, so a batch needs no SELECT of current values.
 """
 import csv
-from typing import Iterable
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import bindparam, func, update
 from sqlalchemy.orm import Session
 from src.models import Hospital
+from src.change_feed import capacity_feed
 
+# hospitals.latitude/longitude are DECIMAL(10|11, 8) in schema.sql; keys are
+# rounded the same way so they compare equal to stored values
+COORDINATE_DECIMALS = 8
 
-def load_faskes_csv(session: Session, csv_path: str) -> int:
+KEY_COLUMNS = ('name', 'latitude', 'longitude')
+UPDATE_COLUMNS = ('address', 'type', 'class', 'total_beds', 'phone', 'updated_at')
+
+# values a CSV row gets when a field is empty; on update they keep the current value
+EMPTY_VALUES = {'address': ('', 'Unknown'), 'type': ('',), 'class': ('',), 'total_beds': (0,), 'phone': ('',)}
+
+
+def _int_or(value, default):
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+def _parse_rows(reader: Iterable[Dict]) -> Tuple[Dict[Tuple, Dict], int]:
+    """
+    Parse CSV rows into key -> row (later rows win, as repeated updates did)
+    Returns:
+        (rows by key, number of rows skipped for invalid coordinates)
+    """
+    rows = {}
+    skipped = 0
+    for row in reader:
+        try:
+            key = location_key((row.get('name') or '').strip() or 'Unknown',
+                               row.get('latitude') or 0.0, row.get('longitude') or 0.0)
+        except ValueError:
+            skipped += 1
+            continue
+        rows[key] = row
+    return rows, skipped
+
+
+def _existing(session: Session, keys: List[Tuple], created_at: datetime = None) -> Dict[Tuple, Dict]:
+    """Current values of the hospitals whose key is among `keys` (only those created at `created_at` if given)"""
+    names = list({k[0] for k in keys})
+    wanted = set(keys)
+    found = {}
+    query = session.query(
+        Hospital.id, Hospital.name, Hospital.latitude, Hospital.longitude, Hospital.address,
+        Hospital.type, Hospital.class_, Hospital.total_beds, Hospital.phone
+    ).filter(Hospital.name.in_(names))
+    if created_at is not None:
+        query = query.filter(Hospital.created_at == created_at)
+    for h in query.all():
+        key = location_key(h.name, h.latitude, h.longitude)
+        if key in wanted:
+            found[key] = h._asdict()
+    return found
+
+
+def _merged_values(key: Tuple, row: Dict, current: Dict, now: datetime) -> Dict:
+    """
+    Table values to write: non-empty CSV fields overwrite, empty ones keep
+    current values (current None: the values a new row is inserted with)
+    """
+    name, lat, lon = key
+    address = (row.get('address') or '').strip()
+    if current is None:
+        return {
+            'name': name, 'latitude': lat, 'longitude': lon,
+            'address': address or 'Unknown',
+            'type': row.get('type'),
+            'class': row.get('class'),
+            'total_beds': _int_or(row.get('total_beds'), 0),
+            'available_beds': _int_or(row.get('available_beds'), 0),
+            'phone': row.get('phone'),
+            'created_at': now, 'updated_at': now,
+        }
+    return {
+        'name': name, 'latitude': lat, 'longitude': lon,
+        'address': address or current['address'],
+        'type': row.get('type') or current['type'],
+        'class': row.get('class') or current['class_'],
+        'total_beds': _int_or(row.get('total_beds'), current['total_beds'] or 0),
+        # only used if the row was deleted concurrently and gets inserted
+        'available_beds': _int_or(row.get('available_beds'), 0),
+        'phone': row.get('phone') or current['phone'],
+        'created_at': now, 'updated_at': now,
+    }
+
+
+def location_key(name: str, latitude: float, longitude: float) -> Tuple:
+    """uq_hospital_name_location key with coordinates rounded like the stored values"""
+    return (name, round(float(latitude), COORDINATE_DECIMALS), round(float(longitude), COORDINATE_DECIMALS))
+
+
+def _kept_if_empty(new, current, empty_values: Iterable):
+    """COALESCE(NULLIF(new, empty), current): the new value unless it is NULL or one of empty_values"""
+    for empty in empty_values:
+        new = func.nullif(new, empty)
+    return func.coalesce(new, current)
+
+
+def hospital_upsert_statement(session: Session, update_columns: Iterable[str] = UPDATE_COLUMNS,
+                              keep_if_empty: Iterable[str] = ()):
+    """
+    Native upsert on uq_hospital_name_location, or None if the dialect has none
+    Args:
+        session: Database session (its dialect picks the statement)
+        update_columns: Columns overwritten when the key already exists
+        keep_if_empty: Those of update_columns that keep their current value
+            when the new one is NULL or one of its EMPTY_VALUES
+    """
+    table = Hospital.__table__
+    keep_if_empty = set(keep_if_empty)
+
+    def set_clause(new_values):
+        return {c: _kept_if_empty(new_values[c], table.c[c], EMPTY_VALUES[c]) if c in keep_if_empty else new_values[c]
+                for c in update_columns}
+
+    dialect = session.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update(set_clause(stmt.inserted))
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(index_elements=list(KEY_COLUMNS), set_=set_clause(stmt.excluded))
+    return None
+
+
+def write_hospital_upserts(session: Session, stmt, values: List[Dict], current_ids: Dict[Tuple, int],
+                           update_columns: Iterable[str] = UPDATE_COLUMNS):
+    """
+    Execute one batch of hospital upserts (not committed)
+    Args:
+        stmt: Result of hospital_upsert_statement
+        values: Rows keyed by hospitals column name
+        current_ids: Key -> id of the batch's hospitals already in the DB,
+            used when the dialect has no native upsert
+        update_columns: Columns overwritten when the key already exists
+    """
+    if not values:
+        return
+    if stmt is not None:
+        session.execute(stmt, values)
+        return
+    # no native upsert: plain INSERT for new keys, UPDATE by primary key for the rest
+    table = Hospital.__table__
+    update_columns = list(update_columns)
+    new = [v for v in values if (v['name'], v['latitude'], v['longitude']) not in current_ids]
+    changed = [dict({c: v[c] for c in update_columns}, hospital_id=current_ids[(v['name'], v['latitude'], v['longitude'])])
+               for v in values if (v['name'], v['latitude'], v['longitude']) in current_ids]
+    if new:
+        session.execute(table.insert(), new)
+    if changed:
+        session.execute(
+            update(table).where(table.c.id == bindparam('hospital_id')).values(
+                {c: bindparam(c) for c in update_columns}
+            ),
+            changed
+        )
+
+
+def _upsert_batch(session: Session, stmt, batch: List[Tuple], rows: Dict[Tuple, Dict]) -> Dict[Tuple, int]:
+    """
+    Write one batch of parsed rows (not committed)
+    Returns:
+        Key -> id of the hospitals the batch inserted; an inserted row is
+        recognised by its created_at, which the upsert never updates
+    """
+    now = datetime.utcnow()
+    returning = stmt is not None and session.get_bind().dialect.insert_executemany_returning
+    if not returning:
+        # looked up again below: MySQL TIMESTAMP columns drop the fraction
+        now = now.replace(microsecond=0)
+    if stmt is None:
+        # no native upsert: merge against current values in Python
+        current = _existing(session, batch)
+        values = [_merged_values(k, rows[k], current.get(k), now) for k in batch]
+        write_hospital_upserts(session, None, values, {k: h['id'] for k, h in current.items()})
+        new_keys = [k for k in batch if k not in current]
+        return {k: h['id'] for k, h in _existing(session, new_keys, now).items()} if new_keys else {}
+
+    values = [_merged_values(k, rows[k], None, now) for k in batch]
+    if returning:
+        table = Hospital.__table__
+        result = session.execute(
+            stmt.returning(table.c.id, table.c.name, table.c.latitude, table.c.longitude, table.c.created_at),
+            values
+        )
+        return {location_key(r.name, r.latitude, r.longitude): r.id for r in result if r.created_at == now}
+    result = session.execute(stmt, values)
+    # MySQL counts 1 affected row per insert and 2 per changed update: all updates need no lookup
+    if result.rowcount == 2 * len(batch):
+        return {}
+    return {k: h['id'] for k, h in _existing(session, batch, now).items()}
+
+
+def load_faskes_csv(session: Session, csv_path: str, change_feed=None, batch_size: int = 2000) -> Dict[str, int]:
     """
     Load faskes CSV and insert/update Hospital records.
 
     CSV expected headers: name,address,latitude,longitude,type,class,total_beds,available_beds,phone
 
-    Returns number of upserts performed.
+    Rows are keyed on (name, latitude, longitude); a key repeated in the
+    file is written once with its last row. Empty fields (and the
+    placeholders new rows get for them: 'Unknown' address, 0 beds) keep
+    the stored values. Each batch is one upsert statement returning the
+    ids it inserted; on MySQL, which has no RETURNING, batches that
+    inserted rows cost one more SELECT, and dialects without a native
+    upsert a SELECT of current values as well.
+    New hospitals are published to change_feed (default: process-wide feed).
+
+    Returns dict with 'inserted', 'updated' and 'skipped' (rows with
+    unparseable coordinates) counts.
     """
-    upserts = 0
     with open(csv_path, newline='', encoding='utf-8') as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            try:
-                lat = float(row.get('latitude') or 0.0)
-                lon = float(row.get('longitude') or 0.0)
-            except ValueError:
-                continue
-
-            name = (row.get('name') or '').strip()
-            address = (row.get('address') or '').strip()
-
-            # Try to find existing hospital by name + coords
-            existing = session.query(Hospital).filter(
-                Hospital.name == name,
-                Hospital.latitude == lat,
-                Hospital.longitude == lon
-            ).first()
-
-            if existing:
-                # update fields
-                existing.address = address or existing.address
-                existing.type = row.get('type') or existing.type
-                existing.class_ = row.get('class') or existing.class_
-                try:
-                    existing.total_beds = int(row.get('total_beds') or existing.total_beds or 0)
-                except ValueError:
-                    pass
-                existing.phone = row.get('phone') or existing.phone
-            else:
-                h = Hospital(
-                    name=name or 'Unknown',
-                    address=address or 'Unknown',
-                    latitude=lat,
-                    longitude=lon,
-                    type=row.get('type'),
-                    class_=row.get('class'),
-                )
-                try:
-                    h.total_beds = int(row.get('total_beds') or 0)
-                except ValueError:
-                    h.total_beds = 0
-                try:
-                    h.available_beds = int(row.get('available_beds') or 0)
-                except ValueError:
-                    h.available_beds = 0
-
-                session.add(h)
-
-            upserts += 1
-
-    session.commit()
-    return upserts
+        rows, skipped = _parse_rows(csv.DictReader(fh))
+
+    stmt = hospital_upsert_statement(session, keep_if_empty=EMPTY_VALUES)
+    keys = list(rows)
+    inserted = updated = 0
+    changes = []
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        created = _upsert_batch(session, stmt, batch, rows)
+        inserted += len(created)
+        updated += len(batch) - len(created)
+        changes.extend({'hospital_id': hospital_id, 'available_beds': _int_or(rows[k].get('available_beds'), 0)}
+                       for k, hospital_id in created.items())
+        session.commit()
+
+    (change_feed or capacity_feed).publish_many(changes, source='faskes_loader')
+    return {'inserted': inserted, 'updated': updated, 'skipped': skipped}
@@ -0,0 +1,114 @@
+"""In-memory hospital name index for matching external datasets by name.
+
+Hospital names are loaded once and normalized (case, punctuation and
+facility prefixes such as "RS", "RSUD" or "Rumah Sakit Umum Daerah"
+removed). Lookups try the exact normalized key first and fall back to
+character-trigram similarity, so matching a file of names costs one query
+plus in-memory lookups instead of one LIKE '%...%' scan per name.
+"""
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from src.models import Hospital
+
+# Multi-word prefixes are removed before single tokens
+FACILITY_PHRASES = (
+    'rumah sakit umum daerah',
+    'rumah sakit umum pusat',
+    'rumah sakit ibu dan anak',
+    'rumah sakit umum',
+    'rumah sakit',
+)
+FACILITY_TOKENS = {'rs', 'rsu', 'rsud', 'rsup', 'rsia', 'rsi', 'rsab', 'rsau', 'rsal', 'rsad'}
+
+_PUNCTUATION = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a hospital name for matching
+
+    Example: 'RSUD Dr. Soetomo' -> 'dr soetomo'
+    """
+    text = _PUNCTUATION.sub(' ', str(name).lower())
+    text = f' {" ".join(text.split())} '
+    for phrase in FACILITY_PHRASES:
+        text = text.replace(f' {phrase} ', ' ')
+    return ' '.join(t for t in text.split() if t not in FACILITY_TOKENS)
+
+
+def trigrams(key: str) -> Set[str]:
+    """Character trigrams of a normalized name, padded so short names still index"""
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class HospitalNameIndex:
+    """
+    Exact-key and trigram index over hospital names
+    """
+
+    def __init__(self, hospitals: Iterable[Tuple[int, str]], min_similarity: float = 0.6):
+        """
+        Args:
+            hospitals: (hospital_id, name) pairs
+            min_similarity: Minimum trigram Jaccard similarity for a fuzzy match
+        """
+        self.min_similarity = min_similarity
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        postings: Dict[str, List[int]] = defaultdict(list)
+        ids, sizes = [], []
+        for hospital_id, name in hospitals:
+            key = normalize_name(name)
+            if not key:
+                continue
+            self._exact[key].append(hospital_id)
+            grams = trigrams(key)
+            for gram in grams:
+                postings[gram].append(len(ids))
+            ids.append(hospital_id)
+            sizes.append(len(grams))
+        # postings hold row positions so shared-trigram counts are one bincount
+        self._ids = np.array(ids, dtype=np.int64)
+        self._sizes = np.array(sizes, dtype=np.int32)
+        self._postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    @classmethod
+    def from_session(cls, db: Session, min_similarity: float = 0.6) -> 'HospitalNameIndex':
+        """Build the index from all hospitals with one query"""
+        return cls(db.query(Hospital.id, Hospital.name).all(), min_similarity=min_similarity)
+
+    def __len__(self) -> int:
+        return int(self._ids.shape[0])
+
+    def match(self, name: str) -> Tuple[Optional[int], str]:
+        """
+        Find the hospital a name refers to
+        Returns:
+            (hospital_id, how) where how is 'exact', 'fuzzy', 'ambiguous'
+            (several equally good candidates) or 'none'; hospital_id is None
+            unless how is 'exact' or 'fuzzy'
+        """
+        key = normalize_name(name)
+        if not key:
+            return None, 'none'
+
+        exact = self._exact.get(key)
+        if exact:
+            return (exact[0], 'exact') if len(exact) == 1 else (None, 'ambiguous')
+
+        grams = trigrams(key)
+        hits = [self._postings[g] for g in grams if g in self._postings]
+        if not hits:
+            return None, 'none'
+
+        shared = np.bincount(np.concatenate(hits), minlength=self._ids.shape[0])
+        # Jaccard similarity of trigram sets
+        similarity = shared / (len(grams) + self._sizes - shared)
+        best = similarity.max()
+        if best < self.min_similarity:
+            return None, 'none'
+        winners = np.flatnonzero(similarity == best)
+        return (int(self._ids[winners[0]]), 'fuzzy') if winners.shape[0] == 1 else (None, 'ambiguous')
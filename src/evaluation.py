@@ -5,53 +5,214 @@ Provides functions to run a train/test split on historical wait-time
 data, compute regression metrics (MAE, RMSE, R2) and timing information,
 and produce a simple report dict (suitable for writing to JSON/markdown).
 """
-from typing import Dict, Optional
+from itertools import product
+from typing import Dict, List, Optional
+import pickle
 import time
 import numpy as np
 import pandas as pd
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from src.models import WaitTimeHistory
-from src.models import Hospital
-from src.features.geospatial import haversine_km, multi_radius_counts, kernel_density_feature, compute_patient_distance
-from sklearn.model_selection import TimeSeriesSplit, GridSearchCV
-from sklearn.ensemble import GradientBoostingRegressor
-from math import radians, cos, sin, asin, sqrt
+from src.models import WaitTimeHistory, severity_code
 from src.models import Hospital
+from src.features.geospatial import haversine_km, neighbor_features
+from src.predictor import MODEL_FAMILIES, build_model
+from src.tuning import tune, make_cv_folds
+from joblib import Parallel, delayed
+from src.features.store import radius_column
+
+
+EVALUATION_SPLITS = ('random', 'time_series')
+
+WAIT_TIME_FRAME_DTYPES = {
+    'id': np.int32,
+    'hospital_id': np.int32,
+    'severity': np.int8,
+    'hour': np.int8,
+    'day_of_week': np.int8,
+    'wait_time': np.int32,
+}
+
+
+def _typed_wait_time_chunk(rows, include_timestamp: bool) -> pd.DataFrame:
+    ids, hospital_ids, severities, timestamps, wait_times = zip(*rows)
+    ts = pd.to_datetime(pd.Series(timestamps, dtype='object'))
+    data = {
+        'id': np.asarray(ids, dtype=np.int32),
+        'hospital_id': np.asarray(hospital_ids, dtype=np.int32),
+        'severity': np.fromiter((severity_code(sev) for sev in severities), dtype=np.int8, count=len(rows)),
+        'hour': ts.dt.hour.fillna(0).to_numpy(dtype=np.int8),
+        'day_of_week': ts.dt.weekday.fillna(0).to_numpy(dtype=np.int8),
+        'wait_time': np.asarray(wait_times, dtype=np.int32),
+    }
+    if include_timestamp:
+        data['timestamp'] = ts.to_numpy()
+    return pd.DataFrame(data)
+
+
+def load_wait_time_frame(db: Session, chunk_size: int = 50000, include_timestamp: bool = False,
+                         existing_hospitals_only: bool = False) -> pd.DataFrame:
+    """
+    Load wait-time history as a compactly typed DataFrame.
+
+    Only the needed columns are selected and rows are streamed in chunks
+    of `chunk_size`, each converted to typed columns (int32 ids, int8
+    severity/hour/weekday) before the chunks are concatenated.
+
+    Args:
+        db: SQLAlchemy session
+        chunk_size: rows fetched per chunk
+        include_timestamp: also return the raw timestamp column
+        existing_hospitals_only: drop rows whose hospital no longer exists
+
+    Returns:
+        DataFrame ordered by history id with columns id, hospital_id,
+        severity, hour, day_of_week, wait_time (and timestamp)
+    """
+    stmt = select(
+        WaitTimeHistory.id,
+        WaitTimeHistory.hospital_id,
+        WaitTimeHistory.severity_level,
+        WaitTimeHistory.timestamp,
+        WaitTimeHistory.wait_time_minutes
+    )
+    if existing_hospitals_only:
+        stmt = stmt.join(Hospital, Hospital.id == WaitTimeHistory.hospital_id)
+    stmt = stmt.order_by(WaitTimeHistory.id).execution_options(yield_per=chunk_size)
+
+    frames = [_typed_wait_time_chunk(rows, include_timestamp) for rows in db.execute(stmt).partitions()]
+    if frames:
+        return pd.concat(frames, ignore_index=True)
+
+    df = pd.DataFrame({name: np.empty(0, dtype=dtype) for name, dtype in WAIT_TIME_FRAME_DTYPES.items()})
+    if include_timestamp:
+        df['timestamp'] = pd.Series(dtype='datetime64[ns]')
+    return df
+
+
+def hospital_geofeature_frame(db: Session, radii_km: List[float], include_kernel: bool = False,
+                              bandwidth_km: float = 5.0, include_location: bool = False) -> pd.DataFrame:
+    """
+    Per-hospital geofeatures keyed by hospital_id, for merging onto
+    load_wait_time_frame() rows.
+
+    Columns: hospital_id, count_within_<r>km per radius, optionally
+    kernel_density and latitude/longitude.
+    """
+    hospitals = db.query(Hospital).all()
+    # counts and density share one distance pass
+    features = neighbor_features(hospitals, radii_km, [bandwidth_km] if include_kernel else None)
+    data = {'hospital_id': features['hospital_id'].astype(np.int32)}
+    for i, r in enumerate(radii_km):
+        data[radius_column(r)] = features['counts'][:, i]
+    if include_kernel:
+        data['kernel_density'] = features['densities'][:, 0].astype(np.float32)
+    if include_location:
+        data['latitude'] = np.array([h.latitude for h in hospitals], dtype=np.float64)
+        data['longitude'] = np.array([h.longitude for h in hospitals], dtype=np.float64)
+    return pd.DataFrame(data)
+
 
+def _haversine_km_arrays(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * np.arcsin(np.sqrt(a))
+
+
+def _patient_distances(ids: pd.Series, hospital_lat: pd.Series, hospital_lon: pd.Series,
+                       patient_locations: dict) -> np.ndarray:
+    """Patient-to-hospital km per row; patient_locations is keyed by wait_time_history.id, rows without one get 0.0"""
+    plat = ids.map(lambda i: patient_locations.get(int(i), (np.nan, np.nan))[0]).to_numpy(dtype=np.float64)
+    plon = ids.map(lambda i: patient_locations.get(int(i), (np.nan, np.nan))[1]).to_numpy(dtype=np.float64)
+    dist = _haversine_km_arrays(plat, plon, hospital_lat.to_numpy(dtype=np.float64), hospital_lon.to_numpy(dtype=np.float64))
+    return np.nan_to_num(dist, nan=0.0)
+
+
+def _feature_store_frame(db: Session, feature_store, geo: bool = False, time_ordered: bool = False) -> pd.DataFrame:
+    """Refresh the feature store incrementally and read its rows as a DataFrame."""
+    feature_store.refresh(db)
+    df = feature_store.frame(geo=geo)
+    return _sort_by_time(df, drop=False) if time_ordered else df
+
+
+def _is_time_series_split(split: str) -> bool:
+    if split not in EVALUATION_SPLITS:
+        raise ValueError(f"Unknown split: {split}. Expected one of {EVALUATION_SPLITS}")
+    return split == 'time_series'
+
+
+def _sort_by_time(df: pd.DataFrame, drop: bool = True) -> pd.DataFrame:
+    """Chronological row order for rolling-origin splits."""
+    df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    return df.drop(columns='timestamp') if drop else df
+
+
+def _fit_fold(fold_index: int, fold: tuple, model_family: str, random_state: int) -> Dict:
+    X_train, y_train, X_test, y_test = fold
+    model = build_model(model_family, random_state=random_state)
+
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train)
+    train_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    preds = model.predict(X_test)
+    predict_time = time.perf_counter() - t0
+
+    return {
+        'fold': fold_index,
+        'train_size': int(X_train.shape[0]),
+        'test_size': int(X_test.shape[0]),
+        'train_time_seconds': train_time,
+        'predict_time_seconds': predict_time,
+        'mae': float(mean_absolute_error(y_test, preds)),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, preds))),
+        'r2': float(r2_score(y_test, preds)),
+        'baseline_median_mae': float(mean_absolute_error(y_test, np.full(y_test.shape, np.median(y_train)))),
+    }
 
-def _prepare_dataframe(wait_times):
-    rows = []
-    severity_map = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
 
-    for wt in wait_times:
-        try:
-            sev = wt.severity_level.value if wt.severity_level is not None else 'medium'
-        except Exception:
-            sev = 'medium'
+def rolling_origin_evaluation(X: np.ndarray, y: np.ndarray, n_splits: int = 5, model_family: str = 'forest',
+                              n_jobs: int = -1, random_state: int = 42) -> Dict:
+    """
+    Rolling-origin (TimeSeriesSplit) evaluation on time-ordered rows.
 
-        severity_encoded = severity_map.get(sev, 2)
-        timestamp = wt.timestamp
-        hour = timestamp.hour if timestamp is not None else 0
-        day = timestamp.weekday() if timestamp is not None else 0
+    Each fold trains on everything before its test window, so no future
+    rows leak into training. Fold arrays are materialized once and the
+    folds are fitted in parallel (joblib processes).
 
-        rows.append({
-            'hospital_id': int(wt.hospital_id),
-            'severity': severity_encoded,
-            'hour': int(hour),
-            'day_of_week': int(day),
-            'wait_time': int(wt.wait_time_minutes)
-        })
+    Returns:
+        dict with per-fold metrics under 'folds' plus mean metrics
+        (mae, rmse, r2, baseline_median_mae) and their spread
+    """
+    folds = make_cv_folds(X, y, cv_splits=n_splits, use_time_series=True)
 
-    if not rows:
-        return pd.DataFrame()
+    t0 = time.perf_counter()
+    fold_reports = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(i, fold, model_family, random_state) for i, fold in enumerate(folds)
+    )
+    wall_time = time.perf_counter() - t0
 
-    return pd.DataFrame(rows)
+    report = {
+        'split': 'time_series',
+        'n_splits': len(folds),
+        'folds': fold_reports,
+        'wall_time_seconds': wall_time,
+        'train_time_seconds': float(sum(f['train_time_seconds'] for f in fold_reports)),
+        'predict_time_seconds': float(sum(f['predict_time_seconds'] for f in fold_reports)),
+    }
+    for metric in ('mae', 'rmse', 'r2', 'baseline_median_mae'):
+        values = np.array([f[metric] for f in fold_reports])
+        report[metric] = float(values.mean())
+        report[f'{metric}_std'] = float(values.std())
+    return report
 
 
-def evaluate_wait_time_model(db: Session, test_size: float = 0.2, random_state: int = 42, min_samples: int = 20) -> Optional[Dict]:
+def evaluate_wait_time_model(db: Session, test_size: float = 0.2, random_state: int = 42, min_samples: int = 20, feature_store=None,
+                             split: str = 'random', n_splits: int = 5, n_jobs: int = -1) -> Optional[Dict]:
     """
     Train/test evaluation for wait time model.
 
@@ -60,12 +221,22 @@ def evaluate_wait_time_model(db: Session, test_size: float = 0.2, random_state:
         test_size: fraction to reserve for test
         random_state: reproducible seed
         min_samples: minimum samples required to run evaluation
+        feature_store: optional WaitTimeFeatureStore to read features from
+        split: 'random' (single train_test_split) or 'time_series'
+            (rolling-origin folds, see rolling_origin_evaluation)
+        n_splits: number of rolling-origin folds
+        n_jobs: parallel fold workers for split='time_series'
 
     Returns:
         report dict containing metrics and timings or None if insufficient data
     """
-    wait_times = db.query(WaitTimeHistory).all()
-    df = _prepare_dataframe(wait_times)
+    time_ordered = _is_time_series_split(split)
+    if feature_store is not None:
+        df = _feature_store_frame(db, feature_store, time_ordered=time_ordered)
+    else:
+        df = load_wait_time_frame(db, include_timestamp=time_ordered)
+        if time_ordered:
+            df = _sort_by_time(df)
 
     if df.shape[0] < min_samples:
         return None
@@ -73,6 +244,12 @@ def evaluate_wait_time_model(db: Session, test_size: float = 0.2, random_state:
     X = df[['hospital_id', 'severity', 'hour', 'day_of_week']].values
     y = df['wait_time'].values
 
+    if time_ordered:
+        report = rolling_origin_evaluation(X, y, n_splits=n_splits, n_jobs=n_jobs, random_state=random_state)
+        report.update({'n_samples': int(df.shape[0]), 'model': 'RandomForestRegressor',
+                       'notes': 'Rolling-origin regression metrics for wait-time prediction (minutes)'})
+        return report
+
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
 
     model = RandomForestRegressor(n_estimators=100, random_state=random_state)
@@ -111,69 +288,48 @@ def evaluate_wait_time_model(db: Session, test_size: float = 0.2, random_state:
 
 
 def haversine(lon1, lat1, lon2, lat2):
-    # convert decimal degrees to radians
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    km = 6371 * c
-    return km
+    return haversine_km(lon1, lat1, lon2, lat2)
+
 
+def _augmented_dataframe(db: Session, radius_km: float, time_ordered: bool = False) -> pd.DataFrame:
+    geo = hospital_geofeature_frame(db, [radius_km]).rename(columns={radius_column(radius_km): 'nearby_count'})
+    df = load_wait_time_frame(db, include_timestamp=time_ordered).merge(geo, on='hospital_id', how='inner', sort=False)
+    if time_ordered:
+        df = _sort_by_time(df)
+    return df[['hospital_id', 'severity', 'hour', 'day_of_week', 'nearby_count', 'wait_time']]
 
-def evaluate_wait_time_model_augmented(db: Session, radius_km: float = 5.0, test_size: float = 0.2, random_state: int = 42, min_samples: int = 20) -> Optional[Dict]:
+
+def evaluate_wait_time_model_augmented(db: Session, radius_km: float = 5.0, test_size: float = 0.2, random_state: int = 42, min_samples: int = 20, feature_store=None,
+                                       split: str = 'random', n_splits: int = 5, n_jobs: int = -1) -> Optional[Dict]:
     """
     Augmented evaluation that adds a feature: count of hospitals within `radius_km`
     of the hospital corresponding to each WaitTimeHistory row.
+
+    With `feature_store`, nearby counts are read from the store; `radius_km`
+    must be one of the store's radii. `split`, `n_splits` and `n_jobs` as in
+    evaluate_wait_time_model.
     """
-    wait_times = db.query(WaitTimeHistory).all()
-    if len(wait_times) < min_samples:
-        return None
+    time_ordered = _is_time_series_split(split)
+    if feature_store is not None:
+        if radius_km not in feature_store.radii_km:
+            raise ValueError(f"radius_km={radius_km} not materialized in feature store (radii: {feature_store.radii_km})")
+        df = _feature_store_frame(db, feature_store, geo=True, time_ordered=time_ordered)
+        df = df.rename(columns={radius_column(radius_km): 'nearby_count'})
+    else:
+        df = _augmented_dataframe(db, radius_km, time_ordered=time_ordered)
 
-    # load hospitals into memory
-    hospitals = {h.id: h for h in db.query(Hospital).all()}
-
-    rows = []
-    severity_map = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
-
-    for wt in wait_times:
-        hosp = hospitals.get(wt.hospital_id)
-        if not hosp:
-            continue
-        # count neighbors
-        count_nearby = 0
-        for other in hospitals.values():
-            d = haversine(hosp.longitude, hosp.latitude, other.longitude, other.latitude)
-            if d <= radius_km and other.id != hosp.id:
-                count_nearby += 1
-
-        try:
-            sev = wt.severity_level.value if wt.severity_level is not None else 'medium'
-        except Exception:
-            sev = 'medium'
-
-        severity_encoded = severity_map.get(sev, 2)
-        timestamp = wt.timestamp
-        hour = timestamp.hour if timestamp is not None else 0
-        day = timestamp.weekday() if timestamp is not None else 0
-
-        rows.append({
-            'hospital_id': int(wt.hospital_id),
-            'severity': severity_encoded,
-            'hour': int(hour),
-            'day_of_week': int(day),
-            'nearby_count': int(count_nearby),
-            'wait_time': int(wt.wait_time_minutes)
-        })
-
-    import pandas as pd
-    df = pd.DataFrame(rows)
     if df.empty or df.shape[0] < min_samples:
         return None
 
     X = df[['hospital_id', 'severity', 'hour', 'day_of_week', 'nearby_count']].values
     y = df['wait_time'].values
 
+    if time_ordered:
+        report = rolling_origin_evaluation(X, y, n_splits=n_splits, n_jobs=n_jobs, random_state=random_state)
+        report.update({'n_samples': int(df.shape[0]), 'model': 'RandomForestRegressor_augmented',
+                       'notes': f'Rolling-origin, augmented with nearby_count (radius_km={radius_km})'})
+        return report
+
     from sklearn.model_selection import train_test_split
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
 
@@ -212,85 +368,93 @@ def evaluate_wait_time_model_augmented(db: Session, radius_km: float = 5.0, test
     return report
 
 
-def compare_baseline_vs_augmented(db: Session, radius_km: float = 5.0):
-    base = evaluate_wait_time_model(db)
-    aug = evaluate_wait_time_model_augmented(db, radius_km=radius_km)
+def compare_baseline_vs_augmented(db: Session, radius_km: float = 5.0, feature_store=None, split: str = 'random'):
+    base = evaluate_wait_time_model(db, feature_store=feature_store, split=split)
+    aug = evaluate_wait_time_model_augmented(db, radius_km=radius_km, feature_store=feature_store, split=split)
     return {'baseline': base, 'augmented': aug}
 
 
-def evaluate_with_geofeatures(db: Session, include_patient_distance: bool = False, patient_locations: dict = None, radii_km: list = None, include_kernel: bool = False, test_size: float = 0.2, random_state: int = 42):
-    """
-    Build a dataframe with optional geospatial features and evaluate.
-
-    - patient_locations: dict mapping wait_time_history.id -> (lat, lon)
-    - radii_km: list of radii to compute counts for
-    """
-    import pandas as pd
-    wait_times = db.query(WaitTimeHistory).all()
-    if not wait_times:
+def _geofeature_dataframe(db: Session, include_patient_distance: bool, patient_locations: dict, radii_km: list, include_kernel: bool,
+                          time_ordered: bool = False) -> Optional[pd.DataFrame]:
+    rows = load_wait_time_frame(db, include_timestamp=time_ordered)
+    if rows.empty:
         return None
+    if time_ordered:
+        rows = _sort_by_time(rows)
 
-    hospitals = db.query(Hospital).all()
-    hosp_map = {h.id: h for h in hospitals}
+    with_distance = bool(include_patient_distance and patient_locations)
+    geo = hospital_geofeature_frame(db, radii_km, include_kernel=include_kernel, include_location=with_distance)
+    df = rows.merge(geo, on='hospital_id', how='inner', sort=False)
 
-    rows = []
-    severity_map = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+    cols = ['hospital_id', 'severity', 'hour', 'day_of_week', 'wait_time'] + [radius_column(r) for r in radii_km]
+    if include_kernel:
+        cols.append('kernel_density')
 
-    radii_km = radii_km or [1.0, 5.0, 10.0]
-    # precompute multi-radius counts and kernel density
-    mrc = multi_radius_counts(hospitals, radii_km)
-    kd = kernel_density_feature(hospitals, bandwidth_km=5.0) if include_kernel else {}
-
-    for wt in wait_times:
-        hosp = hosp_map.get(wt.hospital_id)
-        if not hosp:
-            continue
-        try:
-            sev = wt.severity_level.value if wt.severity_level is not None else 'medium'
-        except Exception:
-            sev = 'medium'
-
-        severity_encoded = severity_map.get(sev, 2)
-        ts = wt.timestamp
-        hour = ts.hour if ts is not None else 0
-        day = ts.weekday() if ts is not None else 0
-
-        row = {
-            'hospital_id': int(wt.hospital_id),
-            'severity': severity_encoded,
-            'hour': int(hour),
-            'day_of_week': int(day),
-            'wait_time': int(wt.wait_time_minutes)
-        }
+    if with_distance:
+        df['patient_distance_km'] = _patient_distances(df['id'], df['latitude'], df['longitude'], patient_locations)
+        cols.append('patient_distance_km')
+
+    return df[cols]
+
+
+def _geofeature_store_dataframe(db: Session, feature_store, include_patient_distance: bool, patient_locations: dict, radii_km: list, include_kernel: bool,
+                                time_ordered: bool = False) -> Optional[pd.DataFrame]:
+    missing = [r for r in radii_km if r not in feature_store.radii_km]
+    if missing:
+        raise ValueError(f"radii {missing} not materialized in feature store (radii: {feature_store.radii_km})")
+    if include_kernel and feature_store.bandwidth_km != 5.0:
+        raise ValueError(f"feature store kernel bandwidth is {feature_store.bandwidth_km} km, expected 5.0")
 
-        # add multi-radius counts
-        counts = mrc.get(wt.hospital_id, [0]*len(radii_km))
-        for i, r in enumerate(radii_km):
-            row[f'count_within_{int(r)}km'] = counts[i]
+    store_df = _feature_store_frame(db, feature_store, geo=True, time_ordered=time_ordered)
+    if store_df.empty:
+        return None
+
+    cols = ['hospital_id', 'severity', 'hour', 'day_of_week', 'wait_time'] + [radius_column(r) for r in radii_km]
+    if include_kernel:
+        cols.append('kernel_density')
+    df = store_df[cols].copy()
 
-        # kernel density
-        if include_kernel:
-            row['kernel_density'] = float(kd.get(wt.hospital_id, 0.0))
+    if include_patient_distance and patient_locations:
+        locations = pd.DataFrame(db.query(Hospital.id, Hospital.latitude, Hospital.longitude).all(),
+                                 columns=['hospital_id', 'latitude', 'longitude'])
+        located = store_df[['id', 'hospital_id']].merge(locations, on='hospital_id', how='left', sort=False)
+        df['patient_distance_km'] = _patient_distances(located['id'], located['latitude'], located['longitude'],
+                                                       patient_locations)
+    return df
 
-        # patient distance
-        if include_patient_distance and patient_locations:
-            ploc = patient_locations.get(wt.id)
-            if ploc:
-                pdist = compute_patient_distance(ploc[0], ploc[1], hosp)
-            else:
-                pdist = 0.0
-            row['patient_distance_km'] = float(pdist)
 
-        rows.append(row)
+def evaluate_with_geofeatures(db: Session, include_patient_distance: bool = False, patient_locations: dict = None, radii_km: list = None, include_kernel: bool = False, test_size: float = 0.2, random_state: int = 42, feature_store=None,
+                              split: str = 'random', n_splits: int = 5, n_jobs: int = -1):
+    """
+    Build a dataframe with optional geospatial features and evaluate.
 
-    df = pd.DataFrame(rows)
-    if df.shape[0] < 20:
+    - patient_locations: dict mapping wait_time_history.id -> (lat, lon)
+    - radii_km: list of radii to compute counts for
+    - feature_store: optional WaitTimeFeatureStore; radii_km must be a subset
+      of the store's radii and the kernel bandwidth must match (5 km)
+    - split: 'random' or 'time_series' (rolling-origin with n_splits folds
+      fitted on n_jobs workers)
+    """
+    radii_km = radii_km or [1.0, 5.0, 10.0]
+    time_ordered = _is_time_series_split(split)
+    if feature_store is not None:
+        df = _geofeature_store_dataframe(db, feature_store, include_patient_distance, patient_locations, radii_km, include_kernel,
+                                         time_ordered=time_ordered)
+    else:
+        df = _geofeature_dataframe(db, include_patient_distance, patient_locations, radii_km, include_kernel,
+                                   time_ordered=time_ordered)
+    if df is None or df.shape[0] < 20:
         return None
 
     feature_cols = [c for c in df.columns if c not in ('wait_time',)]
     X = df[feature_cols].values
     y = df['wait_time'].values
 
+    if time_ordered:
+        report = rolling_origin_evaluation(X, y, n_splits=n_splits, n_jobs=n_jobs, random_state=random_state)
+        report.update({'n_samples': int(df.shape[0]), 'features_used': feature_cols})
+        return report
+
     # simple train/test split
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
 
@@ -319,67 +483,286 @@ def evaluate_with_geofeatures(db: Session, include_patient_distance: bool = Fals
     }
 
 
-def run_hyperparameter_tuning(db: Session, param_grid: dict = None, cv_splits: int = 3, use_time_series: bool = False):
+def _evaluate_feature_set(combo: Dict, X: np.ndarray, y: np.ndarray, split_indices, n_splits: int,
+                          model_family: str, random_state: int) -> Dict:
+    if split_indices is None:
+        report = rolling_origin_evaluation(X, y, n_splits=n_splits, model_family=model_family, n_jobs=1,
+                                           random_state=random_state)
+        report.pop('folds')
+    else:
+        train_idx, test_idx = split_indices
+        report = _fit_fold(0, (X[train_idx], y[train_idx], X[test_idx], y[test_idx]), model_family, random_state)
+        report.pop('fold')
+    report.update(combo)
+    return report
+
+
+def sweep_geofeatures(db: Session, radius_sets: List[List[float]], bandwidths_km: List[float] = None,
+                      split: str = 'random', test_size: float = 0.2, n_splits: int = 5, n_jobs: int = -1,
+                      random_state: int = 42, model_family: str = 'forest', min_samples: int = 20,
+                      feature_store=None) -> Optional[Dict]:
+    """
+    Evaluate many geofeature configurations from one neighbour computation.
+
+    Every combination of a radius set and a kernel bandwidth (radius counts
+    only when bandwidths_km is empty) plus the no-geofeature baseline is
+    evaluated on the same rows and the same split. Pairwise hospital
+    distances are computed once (neighbor_features over the union of all
+    radii and bandwidths); each combination only selects columns, and the
+    combinations are fitted in parallel on n_jobs workers.
+
+    Args:
+        db: SQLAlchemy session
+        radius_sets: list of radius lists, e.g. [[1.0], [1.0, 5.0], [1.0, 5.0, 10.0]]
+        bandwidths_km: kernel bandwidths to combine with each radius set
+        split: 'random' (one shared train/test split) or 'time_series'
+            (rolling-origin with n_splits folds)
+        model_family: key of MODEL_FAMILIES
+        feature_store: optional WaitTimeFeatureStore to read row features from
+
+    Returns:
+        dict with per-combination metrics under 'results' (sorted by MAE),
+        the neighbour computation time and total wall time, or None if
+        insufficient data
+    """
+    time_ordered = _is_time_series_split(split)
+    if feature_store is not None:
+        rows = _feature_store_frame(db, feature_store, time_ordered=time_ordered)
+    else:
+        rows = load_wait_time_frame(db, include_timestamp=time_ordered)
+        if time_ordered:
+            rows = _sort_by_time(rows)
+
+    radii = sorted({float(r) for radii_km in radius_sets for r in radii_km})
+    bandwidths = [float(b) for b in dict.fromkeys(bandwidths_km or [])]
+
+    t0 = time.perf_counter()
+    features = neighbor_features(db.query(Hospital).all(), radii, bandwidths)
+    distance_time = time.perf_counter() - t0
+
+    # align per-hospital features with rows once; combos index columns
+    position = pd.Series(np.arange(features['hospital_id'].shape[0]), index=features['hospital_id'])
+    row_pos = rows['hospital_id'].map(position)
+    keep = row_pos.notna().to_numpy()
+    rows, row_pos = rows[keep], row_pos[keep].to_numpy(dtype=np.int64)
+    if rows.shape[0] < min_samples:
+        return None
+    counts = features['counts'][row_pos]
+    densities = features['densities'][row_pos]
+
+    base = rows[['hospital_id', 'severity', 'hour', 'day_of_week']].to_numpy(dtype=np.float64)
+    y = rows['wait_time'].to_numpy()
+
+    combos = [({'radii_km': [], 'bandwidth_km': None}, base)]
+    for radii_km, bandwidth in product(radius_sets, bandwidths or [None]):
+        columns = [counts[:, radii.index(float(r))] for r in radii_km]
+        if bandwidth is not None:
+            columns.append(densities[:, bandwidths.index(bandwidth)])
+        X = np.column_stack([base] + columns) if columns else base
+        combos.append(({'radii_km': list(radii_km), 'bandwidth_km': bandwidth}, X))
+
+    split_indices = None
+    if not time_ordered:
+        split_indices = train_test_split(np.arange(y.shape[0]), test_size=test_size, random_state=random_state)
+
+    t0 = time.perf_counter()
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_feature_set)(combo, X, y, split_indices, n_splits, model_family, random_state)
+        for combo, X in combos
+    )
+    wall_time = time.perf_counter() - t0
+
+    return {
+        'n_samples': int(y.shape[0]),
+        'split': split,
+        'model_family': model_family,
+        'n_combinations': len(combos),
+        'distance_time_seconds': distance_time,
+        'wall_time_seconds': wall_time,
+        'results': sorted(results, key=lambda r: r['mae']),
+    }
+
+
+def _tuning_dataframe(db: Session) -> Optional[pd.DataFrame]:
+    df = load_wait_time_frame(db, include_timestamp=True, existing_hospitals_only=True)
+    if df.empty:
+        return None
+    return df
+
+
+def run_hyperparameter_tuning(db: Session, param_grid: dict = None, cv_splits: int = 3, use_time_series: bool = False,
+                              search: str = 'halving', n_iter: int = 30, families: list = None, n_jobs: int = -1,
+                              checkpoint_path: str = None, random_state: int = 42, feature_store=None):
     """
-    Run a quick GridSearchCV over RandomForestRegressor and GradientBoostingRegressor.
-    Returns best estimator info and CV results (kept small for demo).
+    Hyperparameter search over RandomForest, GradientBoosting and
+    HistGradientBoosting (see src.tuning).
+
+    - search: 'halving' (successive halving over sampled candidates),
+      'random' or 'grid'
+    - param_grid: optional override of the RandomForest search space
+    - n_jobs: worker processes for candidate evaluation (-1 = all cores)
+    - checkpoint_path: JSON file to checkpoint/resume intermediate scores
+    - feature_store: optional WaitTimeFeatureStore to read features from
     """
-    import pandas as pd
-    wait_times = db.query(WaitTimeHistory).all()
-    if len(wait_times) < 50:
+    if feature_store is not None:
+        df = _feature_store_frame(db, feature_store, geo=True)
+    else:
+        df = _tuning_dataframe(db)
+    if df is None or df.shape[0] < 50:
         return None
 
-    hospitals = db.query(Hospital).all()
-    hosp_map = {h.id: h for h in hospitals}
-
-    rows = []
-    severity_map = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
-    for wt in wait_times:
-        hosp = hosp_map.get(wt.hospital_id)
-        if not hosp:
-            continue
-        try:
-            sev = wt.severity_level.value if wt.severity_level is not None else 'medium'
-        except Exception:
-            sev = 'medium'
-        severity_encoded = severity_map.get(sev, 2)
-        ts = wt.timestamp
-        hour = ts.hour if ts is not None else 0
-        day = ts.weekday() if ts is not None else 0
-        rows.append({'hospital_id': wt.hospital_id, 'severity': severity_encoded, 'hour': hour, 'day_of_week': day, 'wait_time': wt.wait_time_minutes})
-
-    df = pd.DataFrame(rows)
+    if use_time_series:
+        # TimeSeriesSplit folds assume chronological rows
+        df = df.sort_values('timestamp', kind='stable')
     X = df[['hospital_id', 'severity', 'hour', 'day_of_week']].values
     y = df['wait_time'].values
 
-    # default small grid
-    param_grid = param_grid or {
-        'n_estimators': [50, 100],
-        'max_depth': [5, 10]
-    }
+    spaces = {'forest': param_grid} if param_grid else None
+    result = tune(X, y, families=families, spaces=spaces, search=search, n_iter=n_iter, cv_splits=cv_splits,
+                  use_time_series=use_time_series, n_jobs=n_jobs, random_state=random_state,
+                  checkpoint_path=checkpoint_path)
 
-    estimator = RandomForestRegressor(random_state=42)
-    if use_time_series:
-        cv = TimeSeriesSplit(n_splits=cv_splits)
-    else:
-        cv = cv_splits
+    fams = result['families']
+    for family, prefix in (('forest', 'rf'), ('gbm', 'gb'), ('hist_gbm', 'hgb')):
+        if family in fams:
+            result[f'{prefix}_best_params'] = fams[family]['best_params']
+            result[f'{prefix}_best_score'] = fams[family]['best_score']
+    return result
 
-    gs = GridSearchCV(estimator, param_grid, cv=cv, scoring='neg_mean_absolute_error', n_jobs=1)
-    gs.fit(X, y)
 
-    # also try gradient boosting quickly
-    gb = GradientBoostingRegressor(random_state=42)
-    gb_grid = {'n_estimators': [50], 'max_depth': [3]}
-    gs_gb = GridSearchCV(gb, gb_grid, cv=3, scoring='neg_mean_absolute_error', n_jobs=1)
-    gs_gb.fit(X, y)
+def model_size_bytes(model) -> int:
+    """Size of a fitted model when pickled (proxy for in-memory footprint)."""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def benchmark_model_arrays(X_train, y_train, X_test, y_test, families: List[str] = None, random_state: int = 42, n_single: int = 200) -> Dict:
+    """
+    Benchmark model families on prepared arrays.
+
+    For each family reports fit time, pickled model bytes, p50/p99
+    single-row predict latency, batch throughput (rows/sec) and MAE.
+    The 'forest' family is the reference; every other family also gets
+    its MAE/size/latency relative to it.
+    """
+    families = list(families or MODEL_FAMILIES)
+    if 'forest' not in families:
+        families.insert(0, 'forest')
+
+    n_single = min(n_single, X_test.shape[0])
+    results = {}
+    for family in families:
+        model = build_model(family, random_state=random_state)
+
+        t0 = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - t0
+
+        # single-row latency, as predict_wait_time calls the model
+        latencies = []
+        for i in range(n_single):
+            row = X_test[i:i + 1]
+            t0 = time.perf_counter()
+            model.predict(row)
+            latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        preds = model.predict(X_test)
+        batch_time = time.perf_counter() - t0
+
+        results[family] = {
+            'fit_time_seconds': fit_time,
+            'model_bytes': model_size_bytes(model),
+            'p50_latency_ms': float(np.percentile(latencies, 50) * 1000) if latencies else None,
+            'p99_latency_ms': float(np.percentile(latencies, 99) * 1000) if latencies else None,
+            'batch_rows_per_second': float(X_test.shape[0] / batch_time) if batch_time > 0 else None,
+            'mae': float(mean_absolute_error(y_test, preds)),
+        }
+
+    ref = results['forest']
+    for family, r in results.items():
+        r['mae_delta_vs_forest'] = r['mae'] - ref['mae']
+        r['size_ratio_vs_forest'] = r['model_bytes'] / ref['model_bytes'] if ref['model_bytes'] else None
+        if r['p50_latency_ms'] and ref['p50_latency_ms']:
+            r['p50_speedup_vs_forest'] = ref['p50_latency_ms'] / r['p50_latency_ms']
 
     return {
-        'rf_best_params': gs.best_params_,
-        'rf_best_score': -float(gs.best_score_),
-        'gb_best_params': gs_gb.best_params_,
-        'gb_best_score': -float(gs_gb.best_score_)
+        'train_size': int(X_train.shape[0]),
+        'test_size': int(X_test.shape[0]),
+        'single_row_samples': int(n_single),
+        'families': results
     }
 
 
+def benchmark_model_families(db: Session, families: List[str] = None, test_size: float = 0.2, random_state: int = 42, min_samples: int = 20, n_single: int = 200, feature_store=None) -> Optional[Dict]:
+    """
+    Compare the compact model families against the current forest on
+    wait-time history: model bytes, p50/p99 single-row latency, batch
+    throughput and MAE.
+
+    Returns None if there is insufficient data.
+    """
+    if feature_store is not None:
+        df = _feature_store_frame(db, feature_store)
+    else:
+        df = load_wait_time_frame(db)
+
+    if df.shape[0] < min_samples:
+        return None
+
+    X = df[['hospital_id', 'severity', 'hour', 'day_of_week']].values
+    y = df['wait_time'].values
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    report = benchmark_model_arrays(X_train, y_train, X_test, y_test, families=families, random_state=random_state, n_single=n_single)
+    report['n_samples'] = int(df.shape[0])
+    return report
+
+
+# train_model.py wait-time distributions
+SYNTHETIC_BASE_WAIT = {1: 45, 2: 75, 3: 120, 4: 20}
+
+
+def synthetic_wait_time_frame(n_rows: int, n_hospitals: int = 200, days: int = 30, seed: int = 42):
+    """
+    Generate synthetic wait-time history with train_model.py's distributions
+    (severity base times, peak/night factors, +/-10 minute noise, 5 minute floor).
+
+    Returns:
+        (rows DataFrame shaped like load_wait_time_frame() plus timestamp,
+         hospitals DataFrame with hospital_id/latitude/longitude)
+    """
+    rng = np.random.default_rng(seed)
+    hospitals = pd.DataFrame({
+        'hospital_id': np.arange(1, n_hospitals + 1, dtype=np.int32),
+        'latitude': -6.2 + rng.uniform(0.0, 0.5, n_hospitals),
+        'longitude': 106.8 + rng.uniform(0.0, 0.5, n_hospitals),
+    })
+
+    start = np.datetime64('2024-01-01T00', 'h')
+    timestamp = start + rng.integers(0, days * 24, n_rows).astype('timedelta64[h]')
+    hour = (timestamp - timestamp.astype('datetime64[D]')).astype(np.int64).astype(np.int8)
+    severity = rng.integers(1, 5, n_rows).astype(np.int8)
+
+    base = np.zeros(5)
+    for code, minutes in SYNTHETIC_BASE_WAIT.items():
+        base[code] = minutes
+    factor = np.where(((hour >= 8) & (hour <= 12)) | ((hour >= 17) & (hour <= 20)), 1.5,
+                      np.where(hour <= 6, 0.7, 1.0))
+    wait = np.maximum(5, (base[severity] * factor + rng.uniform(-10, 10, n_rows)).astype(np.int32))
+
+    rows = pd.DataFrame({
+        'id': np.arange(1, n_rows + 1, dtype=np.int32),
+        'hospital_id': rng.integers(1, n_hospitals + 1, n_rows).astype(np.int32),
+        'severity': severity,
+        'hour': hour,
+        # 1970-01-01 was a Thursday
+        'day_of_week': ((timestamp.astype('datetime64[D]').astype(np.int64) + 3) % 7).astype(np.int8),
+        'wait_time': wait,
+        'timestamp': timestamp.astype('datetime64[ns]'),
+    })
+    return rows, hospitals
+
+
 if __name__ == '__main__':
     print('This module provides evaluation utilities. Import and call evaluate_wait_time_model(db).')
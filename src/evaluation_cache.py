@@ -0,0 +1,203 @@
+"""
+On-disk cache for evaluation and tuning results.
+
+A result is keyed by the function name, its parameters and a fingerprint
+of the input tables (row count, max id and max updated_at per table, plus
+content checksums for tables without updated_at), so repeated reports on
+an unchanged database return the stored JSON instead of refitting models.
+Any insert or delete, any update that touches updated_at and any in-place
+edit of a checksummed column changes the fingerprint and misses the cache.
+
+count/max are cheap; the checksums are not: they scan wait_time_history
+once per lookup (about 1 s per million rows on SQLite), which is still
+small next to the model fits a hit saves.
+
+On-disk layout (one JSON file per result):
+    <cache_dir>/<name>-<sha256 of name, params and fingerprint>.json
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+import numpy as np
+from sqlalchemy import BigInteger, case, cast, extract, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+from src.models import SEVERITY_CODES, Hospital, SeverityEnum, WaitTimeHistory
+
+logger = logging.getLogger(__name__)
+
+# tables read by src.evaluation
+EVALUATION_TABLES = (Hospital, WaitTimeHistory)
+
+
+class epoch_minutes(FunctionElement):
+    """Whole minutes since 1970-01-01 of a DateTime column (NULL stays NULL)"""
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(epoch_minutes)
+def _epoch_minutes_default(element, compiler, **kw):
+    column = list(element.clauses)[0]
+    return compiler.process(cast(extract('epoch', column), BigInteger) // 60, **kw)
+
+
+@compiles(epoch_minutes, 'sqlite')
+def _epoch_minutes_sqlite(element, compiler, **kw):
+    return f"(CAST(strftime('%s', {compiler.process(element.clauses, **kw)}) AS INTEGER) / 60)"
+
+
+@compiles(epoch_minutes, 'mysql')
+def _epoch_minutes_mysql(element, compiler, **kw):
+    return f"(UNIX_TIMESTAMP({compiler.process(element.clauses, **kw)}) DIV 60)"
+
+
+# tables without updated_at: name -> expression summed into the fingerprint;
+# weighted by id so values swapped between rows still change the sum (the
+# timestamp by id % 1024, which keeps the sum within 64-bit integers)
+CONTENT_CHECKSUMS = {
+    WaitTimeHistory: {
+        'wait_time_checksum': WaitTimeHistory.id * WaitTimeHistory.wait_time_minutes,
+        'severity_checksum': WaitTimeHistory.id * case(
+            *[(WaitTimeHistory.severity_level == member, SEVERITY_CODES[member.value]) for member in SeverityEnum],
+            else_=SEVERITY_CODES['medium'],
+        ),
+        'hospital_checksum': WaitTimeHistory.id * WaitTimeHistory.hospital_id,
+        'timestamp_checksum': (WaitTimeHistory.id % 1024 + 1) * func.coalesce(epoch_minutes(WaitTimeHistory.timestamp), 0),
+    },
+}
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def value_digest(value) -> str:
+    """
+    sha256 of a JSON-serializable value, for keying large inputs (e.g. a
+    patient location mapping) by content instead of storing them in the key
+    Dictionary items are sorted, so the digest does not depend on insertion order.
+    """
+    if isinstance(value, dict):
+        value = sorted(value.items())
+    payload = json.dumps(value, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def dataset_fingerprint(db: Session, models: Iterable = EVALUATION_TABLES) -> Dict[str, Dict]:
+    """
+    Summary of table contents: one aggregate query per table (a full scan
+    for tables with CONTENT_CHECKSUMS)
+    Returns:
+        Dictionary table -> {'count', 'max_id', 'max_updated_at'} plus the
+        table's CONTENT_CHECKSUMS sums
+    """
+    fingerprint = {}
+    for model in models:
+        checksums = CONTENT_CHECKSUMS.get(model, {})
+        columns = [func.count(model.id), func.max(model.id)]
+        if hasattr(model, 'updated_at'):
+            columns.append(func.max(model.updated_at))
+        columns += [func.sum(expression) for expression in checksums.values()]
+        row = list(db.query(*columns).one())
+        max_updated_at = row.pop(2) if hasattr(model, 'updated_at') else None
+        fingerprint[model.__tablename__] = {
+            'count': int(row[0] or 0),
+            'max_id': int(row[1] or 0),
+            'max_updated_at': max_updated_at.isoformat() if max_updated_at is not None else None,
+        }
+        for name, value in zip(checksums, row[2:]):
+            fingerprint[model.__tablename__][name] = int(value or 0)
+    return fingerprint
+
+
+class EvaluationCache:
+    """
+    JSON result cache keyed by dataset fingerprint and parameters
+    """
+
+    def __init__(self, path: str = '.cache/evaluation', models: Iterable = EVALUATION_TABLES):
+        """
+        Args:
+            path: Cache directory (created if missing)
+            models: Tables whose fingerprint invalidates cached results
+        """
+        self.path = path
+        self.models = tuple(models)
+        os.makedirs(self.path, exist_ok=True)
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def key(self, name: str, params: Dict, fingerprint: Dict) -> str:
+        payload = json.dumps({'name': name, 'params': params, 'fingerprint': fingerprint},
+                             sort_keys=True, default=_json_default)
+        return f"{name}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]}"
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f'{key}.json')
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Stored entry for a key, or None if missing or unreadable"""
+        try:
+            with open(self._file(key), encoding='utf-8') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {str(e)}")
+            return None
+
+    def put(self, key: str, entry: Dict):
+        tmp_path = self._file(key) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(entry, fh, default=_json_default)
+        os.replace(tmp_path, self._file(key))
+
+    def cached(self, db: Session, name: str, fn: Callable, params: Dict, refresh: bool = False):
+        """
+        Return the stored result of fn(db, **params), computing it on a miss
+        Args:
+            db: Database session passed to fn
+            name: Result name (part of the key and file name)
+            fn: Evaluation function
+            params: JSON-serializable keyword arguments for fn
+            refresh: Recompute and overwrite even if cached
+        Returns:
+            The result as it round-trips through JSON (same shape on hit and miss)
+        """
+        fingerprint = dataset_fingerprint(db, self.models)
+        key = self.key(name, params, fingerprint)
+
+        if not refresh:
+            entry = self.get(key)
+            if entry is not None:
+                self.stats['hits'] += 1
+                logger.info(f"Using cached {name} result from {entry.get('created_at')}")
+                return entry['result']
+
+        self.stats['misses'] += 1
+        result = fn(db, **params)
+        entry = json.loads(json.dumps({
+            'name': name,
+            'params': params,
+            'fingerprint': fingerprint,
+            'created_at': datetime.utcnow().isoformat(),
+            'result': result,
+        }, default=_json_default))
+        if result is not None:
+            try:
+                self.put(key, entry)
+            except OSError as e:
+                logger.error(f"Error writing cache entry {key}: {str(e)}")
+        return entry['result']
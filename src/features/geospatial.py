@@ -2,9 +2,14 @@
 
 Provides haversine distance, patient-to-hospital distance pipeline,
 multi-radius counts, and a simple kernel-density approximation for hospitals.
+
+All neighbour features derive from one pass over pairwise distances
+(`neighbor_features`): each block of hospitals gets its distances to every
+other hospital computed and sorted once, and every requested radius count
+and kernel bandwidth is read off those sorted rows.
 """
-from math import radians, cos, sin, asin, sqrt, exp
-from typing import List, Dict
+from math import radians, cos, sin, asin, sqrt
+from typing import List, Dict, Sequence
 import numpy as np
 from src.models import Hospital
 
@@ -22,30 +27,69 @@ def compute_patient_distance(patient_lat: float, patient_lon: float, hospital: H
     return haversine_km(patient_lon, patient_lat, hospital.longitude, hospital.latitude)
 
 
+def neighbor_features(hospitals: List[Hospital], radii_km: List[float] = None, bandwidths_km: List[float] = None,
+                      block_size: int = 512) -> Dict[str, np.ndarray]:
+    """
+    neighbor_features_from_arrays over objects with id, latitude and longitude.
+    """
+    return neighbor_features_from_arrays(
+        [h.id for h in hospitals], [h.latitude for h in hospitals], [h.longitude for h in hospitals],
+        radii_km, bandwidths_km, block_size
+    )
+
+
+def neighbor_features_from_arrays(ids: Sequence[int], latitudes: Sequence[float], longitudes: Sequence[float],
+                                  radii_km: List[float] = None, bandwidths_km: List[float] = None,
+                                  block_size: int = 512) -> Dict[str, np.ndarray]:
+    """
+    Neighbour counts for every radius and Gaussian kernel densities for
+    every bandwidth from a single pairwise-distance pass.
+
+    Distances are computed for `block_size` hospitals at a time (bounded
+    memory) and sorted once per hospital; counts are read off the sorted
+    rows by binary search and each density sums the kernel over the same
+    rows. A hospital is never its own neighbour.
+
+    Returns dict with 'hospital_id' (n,), 'counts' (n, len(radii_km)) and
+    'densities' (n, len(bandwidths_km)), columns in argument order.
+    """
+    radii = np.asarray(radii_km or [], dtype=np.float64)
+    bandwidths = np.asarray(bandwidths_km or [], dtype=np.float64)
+
+    ids = np.asarray(ids, dtype=np.int64)
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    n = ids.shape[0]
+    cos_lat = np.cos(lat)
+
+    counts = np.zeros((n, radii.shape[0]), dtype=np.int32)
+    densities = np.zeros((n, bandwidths.shape[0]), dtype=np.float64)
+
+    for start in range(0, n, block_size):
+        rows = np.arange(start, min(start + block_size, n))
+        a = (np.sin((lat[None, :] - lat[rows, None]) / 2) ** 2
+             + cos_lat[rows, None] * cos_lat[None, :] * np.sin((lon[None, :] - lon[rows, None]) / 2) ** 2)
+        dist = 6371 * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        dist[rows - start, rows] = np.inf  # exclude self
+        dist.sort(axis=1)
+
+        for i, row in enumerate(dist):
+            counts[start + i] = np.searchsorted(row, radii, side='right')
+        others = dist[:, :max(n - 1, 0)]  # self sorted last
+        for j, bw in enumerate(bandwidths):
+            densities[rows, j] = np.exp(-0.5 * (others / (bw + 1e-9)) ** 2).sum(axis=1)
+
+    return {'hospital_id': ids, 'counts': counts, 'densities': densities}
+
+
 def multi_radius_counts(hospitals: List[Hospital], radii_km: List[float]) -> Dict[int, List[int]]:
     """
     For each hospital, compute counts of other hospitals within each radius.
 
     Returns dict: hospital_id -> [count_within_radius_1, count_within_radius_2, ...]
     """
-    coords = {h.id: (h.latitude, h.longitude) for h in hospitals}
-    ids = list(coords.keys())
-    result = {}
-    for hid in ids:
-        lat1, lon1 = coords[hid]
-        counts = []
-        for r in radii_km:
-            cnt = 0
-            for oid in ids:
-                if oid == hid:
-                    continue
-                lat2, lon2 = coords[oid]
-                d = haversine_km(lon1, lat1, lon2, lat2)
-                if d <= r:
-                    cnt += 1
-            counts.append(cnt)
-        result[hid] = counts
-    return result
+    features = neighbor_features(hospitals, radii_km=radii_km)
+    return {int(hid): [int(c) for c in row] for hid, row in zip(features['hospital_id'], features['counts'])}
 
 
 def kernel_density_feature(hospitals: List[Hospital], bandwidth_km: float = 5.0) -> Dict[int, float]:
@@ -53,18 +97,5 @@ def kernel_density_feature(hospitals: List[Hospital], bandwidth_km: float = 5.0)
     Approximate kernel density for each hospital using Gaussian kernel over pairwise distances.
     Returns hospital_id -> density value (not normalized).
     """
-    coords = {h.id: (h.latitude, h.longitude) for h in hospitals}
-    ids = list(coords.keys())
-    density = {}
-    for hid in ids:
-        lat1, lon1 = coords[hid]
-        s = 0.0
-        for oid in ids:
-            if oid == hid:
-                continue
-            lat2, lon2 = coords[oid]
-            d = haversine_km(lon1, lat1, lon2, lat2)
-            # Gaussian kernel
-            s += exp(-0.5 * (d / (bandwidth_km + 1e-9))**2)
-        density[hid] = s
-    return density
+    features = neighbor_features(hospitals, bandwidths_km=[bandwidth_km])
+    return {int(hid): float(d) for hid, d in zip(features['hospital_id'], features['densities'][:, 0])}
@@ -0,0 +1,248 @@
+"""Materialized wait-time feature store.
+
+Encoded wait-time features (severity, hour, day of week) are computed once
+and appended incrementally as new `wait_time_history` rows arrive, using
+the history id as watermark. Per-hospital geofeatures (multi-radius
+counts, kernel density) are recomputed only when the hospital set
+changes. Training and evaluation read typed column arrays instead of
+looping over ORM objects.
+
+The id watermark only sees inserts: wait_time_history rows updated in
+place or deleted afterwards (including months archived by src.retention)
+keep their materialized features. Delete the store directory to rebuild
+it after such edits.
+
+On-disk layout (one directory per store):
+    meta.json                   watermark, hospital fingerprint, settings
+    rows-<first>-<last>.npz     append-only segments of row features
+    geo.npz                     per-hospital geofeatures
+"""
+from typing import Dict, List, Optional
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models import WaitTimeHistory, Hospital, severity_code
+from src.features.geospatial import neighbor_features
+
+
+ROW_DTYPES = {
+    'id': np.int64,
+    'hospital_id': np.int32,
+    'severity': np.int8,
+    'hour': np.int8,
+    'day_of_week': np.int8,
+    'timestamp': np.int64,  # epoch seconds, for time-ordered splits
+    'wait_time': np.int32,
+}
+
+BASE_FEATURES = ['hospital_id', 'severity', 'hour', 'day_of_week']
+
+# store shared by the training and evaluation entry points on the configured database
+DEFAULT_STORE_PATH = '.cache/features'
+
+
+def radius_column(radius_km: float) -> str:
+    """Neighbour-count column of a radius, e.g. count_within_5km, count_within_2_5km"""
+    return f'count_within_{radius_km:g}km'.replace('.', '_')
+
+
+class WaitTimeFeatureStore:
+    """
+    Append-only store of wait-time features shared by training and evaluation
+    """
+
+    def __init__(self, path: str, radii_km: List[float] = None, bandwidth_km: float = 5.0):
+        """
+        Args:
+            path: Store directory (created if missing)
+            radii_km: Radii for neighbour-count geofeatures
+            bandwidth_km: Kernel density bandwidth
+        """
+        self.path = path
+        self.radii_km = list(radii_km or [1.0, 5.0, 10.0])
+        self.bandwidth_km = bandwidth_km
+        os.makedirs(path, exist_ok=True)
+        self.meta = self._read_meta()
+        self._rows = None
+        self._geo = None
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, 'meta.json')
+
+    def _read_meta(self) -> Dict:
+        try:
+            with open(self._meta_path(), encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {'watermark': 0, 'hospital_fingerprint': None, 'geo_settings': None}
+
+    def _write_meta(self):
+        tmp_path = self._meta_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(self.meta, fh)
+        os.replace(tmp_path, self._meta_path())
+
+    @property
+    def watermark(self) -> int:
+        """Highest wait_time_history.id already materialized"""
+        return int(self.meta.get('watermark', 0))
+
+    def refresh(self, db: Session) -> int:
+        """
+        Append features for history rows newer than the watermark and
+        recompute geofeatures if hospitals changed.
+
+        Returns number of appended rows.
+        """
+        appended = self._append_rows(db)
+        self._refresh_geo(db)
+        return appended
+
+    def _segment_watermark(self) -> int:
+        # guards against a segment written before meta.json was updated
+        last_ids = [int(os.path.basename(p)[:-4].split('-')[2])
+                    for p in glob.glob(os.path.join(self.path, 'rows-*.npz'))]
+        return max([self.watermark] + last_ids)
+
+    def _append_rows(self, db: Session) -> int:
+        self.meta['watermark'] = self._segment_watermark()
+        rows = db.query(
+            WaitTimeHistory.id,
+            WaitTimeHistory.hospital_id,
+            WaitTimeHistory.severity_level,
+            WaitTimeHistory.timestamp,
+            WaitTimeHistory.wait_time_minutes
+        ).filter(WaitTimeHistory.id > self.watermark).order_by(WaitTimeHistory.id).all()
+
+        if not rows:
+            return 0
+
+        ids, hospital_ids, severities, timestamps, wait_times = zip(*rows)
+        ts = pd.to_datetime(pd.Series(timestamps))
+
+        segment = {
+            'id': np.asarray(ids, dtype=ROW_DTYPES['id']),
+            'hospital_id': np.asarray(hospital_ids, dtype=ROW_DTYPES['hospital_id']),
+            'severity': np.fromiter((severity_code(s) for s in severities), dtype=ROW_DTYPES['severity'], count=len(ids)),
+            'hour': ts.dt.hour.fillna(0).to_numpy(dtype=ROW_DTYPES['hour']),
+            'day_of_week': ts.dt.weekday.fillna(0).to_numpy(dtype=ROW_DTYPES['day_of_week']),
+            'timestamp': ((ts - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).fillna(0).to_numpy(dtype=ROW_DTYPES['timestamp']),
+            'wait_time': np.asarray(wait_times, dtype=ROW_DTYPES['wait_time']),
+        }
+
+        first, last = int(segment['id'][0]), int(segment['id'][-1])
+        seg_path = os.path.join(self.path, f'rows-{first:012d}-{last:012d}.npz')
+        np.savez(seg_path, **segment)
+
+        self.meta['watermark'] = last
+        self._write_meta()
+        self._rows = None
+        return len(ids)
+
+    def _hospital_fingerprint(self, db: Session) -> List:
+        count, max_id, lat_sum, lon_sum = db.query(
+            func.count(Hospital.id), func.max(Hospital.id),
+            func.sum(Hospital.latitude), func.sum(Hospital.longitude)
+        ).one()
+        return [int(count or 0), int(max_id or 0), round(float(lat_sum or 0.0), 6), round(float(lon_sum or 0.0), 6)]
+
+    def _refresh_geo(self, db: Session):
+        fingerprint = self._hospital_fingerprint(db)
+        settings = {'radii_km': self.radii_km, 'bandwidth_km': self.bandwidth_km}
+        geo_path = os.path.join(self.path, 'geo.npz')
+        if (self.meta.get('hospital_fingerprint') == fingerprint
+                and self.meta.get('geo_settings') == settings
+                and os.path.exists(geo_path)):
+            return
+
+        hospitals = db.query(Hospital).all()
+        features = neighbor_features(hospitals, self.radii_km, [self.bandwidth_km])
+
+        geo = {'hospital_id': features['hospital_id'].astype(np.int32)}
+        for i, r in enumerate(self.radii_km):
+            geo[radius_column(r)] = features['counts'][:, i]
+        geo['kernel_density'] = features['densities'][:, 0].astype(np.float32)
+        np.savez(geo_path, **geo)
+
+        self.meta['hospital_fingerprint'] = fingerprint
+        self.meta['geo_settings'] = settings
+        self._write_meta()
+        self._geo = None
+
+    def _segments(self) -> List[str]:
+        """
+        Row segment paths in id order, skipping segments whose id range
+        another segment covers (left behind if compact() was interrupted)
+        """
+        ranges = {}
+        for seg_path in glob.glob(os.path.join(self.path, 'rows-*.npz')):
+            _, first, last = os.path.basename(seg_path)[:-4].split('-')
+            ranges[seg_path] = (int(first), int(last))
+        return sorted(
+            p for p, (first, last) in ranges.items()
+            if not any(q != p and q_first <= first and last <= q_last
+                       for q, (q_first, q_last) in ranges.items())
+        )
+
+    def rows(self) -> Dict[str, np.ndarray]:
+        """All row features as typed column arrays, ordered by history id"""
+        if self._rows is None:
+            segments = self._segments()
+            columns = {name: [] for name in ROW_DTYPES}
+            for seg_path in segments:
+                with np.load(seg_path) as seg:
+                    for name in ROW_DTYPES:
+                        columns[name].append(seg[name])
+            self._rows = {
+                name: (np.concatenate(parts) if parts else np.empty(0, dtype=ROW_DTYPES[name]))
+                for name, parts in columns.items()
+            }
+        return self._rows
+
+    def geofeatures(self) -> Dict[str, np.ndarray]:
+        """Per-hospital geofeature columns (keyed by 'hospital_id')"""
+        if self._geo is None:
+            geo_path = os.path.join(self.path, 'geo.npz')
+            if not os.path.exists(geo_path):
+                return {'hospital_id': np.empty(0, dtype=np.int32)}
+            with np.load(geo_path) as geo:
+                self._geo = {name: geo[name] for name in geo.files}
+        return self._geo
+
+    def frame(self, geo: bool = False) -> pd.DataFrame:
+        """
+        Row features as a DataFrame.
+
+        With geo=True geofeature columns are merged on hospital_id and
+        rows whose hospital no longer exists are dropped.
+        """
+        df = pd.DataFrame(self.rows())
+        if geo:
+            df = df.merge(pd.DataFrame(self.geofeatures()), on='hospital_id', how='inner', sort=False)
+            df = df.sort_values('id', kind='stable').reset_index(drop=True)
+        return df
+
+    def matrix(self, columns: Optional[List[str]] = None, geo: bool = False) -> np.ndarray:
+        """Feature columns as a 2D array (default: base wait-time features)"""
+        columns = columns or BASE_FEATURES
+        return self.frame(geo=geo)[columns].to_numpy()
+
+    def compact(self):
+        """Merge all row segments into a single segment"""
+        rows = self.rows()
+        segments = glob.glob(os.path.join(self.path, 'rows-*.npz'))
+        if len(segments) <= 1:
+            return
+        first, last = int(rows['id'][0]), int(rows['id'][-1])
+        merged_path = os.path.join(self.path, f'rows-{first:012d}-{last:012d}.npz')
+        tmp_path = os.path.join(self.path, 'compact.tmp.npz')
+        np.savez(tmp_path, **rows)
+        # merged segment first: until the old ones are gone, rows() skips them as covered
+        os.replace(tmp_path, merged_path)
+        for seg_path in segments:
+            if seg_path != merged_path:
+                os.remove(seg_path)
@@ -0,0 +1,243 @@
+"""
+Short-horizon bed-occupancy forecasting over capacity_history.
+
+Capacity snapshots are pivoted into a hospitals x hours occupancy matrix
+and every hospital is forecast at once with NumPy: simple exponential
+smoothing, seasonal-naive (daily season), or 'auto', which backtests both
+on the most recent horizon and picks the better one per hospital.
+Forecasts are cached on the forecaster so recommendation scoring and the
+dashboard can read them without recomputing.
+"""
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models import CapacityHistory, CapacityRollup
+from src.rollups import resolve_source, CAPACITY_SOURCE
+from src.change_feed import capacity_feed
+
+FORECAST_METHODS = ('ses', 'seasonal_naive', 'auto')
+
+
+def _ffill(matrix: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along the time axis; leading NaNs take the first observed value."""
+    mask = np.isnan(matrix)
+    idx = np.where(~mask, np.arange(matrix.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = matrix[np.arange(matrix.shape[0])[:, None], idx]
+
+    # leading gaps: back-fill from the first observation of each row
+    first_valid = np.argmax(~mask, axis=1)
+    first_value = matrix[np.arange(matrix.shape[0]), first_valid]
+    leading = np.isnan(filled)
+    filled[leading] = np.broadcast_to(first_value[:, None], filled.shape)[leading]
+    return filled
+
+
+def ses_forecast(matrix: np.ndarray, horizon: int, alpha: float = 0.3) -> np.ndarray:
+    """Simple exponential smoothing for every row; flat forecast of the final level."""
+    level = matrix[:, 0].copy()
+    for t in range(1, matrix.shape[1]):
+        level = alpha * matrix[:, t] + (1 - alpha) * level
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def seasonal_naive_forecast(matrix: np.ndarray, horizon: int, season: int = 24) -> np.ndarray:
+    """Repeat the last observed season for every row."""
+    n_times = matrix.shape[1]
+    if n_times < season:
+        return np.repeat(matrix[:, -1:], horizon, axis=1)
+    cols = n_times - season + (np.arange(horizon) % season)
+    return matrix[:, cols]
+
+
+class CapacityForecaster:
+    """
+    Vectorized next-hours occupancy forecaster for all hospitals
+    """
+
+    def __init__(self, horizon: int = 24, season: int = 24, history_hours: int = 168,
+                 alpha: float = 0.3, method: str = 'auto', source: str = 'auto', change_feed=None):
+        """
+        Args:
+            horizon: Hours to forecast ahead
+            season: Season length in hours (daily cycle)
+            history_hours: Hours of capacity_history used for fitting
+            alpha: Smoothing factor for exponential smoothing
+            method: One of FORECAST_METHODS
+            source: 'rollup' (hourly capacity_rollup), 'raw' (capacity_history)
+                or 'auto' (rollups when they are current)
+            change_feed: CapacityChangeFeed whose changes invalidate the cached
+                forecasts (default: process-wide feed)
+        """
+        if method not in FORECAST_METHODS:
+            raise ValueError(f"Unknown forecast method: {method}. Expected one of {FORECAST_METHODS}")
+        self.horizon = horizon
+        self.season = season
+        self.history_hours = history_hours
+        self.alpha = alpha
+        self.method = method
+        self.source = source
+        self.change_feed = change_feed or capacity_feed
+
+        # cached results
+        self.hospital_ids = np.empty(0, dtype=np.int64)
+        self.forecasts = np.empty((0, horizon), dtype=np.float32)
+        self.methods = np.empty(0, dtype='<U14')
+        self.forecast_start = None
+        self.fitted_at = None
+        self.fitted_sequence = None
+        self._index: Dict[int, int] = {}
+
+    def load_matrix(self, db: Session, end: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray, Optional[datetime]]:
+        """
+        Build the hospitals x hours occupancy-rate matrix
+        Args:
+            db: Database session
+            end: Last hour of history (default: latest snapshot or rollup bucket)
+        Returns:
+            (hospital_ids, matrix with NaN for hours without snapshots, end hour)
+        """
+        use_rollup = resolve_source(db, self.source, CAPACITY_SOURCE) == 'rollup'
+        if end is None:
+            if use_rollup:
+                end = db.query(func.max(CapacityRollup.bucket_start)).filter(
+                    CapacityRollup.granularity == 'hour'
+                ).scalar()
+            else:
+                end = db.query(func.max(CapacityHistory.timestamp)).scalar()
+            if end is None:
+                return np.empty(0, dtype=np.int64), np.empty((0, self.history_hours)), None
+
+        end_hour = np.datetime64(end, 'h')
+        start_hour = end_hour - np.timedelta64(self.history_hours - 1, 'h')
+
+        if use_rollup:
+            # one row per hourly bucket: its mean rate as a unit-sized snapshot
+            rows = db.query(
+                CapacityRollup.hospital_id,
+                CapacityRollup.bucket_start,
+                1.0 - CapacityRollup.mean_occupancy,
+                CapacityRollup.mean_occupancy
+            ).filter(
+                CapacityRollup.granularity == 'hour',
+                CapacityRollup.bucket_start >= start_hour.astype(datetime),
+                CapacityRollup.bucket_start < (end_hour + np.timedelta64(1, 'h')).astype(datetime)
+            ).all()
+        else:
+            rows = db.query(
+                CapacityHistory.hospital_id,
+                CapacityHistory.timestamp,
+                CapacityHistory.available_beds,
+                CapacityHistory.occupied_beds
+            ).filter(
+                CapacityHistory.timestamp >= start_hour.astype(datetime),
+                CapacityHistory.timestamp < (end_hour + np.timedelta64(1, 'h')).astype(datetime)
+            ).all()
+
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, self.history_hours)), end_hour.astype(datetime)
+
+        n = len(rows)
+        hospital = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+        hours = np.array([r[1] for r in rows], dtype='datetime64[h]')
+        available = np.fromiter((r[2] for r in rows), dtype=np.float64, count=n)
+        occupied = np.fromiter((r[3] for r in rows), dtype=np.float64, count=n)
+
+        total = available + occupied
+        valid = total > 0
+        hospital, hours, occupied, total = hospital[valid], hours[valid], occupied[valid], total[valid]
+
+        hospital_ids, row = np.unique(hospital, return_inverse=True)
+        col = (hours - start_hour).astype(np.int64)
+
+        # mean occupancy per (hospital, hour) cell
+        sums = np.zeros((hospital_ids.shape[0], self.history_hours))
+        counts = np.zeros_like(sums)
+        np.add.at(sums, (row, col), occupied / total)
+        np.add.at(counts, (row, col), 1)
+        matrix = np.divide(sums, counts, out=np.full_like(sums, np.nan), where=counts > 0)
+        return hospital_ids, matrix, end_hour.astype(datetime)
+
+    def _forecast(self, matrix: np.ndarray, method: str) -> np.ndarray:
+        if method == 'ses':
+            return ses_forecast(matrix, self.horizon, self.alpha)
+        return seasonal_naive_forecast(matrix, self.horizon, self.season)
+
+    def fit(self, db: Session, end: Optional[datetime] = None) -> 'CapacityForecaster':
+        """
+        Fit all hospitals and cache next-horizon occupancy forecasts
+        Args:
+            db: Database session
+            end: Last hour of history (default: latest snapshot)
+        Returns:
+            self
+        """
+        sequence = self.change_feed.sequence
+        hospital_ids, matrix, end_hour = self.load_matrix(db, end)
+        self.fitted_at = time.time()
+        self.fitted_sequence = sequence
+        self.forecast_start = end_hour + timedelta(hours=1) if end_hour is not None else None
+
+        if hospital_ids.shape[0] == 0:
+            self.hospital_ids = hospital_ids
+            self.forecasts = np.empty((0, self.horizon), dtype=np.float32)
+            self.methods = np.empty(0, dtype='<U14')
+            self._index = {}
+            return self
+
+        filled = _ffill(matrix)
+
+        if self.method == 'auto' and filled.shape[1] > self.horizon + self.season:
+            # backtest on the last horizon, choose per hospital
+            train, actual = filled[:, :-self.horizon], filled[:, -self.horizon:]
+            ses_err = np.abs(self._forecast(train, 'ses') - actual).mean(axis=1)
+            sn_err = np.abs(self._forecast(train, 'seasonal_naive') - actual).mean(axis=1)
+            use_sn = sn_err < ses_err
+            forecasts = np.where(use_sn[:, None], self._forecast(filled, 'seasonal_naive'), self._forecast(filled, 'ses'))
+            methods = np.where(use_sn, 'seasonal_naive', 'ses')
+        else:
+            method = 'ses' if self.method == 'auto' else self.method
+            forecasts = self._forecast(filled, method)
+            methods = np.full(hospital_ids.shape[0], method)
+
+        self.hospital_ids = hospital_ids
+        self.forecasts = np.clip(forecasts, 0.0, 1.0).astype(np.float32)
+        self.methods = methods
+        self._index = {int(h): i for i, h in enumerate(hospital_ids)}
+        return self
+
+    def refresh_if_stale(self, db: Session, max_age_seconds: float = 900) -> 'CapacityForecaster':
+        """
+        Refit if capacity changes were published since the last fit, or the
+        cached forecasts are older than max_age_seconds (history written by
+        other processes is not seen by the in-process feed)
+        Publishers do not refresh the rollups; with source='auto' the refit
+        reads capacity_history while it has rows newer than the rollup
+        watermark, so it sees them (source='rollup' does not).
+        """
+        if (self.fitted_at is None
+                or self.fitted_sequence != self.change_feed.sequence
+                or time.time() - self.fitted_at > max_age_seconds):
+            self.fit(db)
+        return self
+
+    def forecast_for(self, hospital_id: int) -> Optional[np.ndarray]:
+        """
+        Cached occupancy-rate forecast (0.0 to 1.0) for the next horizon hours
+        Returns:
+            Array of length horizon, or None if the hospital has no recent history
+        """
+        i = self._index.get(int(hospital_id))
+        if i is None:
+            return None
+        return self.forecasts[i]
+
+    def peak_occupancy(self, hospital_id: int) -> Optional[float]:
+        """Highest forecast occupancy rate over the horizon"""
+        forecast = self.forecast_for(hospital_id)
+        if forecast is None:
+            return None
+        return float(forecast.max())
@@ -0,0 +1,201 @@
+"""
+Import manifest for incremental CSV loads.
+
+Each imported source file (CSV or ZIP) gets one import_manifest row with its
+size, mtime, sha256 content hash, the sorted 64-bit hashes of its rows and
+the outcome of the load. On the next run:
+
+- size and mtime unchanged since a successful import: skipped without
+  reading the file
+- content hash unchanged (e.g. re-downloaded): skipped, stat refreshed
+- content unchanged since an interrupted ('running') or failed import:
+  resumed from the checkpoint (source index and raw row offset) that the
+  loader updates in the same transaction as every committed batch
+- content changed: diffed; rows whose hash was already imported are
+  dropped before parsing and only new or edited rows are processed,
+  edited ones updating the hospitals they match
+- new file or different load options: full load
+
+Rows that disappeared from a file are counted ('removed') but not deleted
+from the database, matching the loaders, which never delete hospitals.
+row_hashes always describe the last successful import, so a resumed or
+failed run still diffs against it.
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from src.models import ImportManifest
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_BYTES = 1024 * 1024
+
+OUTCOME_FIELDS = ('row_count', 'inserted', 'updated', 'skipped')
+
+
+def file_hash(path: str) -> str:
+    """sha256 hex digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    64-bit hash per row of a raw CSV frame
+    Values are hashed as text so the same row hashes the same whether a
+    column was inferred as int, float or object in a given chunk.
+    """
+    return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy(dtype=np.uint64)
+
+
+def unseen_mask(hashes: np.ndarray, previous: Optional[np.ndarray]) -> np.ndarray:
+    """Mask of rows whose hash is not among the previous import's (all True without one)"""
+    if previous is None:
+        return np.ones(hashes.shape[0], dtype=bool)
+    return ~np.isin(hashes, previous)
+
+
+class ImportTracker:
+    """
+    Decides per source file whether to skip, diff or fully load it, and
+    records the outcome in import_manifest
+    """
+
+    def __init__(self, db: Session, force: bool = False, verify_hash: bool = False):
+        """
+        Args:
+            db: Database session holding import_manifest
+            force: Load every file in full (outcomes are still recorded)
+            verify_hash: Hash files even when size and mtime are unchanged
+        """
+        self.db = db
+        self.force = force
+        self.verify_hash = verify_hash
+
+    def plan(self, path: str, kind: str, params: Optional[Dict] = None) -> Dict:
+        """
+        Decide how to import a file
+        Args:
+            path: Source file path
+            kind: Loader kind ('faskes' or 'bed_ratio')
+            params: Load options that change the outcome (part of the match)
+        Returns:
+            Dictionary with 'action' ('skip', 'resume', 'diff' or 'full'),
+            'previous' (sorted row hashes of the last successful import, or
+            None), 'start' ((source index, raw row) to resume from) and the
+            file signature used by begin() and record()
+        """
+        key = os.path.abspath(path)
+        st = os.stat(path)
+        plan = {
+            'path': key, 'kind': kind, 'params': json.dumps(params or {}, sort_keys=True),
+            'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'content_hash': None,
+            'action': 'full', 'previous': None, 'start': (0, 0),
+        }
+        entry = self.db.query(ImportManifest).filter(ImportManifest.path == key).first()
+        comparable = (
+            not self.force and entry is not None
+            and entry.kind == kind and entry.params == plan['params']
+        )
+        if comparable and entry.status == 'success' and not self.verify_hash and \
+                (entry.size, entry.mtime_ns) == (plan['size'], plan['mtime_ns']):
+            plan['action'] = 'skip'
+            plan['content_hash'] = entry.content_hash
+            return plan
+
+        plan['content_hash'] = file_hash(path)
+        if not comparable:
+            return plan
+        if entry.row_hashes:
+            plan['previous'] = np.frombuffer(entry.row_hashes, dtype=np.uint64)
+        if entry.content_hash != plan['content_hash']:
+            plan['action'] = 'diff' if plan['previous'] is not None else 'full'
+        elif entry.status == 'success':
+            # same bytes with a new mtime: remember the stat for the fast path
+            entry.size, entry.mtime_ns = plan['size'], plan['mtime_ns']
+            self.db.commit()
+            plan['action'] = 'skip'
+        else:
+            plan['action'] = 'resume'
+            plan['start'] = (entry.checkpoint_source or 0, entry.checkpoint_row or 0)
+        return plan
+
+    def begin(self, plan: Dict):
+        """Mark a planned (not skipped) import as running from plan['start'] and commit"""
+        entry = self.db.query(ImportManifest).filter(ImportManifest.path == plan['path']).first()
+        if entry is None:
+            entry = ImportManifest(path=plan['path'])
+            self.db.add(entry)
+        entry.kind = plan['kind']
+        entry.params = plan['params']
+        entry.size = plan['size']
+        entry.mtime_ns = plan['mtime_ns']
+        entry.content_hash = plan['content_hash']
+        entry.status = 'running'
+        entry.checkpoint_source, entry.checkpoint_row = plan['start']
+        entry.error = None
+        self.db.commit()
+
+    def checkpoint_statement(self, plan: Dict, source: int, row: int):
+        """
+        UPDATE recording that raw rows before `row` of source `source` are
+        committed; execute it in the transaction that commits them
+        """
+        return (
+            update(ImportManifest)
+            .where(ImportManifest.path == plan['path'])
+            .values(checkpoint_source=source, checkpoint_row=row)
+        )
+
+    def record(self, plan: Dict, hashes: Iterable[np.ndarray], outcome: Dict,
+               error: Optional[str] = None):
+        """
+        Store the outcome of an import
+        Args:
+            plan: Result of plan() for the file
+            hashes: Row hash arrays of every row read (see row_hashes)
+            outcome: Counts ('row_count', 'inserted', 'updated', 'skipped')
+            error: Error message; a failed import resumes from its checkpoint
+                next time if the file is unchanged
+        """
+        hashes = list(hashes)
+        current = np.unique(np.concatenate(hashes)) if hashes else np.empty(0, dtype=np.uint64)
+        removed = 0
+        if plan['previous'] is not None:
+            removed = int(np.setdiff1d(plan['previous'], current, assume_unique=True).shape[0])
+
+        try:
+            entry = self.db.query(ImportManifest).filter(ImportManifest.path == plan['path']).first()
+            if entry is None:
+                entry = ImportManifest(path=plan['path'])
+                self.db.add(entry)
+            entry.kind = plan['kind']
+            entry.params = plan['params']
+            entry.size = plan['size']
+            entry.mtime_ns = plan['mtime_ns']
+            entry.content_hash = plan['content_hash']
+            entry.status = 'failed' if error else 'success'
+            if not error:
+                entry.row_hashes = current.tobytes()
+            for field in OUTCOME_FIELDS:
+                setattr(entry, field, int(outcome.get(field, 0)))
+            entry.removed = removed
+            entry.error = error
+            entry.imported_at = datetime.utcnow()
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Error recording import manifest for {plan['path']}: {str(e)}")
+            self.db.rollback()
+            return
+        if removed:
+            logger.info(f"{removed} rows of the previous import are no longer in {plan['path']}")
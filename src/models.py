@@ -1,7 +1,10 @@
 """
 Database models for SmartRujuk+ system
 """
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, Enum, ForeignKey
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Text, Float, Boolean, DateTime, Enum, ForeignKey, Index,
+    LargeBinary, UniqueConstraint
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -17,6 +20,15 @@ class SeverityEnum(enum.Enum):
     high = "high"
     critical = "critical"
 
+# Severity as a model feature; unknown or missing severities encode as medium
+SEVERITY_CODES = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+def severity_code(severity) -> int:
+    """SEVERITY_CODES value of a SeverityEnum member, its name or None"""
+    if isinstance(severity, SeverityEnum):
+        severity = severity.value
+    return SEVERITY_CODES.get(severity, SEVERITY_CODES['medium'])
+
 class StatusEnum(enum.Enum):
     pending = "pending"
     accepted = "accepted"
@@ -25,6 +37,10 @@ class StatusEnum(enum.Enum):
 
 class Hospital(Base):
     __tablename__ = 'hospitals'
+    # upsert key of faskes imports (src/data/faskes_loader.py)
+    __table_args__ = (
+        UniqueConstraint('name', 'latitude', 'longitude', name='uq_hospital_name_location'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(255), nullable=False)
@@ -87,6 +103,10 @@ class Referral(Base):
 
 class CapacityHistory(Base):
     __tablename__ = 'capacity_history'
+    __table_args__ = (
+        Index('idx_hospital_time', 'hospital_id', 'timestamp'),
+        Index('idx_capacity_time', 'timestamp'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     hospital_id = Column(Integer, ForeignKey('hospitals.id'), nullable=False)
@@ -96,6 +116,10 @@ class CapacityHistory(Base):
 
 class WaitTimeHistory(Base):
     __tablename__ = 'wait_time_history'
+    __table_args__ = (
+        Index('idx_wait_hospital_time', 'hospital_id', 'timestamp'),
+        Index('idx_wait_time', 'timestamp'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     hospital_id = Column(Integer, ForeignKey('hospitals.id'), nullable=False)
@@ -103,6 +127,93 @@ class WaitTimeHistory(Base):
     wait_time_minutes = Column(Integer, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+class WaitTimeRollup(Base):
+    """Hourly/daily wait time aggregates per hospital and severity"""
+    __tablename__ = 'wait_time_rollup'
+    __table_args__ = (
+        UniqueConstraint('granularity', 'hospital_id', 'severity_level', 'bucket_start', name='uq_wait_rollup_bucket'),
+        Index('idx_wait_rollup_time', 'granularity', 'bucket_start'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(8), nullable=False)  # 'hour' or 'day'
+    bucket_start = Column(DateTime, nullable=False)
+    hospital_id = Column(Integer, ForeignKey('hospitals.id'), nullable=False)
+    severity_level = Column(Enum(SeverityEnum), nullable=False)
+    count = Column(Integer, nullable=False)
+    mean_wait = Column(Float, nullable=False)
+    p90_wait = Column(Float, nullable=False)
+    min_wait = Column(Integer, nullable=False)
+    max_wait = Column(Integer, nullable=False)
+
+class CapacityRollup(Base):
+    """Hourly/daily occupancy aggregates per hospital"""
+    __tablename__ = 'capacity_rollup'
+    __table_args__ = (
+        UniqueConstraint('granularity', 'hospital_id', 'bucket_start', name='uq_capacity_rollup_bucket'),
+        Index('idx_capacity_rollup_time', 'granularity', 'bucket_start'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(8), nullable=False)  # 'hour' or 'day'
+    bucket_start = Column(DateTime, nullable=False)
+    hospital_id = Column(Integer, ForeignKey('hospitals.id'), nullable=False)
+    count = Column(Integer, nullable=False)
+    mean_occupancy = Column(Float, nullable=False)  # occupancy rate, 0.0 to 1.0
+    p90_occupancy = Column(Float, nullable=False)
+    min_occupancy = Column(Float, nullable=False)
+    max_occupancy = Column(Float, nullable=False)
+    mean_available_beds = Column(Float, nullable=False)
+    mean_occupied_beds = Column(Float, nullable=False)
+
+class RollupWatermark(Base):
+    """Highest raw history id folded into the rollups, per source table"""
+    __tablename__ = 'rollup_watermark'
+
+    source = Column(String(64), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class HistoryArchive(Base):
+    """One exported chunk of a retired month of history"""
+    __tablename__ = 'history_archive'
+    __table_args__ = (
+        Index('idx_archive_table_month', 'table_name', 'month'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String(64), nullable=False)
+    month = Column(String(7), nullable=False)  # 'YYYY-MM'
+    first_id = Column(Integer, nullable=False)
+    last_id = Column(Integer, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    path = Column(String(500), nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class ImportManifest(Base):
+    """Last import of a source file, used to skip, diff or resume it"""
+    __tablename__ = 'import_manifest'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    path = Column(String(500), nullable=False, unique=True)
+    kind = Column(String(32), nullable=False)  # 'faskes' or 'bed_ratio'
+    params = Column(Text)  # JSON of load options that change the outcome (e.g. province)
+    size = Column(BigInteger, nullable=False)
+    mtime_ns = Column(BigInteger, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # sha256 hex
+    row_hashes = Column(LargeBinary(length=2 ** 32 - 1))  # sorted unique uint64 hashes of the last success
+    status = Column(String(16), nullable=False)  # 'running', 'success' or 'failed'
+    # raw rows committed: CSV (ZIP member) index and data row offset within it
+    checkpoint_source = Column(Integer, default=0)
+    checkpoint_row = Column(BigInteger, default=0)
+    row_count = Column(Integer, default=0)
+    inserted = Column(Integer, default=0)
+    updated = Column(Integer, default=0)
+    skipped = Column(Integer, default=0)
+    removed = Column(Integer, default=0)
+    error = Column(Text)
+    imported_at = Column(DateTime, default=datetime.utcnow)
+
 class APIConfig(Base):
     __tablename__ = 'api_config'
     
@@ -3,20 +3,112 @@ Predictive modeling module for wait time estimation
 """
 import numpy as np
 from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
+from sqlalchemy import func, and_, case
 from sqlalchemy.orm import Session
-from src.models import WaitTimeHistory, CapacityHistory, Hospital
+from src.models import WaitTimeHistory, CapacityHistory, Hospital, WaitTimeRollup, CapacityRollup, severity_code
+from src.rollups import resolve_source, WAIT_TIME_SOURCE, CAPACITY_SOURCE
+
+# Selectable model families for wait time prediction.
+# 'forest' is the original unbounded forest; the compact families trade a
+# little accuracy for much smaller models and faster single-row predictions.
+MODEL_FAMILIES = ('forest', 'compact_forest', 'hist_gbm')
+DEFAULT_MODEL_FAMILY = 'forest'
+
+
+def build_model(model_family: str = DEFAULT_MODEL_FAMILY, random_state: int = 42):
+    """
+    Build an unfitted regressor for a model family
+    Args:
+        model_family: One of MODEL_FAMILIES
+        random_state: Seed for reproducible training
+    Returns:
+        scikit-learn regressor
+    """
+    if model_family == 'forest':
+        return RandomForestRegressor(n_estimators=100, random_state=random_state)
+    if model_family == 'compact_forest':
+        # Depth-limited, leaf-pruned forest: bounded tree size and memory
+        return RandomForestRegressor(
+            n_estimators=30,
+            max_depth=10,
+            min_samples_leaf=5,
+            ccp_alpha=0.01,
+            random_state=random_state
+        )
+    if model_family == 'hist_gbm':
+        return HistGradientBoostingRegressor(
+            max_iter=200,
+            max_leaf_nodes=31,
+            learning_rate=0.1,
+            random_state=random_state
+        )
+    raise ValueError(f"Unknown model family: {model_family}. Expected one of {MODEL_FAMILIES}")
+
 
 class WaitTimePredictor:
-    def __init__(self):
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+    def __init__(self, model_family: str = DEFAULT_MODEL_FAMILY):
+        self.model_family = model_family
+        self.model = build_model(model_family)
         self.is_trained = False
     
-    def train(self, db: Session):
-        """Train the wait time prediction model"""
+    def train(self, db: Session, feature_store=None, source: str = 'raw'):
+        """
+        Train the wait time prediction model
+        Args:
+            db: Database session
+            feature_store: Optional WaitTimeFeatureStore; when given, features
+                are refreshed incrementally and read from the store
+            source: 'raw' (default) trains on wait_time_history rows.
+                'rollup' (opt-in) trains on hourly wait_time_rollup bucket
+                means weighted by count: far fewer rows, but a different
+                model, since spread within a bucket is lost (leaf values
+                are fitted to bucket means, not individual waits). 'auto'
+                uses rollups when they are current. Ignored with
+                feature_store.
+        """
         try:
+            if feature_store is not None:
+                feature_store.refresh(db)
+                X = feature_store.matrix()
+                y = feature_store.rows()['wait_time']
+                if len(y) < 10:
+                    print("Not enough data to train the model")
+                    return False
+                self.model.fit(X, y)
+                self.is_trained = True
+                print(f"Model ({self.model_family}) trained with {len(y)} samples from feature store")
+                return True
+
+            if resolve_source(db, source, WAIT_TIME_SOURCE) == 'rollup':
+                buckets = db.query(
+                    WaitTimeRollup.hospital_id,
+                    WaitTimeRollup.severity_level,
+                    WaitTimeRollup.bucket_start,
+                    WaitTimeRollup.mean_wait,
+                    WaitTimeRollup.count
+                ).filter(WaitTimeRollup.granularity == 'hour').all()
+
+                if len(buckets) < 10:
+                    print("Not enough data to train the model")
+                    return False
+
+                X = np.array([
+                    [b.hospital_id, severity_code(b.severity_level),
+                     b.bucket_start.hour, b.bucket_start.weekday()]
+                    for b in buckets
+                ])
+                y = np.array([b.mean_wait for b in buckets])
+                weights = np.array([b.count for b in buckets], dtype=np.float64)
+
+                self.model.fit(X, y, sample_weight=weights)
+                self.is_trained = True
+                print(f"Model ({self.model_family}) trained with {len(buckets)} hourly buckets "
+                      f"({int(weights.sum())} samples) from rollups")
+                return True
+
             # Get historical data
             wait_times = db.query(WaitTimeHistory).all()
             
@@ -30,8 +122,7 @@ class WaitTimePredictor:
             
             for wt in wait_times:
                 # Features: hospital_id, severity_level (encoded), hour of day, day of week
-                severity_map = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
-                severity_encoded = severity_map.get(wt.severity_level.value, 2)
+                severity_encoded = severity_code(wt.severity_level)
                 
                 hour = wt.timestamp.hour
                 day_of_week = wt.timestamp.weekday()
@@ -45,7 +136,7 @@ class WaitTimePredictor:
             
             self.model.fit(X, y)
             self.is_trained = True
-            print(f"Model trained with {len(wait_times)} samples")
+            print(f"Model ({self.model_family}) trained with {len(wait_times)} samples")
             return True
             
         except Exception as e:
@@ -72,8 +163,7 @@ class WaitTimePredictor:
             return default_wait_times.get(severity_level, 60)
         
         try:
-            severity_map = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
-            severity_encoded = severity_map.get(severity_level, 2)
+            severity_encoded = severity_code(severity_level)
             
             now = datetime.now()
             hour = now.hour
@@ -95,6 +185,44 @@ class WaitTimePredictor:
             }
             return default_wait_times.get(severity_level, 60)
 
+# Capacity trend codes used by the batch trend API
+TREND_INCREASING = 1
+TREND_STABLE = 0
+TREND_DECREASING = -1
+TREND_LABELS = {TREND_INCREASING: 'increasing', TREND_STABLE: 'stable', TREND_DECREASING: 'decreasing'}
+
+CAPACITY_TREND_DTYPE = np.dtype([
+    ('hospital_id', np.int32),
+    ('n_samples', np.int16),
+    ('first_half_avg', np.float32),
+    ('second_half_avg', np.float32),
+    ('diff', np.float32),
+    ('trend', np.int8),
+])
+
+
+# Sort keys accepted by CapacityAnalyzer.analyze_capacity_bulk
+CAPACITY_SORT_KEYS = ('occupancy_rate', 'available_beds', 'total_beds', 'name', 'id')
+
+
+def _occupancy_rate_expr():
+    """SQL expression: occupancy rate in percent (0 when total_beds is 0)"""
+    return case(
+        (Hospital.total_beds > 0, (Hospital.total_beds - Hospital.available_beds) * 100.0 / Hospital.total_beds),
+        else_=0.0
+    )
+
+
+def _capacity_status_expr(occupancy):
+    """SQL expression: capacity status bucket, same thresholds as analyze_hospital_capacity"""
+    return case(
+        (occupancy < 50, 'low'),
+        (occupancy < 75, 'moderate'),
+        (occupancy < 90, 'high'),
+        else_='critical'
+    )
+
+
 class CapacityAnalyzer:
     def __init__(self):
         pass
@@ -158,6 +286,104 @@ class CapacityAnalyzer:
             print(f"Error predicting capacity trend: {str(e)}")
             return "stable"
     
+    def predict_capacity_trends(self, db: Session, window: int = 24, min_samples: int = 10,
+                                source: str = 'auto') -> np.ndarray:
+        """
+        Capacity trend for every hospital in one windowed query
+        Args:
+            db: Database session
+            window: Number of most recent capacity_history rows (or hourly
+                rollup buckets) per hospital
+            min_samples: Minimum rows/buckets for a non-stable trend
+            source: 'rollup' (hourly capacity_rollup), 'raw' (capacity_history)
+                or 'auto' (rollups when they are current)
+        Returns:
+            Structured array (CAPACITY_TREND_DTYPE), one row per hospital,
+            sorted by hospital_id; 'trend' holds TREND_* codes and, for the
+            raw source, matches predict_capacity_trend for the same window
+        """
+        try:
+            if resolve_source(db, source, CAPACITY_SOURCE) == 'rollup':
+                # one bucket carries its mean occupancy rate as a unit-sized snapshot
+                ranked = db.query(
+                    CapacityRollup.hospital_id.label('hospital_id'),
+                    (1.0 - CapacityRollup.mean_occupancy).label('available_beds'),
+                    CapacityRollup.mean_occupancy.label('occupied_beds'),
+                    func.row_number().over(
+                        partition_by=CapacityRollup.hospital_id,
+                        order_by=CapacityRollup.bucket_start.desc()
+                    ).label('rn')
+                ).filter(CapacityRollup.granularity == 'hour').subquery()
+            else:
+                ranked = db.query(
+                    CapacityHistory.hospital_id.label('hospital_id'),
+                    CapacityHistory.available_beds.label('available_beds'),
+                    CapacityHistory.occupied_beds.label('occupied_beds'),
+                    func.row_number().over(
+                        partition_by=CapacityHistory.hospital_id,
+                        order_by=(CapacityHistory.timestamp.desc(), CapacityHistory.id.desc())
+                    ).label('rn')
+                ).subquery()
+
+            rows = db.query(
+                Hospital.id, ranked.c.rn, ranked.c.available_beds, ranked.c.occupied_beds
+            ).outerjoin(
+                ranked, and_(ranked.c.hospital_id == Hospital.id, ranked.c.rn <= window)
+            ).order_by(Hospital.id, ranked.c.rn).all()
+
+            if not rows:
+                return np.empty(0, dtype=CAPACITY_TREND_DTYPE)
+
+            hospital_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+            has_row = np.fromiter((r[1] is not None for r in rows), dtype=bool, count=len(rows))
+            available = np.fromiter((r[2] or 0 for r in rows), dtype=np.float64, count=len(rows))
+            occupied = np.fromiter((r[3] or 0 for r in rows), dtype=np.float64, count=len(rows))
+
+            ids, group = np.unique(hospital_ids, return_inverse=True)
+            n_groups = ids.shape[0]
+
+            n_hist = np.bincount(group, weights=has_row, minlength=n_groups)
+
+            total = available + occupied
+            valid = has_row & (total > 0)
+            utilization = np.divide(occupied, total, out=np.zeros_like(total), where=valid)
+
+            # 1-based rank among valid rows within each hospital (rows are most recent first)
+            valid_cum = np.cumsum(valid)
+            group_start = np.searchsorted(group, np.arange(n_groups))
+            offset = np.where(group_start > 0, valid_cum[group_start - 1], 0)
+            valid_rank = valid_cum - offset[group]
+
+            n_valid = np.bincount(group, weights=valid, minlength=n_groups)
+            half = n_valid // 2
+            first = valid & (valid_rank <= half[group])
+            second = valid & ~first
+
+            first_sum = np.bincount(group, weights=utilization * first, minlength=n_groups)
+            second_sum = np.bincount(group, weights=utilization * second, minlength=n_groups)
+            first_avg = np.divide(first_sum, half, out=np.zeros(n_groups), where=half > 0)
+            second_count = n_valid - half
+            second_avg = np.divide(second_sum, second_count, out=np.zeros(n_groups), where=second_count > 0)
+            diff = second_avg - first_avg
+
+            enough = (n_hist >= min_samples) & (n_valid >= 2)
+            trend = np.full(n_groups, TREND_STABLE, dtype=np.int8)
+            trend[enough & (diff > 0.05)] = TREND_INCREASING
+            trend[enough & (diff < -0.05)] = TREND_DECREASING
+
+            result = np.empty(n_groups, dtype=CAPACITY_TREND_DTYPE)
+            result['hospital_id'] = ids
+            result['n_samples'] = n_hist
+            result['first_half_avg'] = first_avg
+            result['second_half_avg'] = second_avg
+            result['diff'] = np.where(enough, diff, 0.0)
+            result['trend'] = trend
+            return result
+
+        except Exception as e:
+            print(f"Error predicting capacity trends: {str(e)}")
+            return np.empty(0, dtype=CAPACITY_TREND_DTYPE)
+
     def analyze_hospital_capacity(self, db: Session, hospital_id: int) -> Dict:
         """
         Analyze hospital capacity and trends
@@ -209,6 +435,83 @@ class CapacityAnalyzer:
                 'occupancy_rate': 0
             }
     
+    def analyze_capacity_bulk(self, db: Session, offset: int = 0, limit: int = 50, sort_by: str = 'occupancy_rate',
+                              descending: bool = True, status: Optional[str] = None, emergency_only: bool = False,
+                              available_only: bool = False, name_query: Optional[str] = None) -> Dict:
+        """
+        Capacity analysis for many hospitals in one page query
+        Occupancy rate and status buckets are computed in SQL; sorting,
+        filtering and pagination happen server-side.
+        Args:
+            db: Database session
+            offset: Rows to skip
+            limit: Page size
+            sort_by: One of CAPACITY_SORT_KEYS
+            descending: Sort direction
+            status: Only hospitals in this bucket (low, moderate, high, critical)
+            emergency_only: Only hospitals with emergency available
+            available_only: Only hospitals with available beds
+            name_query: Substring filter on hospital name
+        Returns:
+            Dictionary with 'total' (matching rows) and 'items' (one page of
+            hospital capacity info, same shape as get_trending_hospitals)
+        """
+        if sort_by not in CAPACITY_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort_by}. Expected one of {CAPACITY_SORT_KEYS}")
+
+        try:
+            occupancy = _occupancy_rate_expr()
+            status_col = _capacity_status_expr(occupancy)
+
+            query = db.query(
+                Hospital.id, Hospital.name, Hospital.address, Hospital.latitude, Hospital.longitude,
+                Hospital.available_beds, Hospital.total_beds, Hospital.emergency_available,
+                occupancy.label('occupancy_rate'), status_col.label('status')
+            )
+            if emergency_only:
+                query = query.filter(Hospital.emergency_available == True)
+            if available_only:
+                query = query.filter(Hospital.available_beds > 0)
+            if name_query:
+                query = query.filter(Hospital.name.contains(name_query))
+            if status:
+                query = query.filter(status_col == status)
+
+            total = query.order_by(None).count()
+
+            sort_col = {
+                'occupancy_rate': occupancy,
+                'available_beds': Hospital.available_beds,
+                'total_beds': Hospital.total_beds,
+                'name': Hospital.name,
+                'id': Hospital.id,
+            }[sort_by]
+            order = sort_col.desc() if descending else sort_col.asc()
+            rows = query.order_by(order, Hospital.id.asc()).offset(offset).limit(limit).all()
+
+            items = []
+            for r in rows:
+                items.append({
+                    'id': r.id,
+                    'name': r.name,
+                    'address': r.address,
+                    'latitude': r.latitude,
+                    'longitude': r.longitude,
+                    'capacity': {
+                        'status': r.status,
+                        'available_beds': r.available_beds,
+                        'total_beds': r.total_beds,
+                        'occupancy_rate': round(float(r.occupancy_rate or 0), 2),
+                        'emergency_available': r.emergency_available
+                    }
+                })
+
+            return {'total': total, 'items': items}
+
+        except Exception as e:
+            print(f"Error analyzing capacity in bulk: {str(e)}")
+            return {'total': 0, 'items': []}
+
     def get_trending_hospitals(self, db: Session, limit: int = 10) -> List[Dict]:
         """
         Get hospitals with best capacity status
@@ -218,26 +521,7 @@ class CapacityAnalyzer:
         Returns:
             List of hospital capacity info
         """
-        try:
-            hospitals = db.query(Hospital).filter(
-                Hospital.available_beds > 0,
-                Hospital.emergency_available == True
-            ).order_by(Hospital.available_beds.desc()).limit(limit).all()
-            
-            result = []
-            for hospital in hospitals:
-                capacity_info = self.analyze_hospital_capacity(db, hospital.id)
-                result.append({
-                    'id': hospital.id,
-                    'name': hospital.name,
-                    'address': hospital.address,
-                    'latitude': hospital.latitude,
-                    'longitude': hospital.longitude,
-                    'capacity': capacity_info
-                })
-            
-            return result
-            
-        except Exception as e:
-            print(f"Error getting trending hospitals: {str(e)}")
-            return []
+        return self.analyze_capacity_bulk(
+            db, limit=limit, sort_by='available_beds', descending=True,
+            emergency_only=True, available_only=True
+        )['items']
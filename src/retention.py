@@ -0,0 +1,182 @@
+"""
+Monthly retention for capacity_history and wait_time_history.
+
+Whole calendar months older than the retention window are exported to
+compressed columnar .npz files (one file per id-ordered chunk, recorded in
+history_archive) and then deleted from the live tables, so recent-window
+queries only ever scan the retained months. Rollups are refreshed first so
+hourly/daily aggregates of archived months stay available; later refreshes
+leave those months' buckets untouched (see src.rollups.frozen_before).
+
+Archive layout:
+    <archive_dir>/<table>/<YYYY-MM>-<first_id>-<last_id>.npz
+"""
+import glob
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models import CapacityHistory, WaitTimeHistory, HistoryArchive, SEVERITY_CODES, severity_code
+from src.rollups import refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_NAMES = {code: name for name, code in SEVERITY_CODES.items()}
+# archived code of a NULL severity_level, read back as None
+MISSING_SEVERITY_CODE = 0
+
+# table -> (model, archived columns)
+HISTORY_TABLES = {
+    'capacity_history': (CapacityHistory, ['id', 'hospital_id', 'available_beds', 'occupied_beds', 'timestamp']),
+    'wait_time_history': (WaitTimeHistory, ['id', 'hospital_id', 'severity_level', 'wait_time_minutes', 'timestamp']),
+}
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def retention_cutoff(keep_months: int, now: Optional[datetime] = None) -> datetime:
+    """First day of the oldest retained month"""
+    return add_months(month_start(now or datetime.utcnow()), -keep_months)
+
+
+def _encode_chunk(rows: List, columns: List[str]) -> Dict[str, np.ndarray]:
+    data = dict(zip(columns, zip(*rows)))
+    encoded = {
+        'id': np.asarray(data['id'], dtype=np.int64),
+        'hospital_id': np.asarray(data['hospital_id'], dtype=np.int32),
+        'timestamp': pd.to_datetime(pd.Series(data['timestamp'])).to_numpy(dtype='datetime64[s]'),
+    }
+    for name in columns:
+        if name in encoded:
+            continue
+        if name == 'severity_level':
+            encoded[name] = np.array([MISSING_SEVERITY_CODE if s is None else severity_code(s) for s in data[name]],
+                                     dtype=np.int8)
+        else:
+            encoded[name] = np.asarray(data[name], dtype=np.int32)
+    return encoded
+
+
+def _archive_month(db: Session, table: str, start: datetime, archive_dir: str, chunk_size: int) -> int:
+    model, columns = HISTORY_TABLES[table]
+    end = add_months(start, 1)
+    month = start.strftime('%Y-%m')
+    table_dir = os.path.join(archive_dir, table)
+    os.makedirs(table_dir, exist_ok=True)
+
+    archived = 0
+    while True:
+        rows = db.query(*[getattr(model, c) for c in columns]).filter(
+            model.timestamp >= start, model.timestamp < end
+        ).order_by(model.id).limit(chunk_size).all()
+        if not rows:
+            break
+
+        chunk = _encode_chunk(rows, columns)
+        first_id, last_id = int(chunk['id'][0]), int(chunk['id'][-1])
+        path = os.path.join(table_dir, f'{month}-{first_id:012d}-{last_id:012d}.npz')
+        tmp_path = os.path.join(table_dir, 'archive.tmp.npz')
+        np.savez_compressed(tmp_path, **chunk)
+        os.replace(tmp_path, path)
+
+        # the file is durable before its rows leave the live table
+        db.query(model).filter(
+            model.id >= first_id, model.id <= last_id,
+            model.timestamp >= start, model.timestamp < end
+        ).delete(synchronize_session=False)
+        db.add(HistoryArchive(table_name=table, month=month, first_id=first_id, last_id=last_id,
+                              row_count=len(rows), path=path))
+        db.commit()
+        archived += len(rows)
+    return archived
+
+
+def archive_history(db: Session, archive_dir: str, keep_months: int = 6, tables: Optional[List[str]] = None,
+                    chunk_size: int = 50000, now: Optional[datetime] = None, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    """
+    Export and drop whole months of history older than the retention window
+    Args:
+        db: Database session
+        archive_dir: Directory for archived .npz chunks
+        keep_months: Full months retained before the current month
+        tables: Subset of HISTORY_TABLES (default: all)
+        chunk_size: Rows per archive file and delete statement
+        now: Reference time (default: utcnow)
+        dry_run: Only count the rows that would be archived
+    Returns:
+        Dictionary table -> {month: rows archived}
+    """
+    cutoff = retention_cutoff(keep_months, now)
+    result = {}
+
+    if not dry_run:
+        # keep aggregates of the months about to be dropped
+        refresh_rollups(db)
+
+    for table in tables or list(HISTORY_TABLES):
+        model, _ = HISTORY_TABLES[table]
+        result[table] = {}
+        oldest = db.query(func.min(model.timestamp)).filter(model.timestamp < cutoff).scalar()
+        if oldest is None:
+            continue
+
+        start = month_start(oldest)
+        while start < cutoff:
+            month = start.strftime('%Y-%m')
+            try:
+                if dry_run:
+                    count = db.query(func.count(model.id)).filter(
+                        model.timestamp >= start, model.timestamp < add_months(start, 1)
+                    ).scalar()
+                else:
+                    count = _archive_month(db, table, start, archive_dir, chunk_size)
+            except Exception as e:
+                logger.error(f"Error archiving {table} {month}: {str(e)}")
+                db.rollback()
+                break
+            if count:
+                result[table][month] = count
+                logger.info(f"{table} {month}: {count} rows {'to archive' if dry_run else 'archived'}")
+            start = add_months(start, 1)
+
+    return result
+
+
+def load_archive(archive_dir: str, table: str, months: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read archived history back as a DataFrame
+    Args:
+        archive_dir: Archive directory passed to archive_history
+        table: Key of HISTORY_TABLES
+        months: Optional 'YYYY-MM' filter
+    Returns:
+        DataFrame with the archived columns, ordered by id
+    """
+    _, columns = HISTORY_TABLES[table]
+    paths = sorted(glob.glob(os.path.join(archive_dir, table, '????-??-*.npz')))
+    if months is not None:
+        paths = [p for p in paths if os.path.basename(p)[:7] in months]
+
+    frames = []
+    for path in paths:
+        with np.load(path) as chunk:
+            frames.append(pd.DataFrame({name: chunk[name] for name in columns}))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.concat(frames, ignore_index=True).sort_values('id', kind='stable').reset_index(drop=True)
+    if 'severity_level' in df:
+        names = df['severity_level'].map(SEVERITY_NAMES)
+        df['severity_level'] = names.astype(object).where(names.notna(), None)
+    return df
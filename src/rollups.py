@@ -0,0 +1,234 @@
+"""
+Hourly and daily rollups of wait_time_history and capacity_history.
+
+Rollups hold count, mean, p90, min and max per hospital (and severity for
+wait times) per hour and per day. They are maintained incrementally: rows
+newer than the per-source watermark determine which hospitals and time
+range are affected, and only those buckets are recomputed from raw rows
+and replaced. Analytics read rollups so their cost scales with the number
+of time buckets instead of raw events.
+
+Months archived by src.retention are frozen: their raw rows are gone, so
+their buckets are never recomputed, and late rows timestamped in them are
+left out of the rollups (the next archive run exports them).
+"""
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+import pandas as pd
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from src.models import (
+    WaitTimeHistory, CapacityHistory, WaitTimeRollup, CapacityRollup, RollupWatermark, HistoryArchive
+)
+
+logger = logging.getLogger(__name__)
+
+# granularity -> pandas floor frequency
+GRANULARITIES = {'hour': 'h', 'day': 'D'}
+
+WAIT_TIME_SOURCE = 'wait_time_history'
+CAPACITY_SOURCE = 'capacity_history'
+
+ROLLUP_SOURCES = ('auto', 'rollup', 'raw')
+
+RAW_MODELS = {WAIT_TIME_SOURCE: WaitTimeHistory, CAPACITY_SOURCE: CapacityHistory}
+
+
+def get_watermark(db: Session, source: str) -> Optional[int]:
+    """Last raw id folded into the rollups, or None if the source was never rolled up"""
+    row = db.query(RollupWatermark).filter(RollupWatermark.source == source).first()
+    return row.last_id if row else None
+
+
+def rollups_available(db: Session, source: str) -> bool:
+    """Whether rollups for a source are being maintained"""
+    return get_watermark(db, source) is not None
+
+
+def rollups_current(db: Session, source: str) -> bool:
+    """Whether rollups for a source are maintained and no raw row is newer than the watermark"""
+    watermark = get_watermark(db, source)
+    if watermark is None:
+        return False
+    latest = db.query(func.max(RAW_MODELS[source].id)).scalar()
+    return latest is None or latest <= watermark
+
+
+def resolve_source(db: Session, source: str, table: str) -> str:
+    """
+    Pick the data source for an analytic
+    Args:
+        db: Database session
+        source: 'rollup', 'raw' or 'auto' (rollup when maintained for table
+            and current, raw while rows newer than the watermark exist)
+        table: WAIT_TIME_SOURCE or CAPACITY_SOURCE
+    Returns:
+        'rollup' or 'raw'
+    """
+    if source not in ROLLUP_SOURCES:
+        raise ValueError(f"Unknown source: {source}. Expected one of {ROLLUP_SOURCES}")
+    if source == 'auto':
+        return 'rollup' if rollups_current(db, table) else 'raw'
+    return source
+
+
+def _set_watermark(db: Session, source: str, last_id: int):
+    row = db.query(RollupWatermark).filter(RollupWatermark.source == source).first()
+    if row is None:
+        db.add(RollupWatermark(source=source, last_id=last_id))
+    else:
+        row.last_id = last_id
+
+
+def _affected_slab(db: Session, raw_model, watermark: int):
+    """
+    Hospitals with new rows and the earliest new timestamp
+    Returns (hospital_ids, start, max_id) or None if nothing is new
+    """
+    new = db.query(
+        raw_model.hospital_id, func.min(raw_model.timestamp), func.max(raw_model.id)
+    ).filter(raw_model.id > watermark).group_by(raw_model.hospital_id).all()
+    if not new:
+        return None
+    hospital_ids = [r[0] for r in new]
+    starts = [r[1] for r in new if r[1] is not None]
+    start = min(starts) if starts else None
+    max_id = max(r[2] for r in new)
+    return hospital_ids, start, max_id
+
+
+def frozen_before(db: Session, source: str) -> Optional[datetime]:
+    """End of the last archived month of a source (its buckets before this are final), or None"""
+    month = db.query(func.max(HistoryArchive.month)).filter(HistoryArchive.table_name == source).scalar()
+    if month is None:
+        return None
+    year, month = int(month[:4]), int(month[5:7])
+    return datetime(year + month // 12, month % 12 + 1, 1)
+
+
+def _slab_start(db: Session, source: str, start: datetime) -> datetime:
+    # recompute whole days so daily and hourly buckets are rebuilt from the same rows
+    slab_start = pd.Timestamp(start).floor('D').to_pydatetime()
+    # archived months have no raw rows left to rebuild their buckets from
+    frozen = frozen_before(db, source)
+    return max(slab_start, frozen) if frozen is not None else slab_start
+
+
+def _replace_buckets(db: Session, rollup_model, granularity: str, hospital_ids: List[int], start: datetime, rows: List[Dict]):
+    db.query(rollup_model).filter(
+        rollup_model.granularity == granularity,
+        rollup_model.hospital_id.in_(hospital_ids),
+        rollup_model.bucket_start >= start
+    ).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(rollup_model), rows)
+
+
+def _wait_time_rows(df: pd.DataFrame, granularity: str) -> List[Dict]:
+    df = df.assign(bucket_start=df['timestamp'].dt.floor(GRANULARITIES[granularity]))
+    agg = df.groupby(['hospital_id', 'severity_level', 'bucket_start'], sort=False)['wait_time'].agg(
+        count='count', mean_wait='mean', p90_wait=lambda s: s.quantile(0.9), min_wait='min', max_wait='max'
+    ).reset_index()
+    agg['granularity'] = granularity
+    agg['bucket_start'] = agg['bucket_start'].dt.to_pydatetime()
+    return agg.to_dict('records')
+
+
+def _capacity_rows(df: pd.DataFrame, granularity: str) -> List[Dict]:
+    df = df.assign(bucket_start=df['timestamp'].dt.floor(GRANULARITIES[granularity]))
+    grouped = df.groupby(['hospital_id', 'bucket_start'], sort=False)
+    agg = grouped['occupancy'].agg(
+        count='count', mean_occupancy='mean', p90_occupancy=lambda s: s.quantile(0.9),
+        min_occupancy='min', max_occupancy='max'
+    )
+    agg['mean_available_beds'] = grouped['available_beds'].mean()
+    agg['mean_occupied_beds'] = grouped['occupied_beds'].mean()
+    agg = agg.reset_index()
+    agg['granularity'] = granularity
+    agg['bucket_start'] = agg['bucket_start'].dt.to_pydatetime()
+    return agg.to_dict('records')
+
+
+def _refresh_wait_times(db: Session, chunk_size: int) -> int:
+    watermark = get_watermark(db, WAIT_TIME_SOURCE) or 0
+    slab = _affected_slab(db, WaitTimeHistory, watermark)
+    if slab is None:
+        return 0
+    hospital_ids, start, max_id = slab
+
+    if start is not None:
+        slab_start = _slab_start(db, WAIT_TIME_SOURCE, start)
+        for i in range(0, len(hospital_ids), chunk_size):
+            chunk = hospital_ids[i:i + chunk_size]
+            raw = db.query(
+                WaitTimeHistory.hospital_id, WaitTimeHistory.severity_level,
+                WaitTimeHistory.timestamp, WaitTimeHistory.wait_time_minutes
+            ).filter(
+                WaitTimeHistory.hospital_id.in_(chunk),
+                WaitTimeHistory.timestamp >= slab_start
+            ).all()
+            df = pd.DataFrame(raw, columns=['hospital_id', 'severity_level', 'timestamp', 'wait_time'])
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            df['severity_level'] = df['severity_level'].map(lambda s: s.value if s is not None else None)
+            df = df.dropna(subset=['timestamp', 'severity_level'])
+            for granularity in GRANULARITIES:
+                rows = _wait_time_rows(df, granularity) if not df.empty else []
+                _replace_buckets(db, WaitTimeRollup, granularity, chunk, slab_start, rows)
+
+    _set_watermark(db, WAIT_TIME_SOURCE, max_id)
+    db.commit()
+    return max_id - watermark
+
+
+def _refresh_capacity(db: Session, chunk_size: int) -> int:
+    watermark = get_watermark(db, CAPACITY_SOURCE) or 0
+    slab = _affected_slab(db, CapacityHistory, watermark)
+    if slab is None:
+        return 0
+    hospital_ids, start, max_id = slab
+
+    if start is not None:
+        slab_start = _slab_start(db, CAPACITY_SOURCE, start)
+        for i in range(0, len(hospital_ids), chunk_size):
+            chunk = hospital_ids[i:i + chunk_size]
+            raw = db.query(
+                CapacityHistory.hospital_id, CapacityHistory.timestamp,
+                CapacityHistory.available_beds, CapacityHistory.occupied_beds
+            ).filter(
+                CapacityHistory.hospital_id.in_(chunk),
+                CapacityHistory.timestamp >= slab_start
+            ).all()
+            df = pd.DataFrame(raw, columns=['hospital_id', 'timestamp', 'available_beds', 'occupied_beds'])
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            total = df['available_beds'] + df['occupied_beds']
+            # empty snapshots carry no occupancy information
+            df = df[(total > 0) & df['timestamp'].notna()]
+            df = df.assign(occupancy=df['occupied_beds'] / (df['available_beds'] + df['occupied_beds']))
+            for granularity in GRANULARITIES:
+                rows = _capacity_rows(df, granularity) if not df.empty else []
+                _replace_buckets(db, CapacityRollup, granularity, chunk, slab_start, rows)
+
+    _set_watermark(db, CAPACITY_SOURCE, max_id)
+    db.commit()
+    return max_id - watermark
+
+
+def refresh_rollups(db: Session, chunk_size: int = 500) -> Dict[str, int]:
+    """
+    Fold raw history rows newer than the watermarks into the rollups
+    Args:
+        db: Database session
+        chunk_size: Hospitals recomputed per query
+    Returns:
+        Dictionary source -> id range advanced (0 when already current)
+    """
+    result = {}
+    for source, refresh in ((WAIT_TIME_SOURCE, _refresh_wait_times), (CAPACITY_SOURCE, _refresh_capacity)):
+        try:
+            result[source] = refresh(db, chunk_size)
+        except Exception as e:
+            logger.error(f"Error refreshing {source} rollups: {str(e)}")
+            db.rollback()
+            result[source] = 0
+    return result
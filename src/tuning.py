@@ -0,0 +1,259 @@
+"""Hyperparameter tuning engine for wait time models.
+
+Runs successive-halving (or plain random / grid) search over RandomForest,
+GradientBoosting and HistGradientBoosting regressors:
+
+- CV fold matrices are materialized once and shared by every candidate
+  (joblib memory-maps large arrays into the worker processes).
+- Candidates are scored in parallel on a process pool.
+- Scores are checkpointed to a JSON file after every round, so an
+  interrupted run resumes without re-fitting finished candidates.
+"""
+from typing import Dict, List, Optional
+import json
+import math
+import os
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import KFold, TimeSeriesSplit, ParameterGrid, ParameterSampler
+
+
+TUNING_FAMILIES = ('forest', 'gbm', 'hist_gbm')
+
+SEARCH_SPACES = {
+    'forest': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [None, 5, 10, 20, 30],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': [1.0, 'sqrt', 0.5],
+    },
+    'gbm': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [2, 3, 4, 5],
+        'learning_rate': [0.01, 0.05, 0.1, 0.2],
+        'subsample': [0.6, 0.8, 1.0],
+    },
+    'hist_gbm': {
+        'max_iter': [100, 200, 400],
+        'max_leaf_nodes': [15, 31, 63],
+        'learning_rate': [0.03, 0.1, 0.2],
+        'min_samples_leaf': [10, 20, 50],
+        'l2_regularization': [0.0, 0.1, 1.0],
+    },
+}
+
+
+def make_estimator(family: str, params: Dict, random_state: int = 42):
+    """Build an unfitted estimator of a tuning family with the given params."""
+    if family == 'forest':
+        # n_jobs=1: parallelism comes from the candidate pool
+        return RandomForestRegressor(random_state=random_state, n_jobs=1, **params)
+    if family == 'gbm':
+        return GradientBoostingRegressor(random_state=random_state, **params)
+    if family == 'hist_gbm':
+        return HistGradientBoostingRegressor(random_state=random_state, **params)
+    raise ValueError(f"Unknown tuning family: {family}. Expected one of {TUNING_FAMILIES}")
+
+
+def make_cv_folds(X: np.ndarray, y: np.ndarray, cv_splits: int = 3, use_time_series: bool = False, random_state: int = 42) -> List[tuple]:
+    """
+    Materialize CV folds once as contiguous arrays.
+
+    Returns list of (X_train, y_train, X_test, y_test). With
+    use_time_series the rows must already be in time order and training
+    rows keep it; otherwise training rows are in seeded random order, so
+    the last n of them are a random subset (see _score_candidate).
+    """
+    if use_time_series:
+        splitter = TimeSeriesSplit(n_splits=cv_splits)
+    else:
+        splitter = KFold(n_splits=cv_splits, shuffle=True, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+
+    folds = []
+    for train_idx, test_idx in splitter.split(X):
+        if not use_time_series:
+            # KFold returns sorted indices: the tail would always be the highest-index rows
+            train_idx = rng.permutation(train_idx)
+        folds.append((
+            np.ascontiguousarray(X[train_idx]),
+            np.ascontiguousarray(y[train_idx]),
+            np.ascontiguousarray(X[test_idx]),
+            np.ascontiguousarray(y[test_idx]),
+        ))
+    return folds
+
+
+def _score_candidate(family: str, params: Dict, folds: List[tuple], resource: int, random_state: int) -> float:
+    """Mean MAE of one candidate across folds, fitted on at most `resource` training rows."""
+    maes = []
+    for X_train, y_train, X_test, y_test in folds:
+        # the most recent rows for time-ordered folds; a seeded random subset for shuffled ones
+        n = min(resource, y_train.shape[0])
+        model = make_estimator(family, params, random_state=random_state)
+        model.fit(X_train[-n:], y_train[-n:])
+        maes.append(mean_absolute_error(y_test, model.predict(X_test)))
+    return float(np.mean(maes))
+
+
+def _candidate_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _load_checkpoint(path: Optional[str], meta: Dict) -> Dict:
+    if not path or not os.path.exists(path):
+        return {'meta': meta, 'results': {}}
+    try:
+        with open(path, encoding='utf-8') as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        return {'meta': meta, 'results': {}}
+    if state.get('meta') != meta:
+        # different data or search settings: start over
+        return {'meta': meta, 'results': {}}
+    return state
+
+
+def _save_checkpoint(path: Optional[str], state: Dict):
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh)
+    os.replace(tmp_path, path)
+
+
+def _candidates(space: Dict, search: str, n_iter: int, random_state: int) -> List[Dict]:
+    if search == 'grid':
+        return list(ParameterGrid(space))
+    n_total = len(ParameterGrid(space))
+    return list(ParameterSampler(space, n_iter=min(n_iter, n_total), random_state=random_state))
+
+
+def _halving_schedule(n_candidates: int, max_resource: int, min_resource: int, eta: int) -> List[int]:
+    """Training-row budget per round; the last round always uses max_resource."""
+    n_rounds = max(1, int(math.ceil(math.log(max(n_candidates, 1), eta))) + 1)
+    resources = []
+    for r in range(n_rounds):
+        res = int(max_resource / (eta ** (n_rounds - 1 - r)))
+        resources.append(max(min_resource, min(res, max_resource)))
+    # drop rounds that would not increase the budget
+    schedule = []
+    for res in resources:
+        if not schedule or res > schedule[-1]:
+            schedule.append(res)
+    return schedule
+
+
+def search_family(family: str, folds: List[tuple], space: Dict = None, search: str = 'halving', n_iter: int = 30, eta: int = 3,
+                  min_resource: int = 100, n_jobs: int = -1, random_state: int = 42, checkpoint: Dict = None,
+                  checkpoint_path: Optional[str] = None) -> Dict:
+    """
+    Search one model family.
+
+    Args:
+        family: One of TUNING_FAMILIES
+        folds: Output of make_cv_folds
+        space: Parameter space (defaults to SEARCH_SPACES[family])
+        search: 'halving', 'random' or 'grid'
+        n_iter: Number of sampled candidates for 'halving'/'random'
+        eta: Halving factor (keep 1/eta of candidates per round)
+        min_resource: Training rows per fold in the first halving round
+        n_jobs: Worker processes (-1 = all cores)
+        checkpoint: Checkpoint state shared across families
+        checkpoint_path: Where to persist the checkpoint after each round
+    Returns:
+        Dictionary with best params/score and per-round summary
+    """
+    space = space or SEARCH_SPACES[family]
+    candidates = _candidates(space, search, n_iter, random_state)
+    max_resource = min(f[1].shape[0] for f in folds)
+
+    if search == 'halving':
+        schedule = _halving_schedule(len(candidates), max_resource, min(min_resource, max_resource), eta)
+    else:
+        schedule = [max_resource]
+
+    checkpoint = checkpoint if checkpoint is not None else {'results': {}}
+    done = checkpoint['results'].setdefault(family, {})
+
+    rounds = []
+    remaining = candidates
+    scores = {}
+    for i, resource in enumerate(schedule):
+        res_key = str(resource)
+        todo = [p for p in remaining if res_key not in done.get(_candidate_key(p), {})]
+        if todo:
+            new_scores = Parallel(n_jobs=n_jobs)(
+                delayed(_score_candidate)(family, p, folds, resource, random_state) for p in todo
+            )
+            for p, score in zip(todo, new_scores):
+                done.setdefault(_candidate_key(p), {})[res_key] = score
+            _save_checkpoint(checkpoint_path, checkpoint)
+
+        scores = {_candidate_key(p): done[_candidate_key(p)][res_key] for p in remaining}
+        remaining = sorted(remaining, key=lambda p: scores[_candidate_key(p)])
+        rounds.append({
+            'resource': resource,
+            'n_candidates': len(remaining),
+            'best_score': scores[_candidate_key(remaining[0])],
+        })
+        if i < len(schedule) - 1:
+            remaining = remaining[:max(1, int(math.ceil(len(remaining) / eta)))]
+
+    best = remaining[0]
+    return {
+        'best_params': best,
+        'best_score': scores[_candidate_key(best)],
+        'n_candidates': len(candidates),
+        'rounds': rounds,
+    }
+
+
+def tune(X: np.ndarray, y: np.ndarray, families: List[str] = None, spaces: Dict = None, search: str = 'halving', n_iter: int = 30,
+         eta: int = 3, min_resource: int = 100, cv_splits: int = 3, use_time_series: bool = False, n_jobs: int = -1,
+         random_state: int = 42, checkpoint_path: Optional[str] = None) -> Dict:
+    """
+    Tune every family on shared fold matrices.
+
+    Returns dict: family -> search_family() result, plus timing info.
+    """
+    if search not in ('halving', 'random', 'grid'):
+        raise ValueError(f"Unknown search mode: {search}")
+
+    families = list(families or TUNING_FAMILIES)
+    spaces = spaces or {}
+
+    t0 = time.time()
+    folds = make_cv_folds(X, y, cv_splits=cv_splits, use_time_series=use_time_series, random_state=random_state)
+
+    meta = {
+        'n_samples': int(X.shape[0]),
+        'n_features': int(X.shape[1]),
+        'y_sum': float(np.sum(y)),
+        'cv_splits': cv_splits,
+        'use_time_series': use_time_series,
+        'search': search,
+        'n_iter': n_iter,
+        'eta': eta,
+        'random_state': random_state,
+    }
+    checkpoint = _load_checkpoint(checkpoint_path, meta)
+
+    results = {}
+    for family in families:
+        results[family] = search_family(
+            family, folds, space=spaces.get(family), search=search, n_iter=n_iter, eta=eta,
+            min_resource=min_resource, n_jobs=n_jobs, random_state=random_state,
+            checkpoint=checkpoint, checkpoint_path=checkpoint_path
+        )
+
+    return {
+        'families': results,
+        'search': search,
+        'n_samples': int(X.shape[0]),
+        'elapsed_seconds': time.time() - t0,
+    }
@@ -0,0 +1,167 @@
+import datetime
+import random
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.database import Base
+from src.models import Hospital, CapacityHistory
+from src.predictor import CapacityAnalyzer, TREND_LABELS
+
+
+def create_inmemory_session():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    return Session()
+
+
+def seed_capacity_history(session, n_hospitals=8, hours=30):
+    rng = random.Random(7)
+    start = datetime.datetime(2024, 1, 1)
+    hospitals = []
+    for i in range(1, n_hospitals + 1):
+        h = Hospital(name=f'H{i}', address=f'Address {i}', latitude=-6.2 + i * 0.01, longitude=106.8 + i * 0.01,
+                     total_beds=100, available_beds=100 - 10 * i)
+        session.add(h)
+        hospitals.append(h)
+    session.commit()
+
+    for idx, h in enumerate(hospitals):
+        # hospital 1 has too little history, hospital 2 none, the rest drift up, down or stay flat
+        n = {0: 5, 1: 0}.get(idx, hours)
+        slope = (idx % 3 - 1) * 0.01
+        for t in range(n):
+            occupied = int(max(0, min(100, 50 + slope * 100 * t + rng.uniform(-3, 3))))
+            if idx == 7 and t % 4 == 0:
+                occupied, available = 0, 0  # empty snapshots are ignored
+            else:
+                available = 100 - occupied
+            session.add(CapacityHistory(hospital_id=h.id, available_beds=available, occupied_beds=occupied,
+                                        timestamp=start + datetime.timedelta(hours=t)))
+    session.commit()
+    return hospitals
+
+
+def test_batch_trends_match_per_hospital_trend():
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session)
+    analyzer = CapacityAnalyzer()
+
+    trends = analyzer.predict_capacity_trends(session)
+
+    assert list(trends['hospital_id']) == [h.id for h in hospitals]
+    for row in trends:
+        expected = analyzer.predict_capacity_trend(session, int(row['hospital_id']))
+        assert TREND_LABELS[int(row['trend'])] == expected
+    assert trends['n_samples'][1] == 0
+    assert set(TREND_LABELS[int(t)] for t in trends['trend']) == {'increasing', 'stable', 'decreasing'}
+
+
+def test_forecaster_produces_cached_matrix_forecasts():
+    from src.forecasting import CapacityForecaster
+
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session, hours=24 * 4)
+
+    forecaster = CapacityForecaster(horizon=24, history_hours=72).fit(session)
+
+    # hospital 1 only has history before the window, hospital 2 has none
+    assert forecaster.forecasts.shape == (len(hospitals) - 2, 24)
+    assert forecaster.forecast_for(hospitals[0].id) is None
+    assert forecaster.forecast_for(hospitals[1].id) is None
+    assert ((forecaster.forecasts >= 0) & (forecaster.forecasts <= 1)).all()
+    assert set(forecaster.methods) <= {'ses', 'seasonal_naive'}
+
+    rising, falling = hospitals[5], hospitals[3]
+    assert forecaster.peak_occupancy(rising.id) > 0.9
+    assert forecaster.peak_occupancy(falling.id) < 0.1
+    assert forecaster.forecast_start == datetime.datetime(2024, 1, 5)
+
+    fitted_at = forecaster.fitted_at
+    forecaster.refresh_if_stale(session, max_age_seconds=3600)
+    assert forecaster.fitted_at == fitted_at
+
+
+def test_bulk_capacity_matches_per_hospital_analysis():
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session, hours=1)
+    hospitals[2].emergency_available = False
+    session.add(Hospital(name='Empty', address='-', latitude=-6.0, longitude=106.0, total_beds=0, available_beds=0))
+    session.commit()
+    analyzer = CapacityAnalyzer()
+
+    page = analyzer.analyze_capacity_bulk(session, offset=0, limit=4, sort_by='occupancy_rate', descending=True)
+    assert page['total'] == len(hospitals) + 1
+    assert len(page['items']) == 4
+    rates = [item['capacity']['occupancy_rate'] for item in page['items']]
+    assert rates == sorted(rates, reverse=True)
+    for item in page['items']:
+        expected = analyzer.analyze_hospital_capacity(session, item['id'])
+        assert item['capacity'] == expected
+
+    high = analyzer.analyze_capacity_bulk(session, status='high')
+    assert [i['name'] for i in high['items']] == ['H8']
+
+    trending = analyzer.get_trending_hospitals(session, limit=3)
+    assert [t['name'] for t in trending] == ['H1', 'H2', 'H4']
+
+
+def test_capacity_ingestor_coalesces_and_writes_in_bulk(tmp_path):
+    from src.capacity_ingest import CapacityIngestor
+
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session, hours=0)
+    flushed = []
+    ingestor = CapacityIngestor(session, flush_interval=3600, on_flush=flushed.extend)
+
+    ingestor.submit(hospitals[0].id, 40, 60, '2024-02-01T10:00:00')
+    ingestor.submit(hospitals[0].id, 35, 65, '2024-02-01T10:05:00')
+    ingestor.submit(hospitals[0].id, 99, 1, '2024-02-01T09:00:00')  # older: history only
+    ingestor.submit(9999, 1, 1)
+
+    feed = tmp_path / 'feed.csv'
+    feed.write_text('hospital_id,available,occupied,timestamp\n'
+                    f'{hospitals[1].id},12,88,1706781600\n'
+                    f'{hospitals[2].id},bad,1,\n')
+    assert ingestor.ingest_file(str(feed)) == 1
+
+    stats = ingestor.get_stats()
+    assert stats['written'] == 2 and stats['coalesced'] == 2 and stats['history_rows'] == 4
+    assert stats['unknown_hospitals'] == 1 and stats['rejected'] == 1
+    assert len(flushed) == 2
+
+    session.expire_all()
+    assert session.get(Hospital, hospitals[0].id).available_beds == 35
+    assert session.get(Hospital, hospitals[1].id).available_beds == 12
+    # every reading of a known hospital is kept, not just the latest
+    written = session.query(CapacityHistory.hospital_id, CapacityHistory.available_beds).filter(
+        CapacityHistory.timestamp >= datetime.datetime(2024, 2, 1)).all()
+    assert sorted(written) == sorted([(hospitals[0].id, 40), (hospitals[0].id, 35), (hospitals[0].id, 99),
+                                      (hospitals[1].id, 12)])
+
+
+def test_capacity_ingestor_keeps_readings_of_failed_flush():
+    from unittest.mock import patch
+    from src.capacity_ingest import CapacityIngestor
+
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session, hours=0)
+    ingestor = CapacityIngestor(session, flush_interval=3600)
+    ingestor.submit(hospitals[0].id, 40, 60, '2024-02-01T10:00:00')
+    ingestor.submit(hospitals[1].id, 12, 88, '2024-02-01T10:00:00')
+
+    def newer_reading_then_fail():
+        # arrives while the write is in flight and must win over the requeued one
+        ingestor.submit(hospitals[0].id, 30, 70, '2024-02-01T11:00:00')
+        raise RuntimeError('database is locked')
+
+    with patch.object(session, 'commit', side_effect=newer_reading_then_fail):
+        assert ingestor.flush() == 0
+    assert ingestor.pending_count() == 2
+
+    assert ingestor.flush() == 2
+    session.expire_all()
+    assert session.get(Hospital, hospitals[0].id).available_beds == 30
+    assert session.get(Hospital, hospitals[1].id).available_beds == 12
+    assert session.query(CapacityHistory).filter(CapacityHistory.timestamp >= datetime.datetime(2024, 2, 1)).count() == 3
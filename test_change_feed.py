@@ -0,0 +1,65 @@
+from src.change_feed import CapacityChangeFeed
+from src.capacity_ingest import CapacityIngestor
+from src.forecasting import CapacityForecaster
+from src.rollups import refresh_rollups
+from test_capacity import create_inmemory_session, seed_capacity_history
+
+
+def test_feed_versions_and_subscribers():
+    feed = CapacityChangeFeed(log_size=3)
+    received = []
+    token = feed.subscribe(received.append)
+
+    assert feed.publish(7, 10) == 1
+    assert feed.publish(7, 9) == 2
+    published = feed.publish_many([{'hospital_id': 8, 'available_beds': 4}, {'hospital_id': 7, 'available_beds': 8}])
+
+    assert [c['version'] for c in published] == [1, 3]
+    assert feed.versions([7, 8, 9]) == {7: 3, 8: 1, 9: 0}
+    assert feed.sequence == 4
+    assert len(received) == 3 and received[-1] == published
+
+    assert [c['sequence'] for c in feed.changes_since(2)] == [3, 4]
+    assert feed.changes_since(4) == []
+    assert feed.changes_since(0) is None  # evicted from the bounded log
+
+    feed.unsubscribe(token)
+    feed.publish(9)
+    assert len(received) == 3
+
+
+def test_ingestor_publishes_and_invalidates_forecaster():
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session, hours=48)
+    feed = CapacityChangeFeed()
+    forecaster = CapacityForecaster(history_hours=48, change_feed=feed).fit(session)
+    fitted_at = forecaster.fitted_at
+
+    forecaster.refresh_if_stale(session, max_age_seconds=3600)
+    assert forecaster.fitted_at == fitted_at
+
+    ingestor = CapacityIngestor(session, change_feed=feed)
+    ingestor.submit(hospitals[2].id, 5, 95)
+    ingestor.submit(99999, 5, 95)  # unknown hospitals are not published
+    ingestor.flush()
+
+    assert feed.version(hospitals[2].id) == 1
+    assert feed.version(99999) == 0
+    forecaster.refresh_if_stale(session, max_age_seconds=3600)
+    assert forecaster.fitted_sequence == feed.sequence
+
+
+def test_feed_invalidation_refits_past_stale_rollups():
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session, hours=48)
+    refresh_rollups(session)
+    feed = CapacityChangeFeed()
+    forecaster = CapacityForecaster(history_hours=48, change_feed=feed).fit(session)
+    assert forecaster.forecast_start.isoformat() == '2024-01-03T00:00:00'
+
+    # the ingestor publishes but leaves the rollups behind
+    ingestor = CapacityIngestor(session, change_feed=feed)
+    ingestor.submit(hospitals[2].id, 5, 95, '2024-01-03T00:10:00')
+    ingestor.flush()
+    forecaster.refresh_if_stale(session, max_age_seconds=3600)
+    assert forecaster.forecast_start.isoformat() == '2024-01-03T01:00:00'
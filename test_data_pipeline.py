@@ -14,6 +14,14 @@ from pathlib import Path
 from database.dataset_downloader import DatasetDownloader
 from src.csv_loader import CSVDataLoader
 
+# timing/batching stats that legitimately differ between load modes
+THROUGHPUT_STATS = ('elapsed_seconds', 'rows_per_second', 'bytes_per_second', 'mean_commit_ms',
+                    'commit_seconds', 'max_commit_seconds', 'batches_committed')
+
+
+def _counts(stats):
+    return {k: v for k, v in stats.items() if k not in THROUGHPUT_STATS}
+
 
 class TestDatasetDownloader(unittest.TestCase):
     """Test DatasetDownloader functionality"""
@@ -137,6 +145,242 @@ class TestCSVLoader(unittest.TestCase):
         
         self.assertEqual(self.loader.stats['total_processed'], 0)
         self.assertEqual(self.loader.stats['total_inserted'], 0)
+    
+    def test_vectorized_coordinate_extraction(self):
+        """Test vectorized extraction matches the per-link extraction"""
+        import pandas as pd
+        links = pd.Series([
+            'http://maps.google.co.id/?q=-6.1744,106.8294',
+            'http://maps.google.co.id/?q=4.488058, 97.947963',
+            'http://maps.google.co.id/?q=0.0,0.0',
+            'http://maps.google.co.id/?q=-12.5,106.0',
+            'invalid_link',
+            '',
+            None,
+        ])
+        coords = self.loader.extract_coordinates(links)
+        for i, link in enumerate(links):
+            expected = self.loader.extract_coordinates_from_gmaps_link(link)
+            self.assertEqual((coords['latitude'][i], coords['longitude'][i]), expected, f"Failed for link: {link}")
+    
+    def test_bulk_load_skips_duplicates(self):
+        """Test bulk insert skips existing and repeated (name, address) pairs"""
+        import tempfile
+        import pandas as pd
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from src.database import Base
+        from src.models import Hospital
+        from src.change_feed import CapacityChangeFeed
+        
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        db.add(Hospital(name='RS Lama', address='Jl. Lama', latitude=-6.2, longitude=106.8))
+        db.commit()
+        
+        rows = [
+            ('RS Lama', 'Jl. Lama', '?q=-6.2,106.8', 'Rumah Sakit'),
+            ('RS Baru', 'Jl. Baru', '?q=-6.3,106.9', 'Rumah Sakit Tipe B'),
+            ('RS Baru', 'Jl. Baru', '?q=-6.3,106.9', 'Rumah Sakit Tipe B'),
+            ('Puskesmas X', 'Jl. X', '?q=-6.4,107.0', 'Puskesmas'),
+            ('RS Tanpa Lokasi', 'Jl. Y', 'invalid', 'Rumah Sakit'),
+        ]
+        df = pd.DataFrame(rows, columns=['NamaFaskes', 'AlamatFaskes', 'LatLongFaskes', 'TipeFaskes'])
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            df.to_csv(f.name, index=False)
+            csv_path = f.name
+        
+        try:
+            feed = CapacityChangeFeed()
+            loader = CSVDataLoader(db, change_feed=feed)
+            self.assertEqual(loader._load_single_csv(csv_path, batch_size=1), 2)
+            stats = loader.get_stats()
+            self.assertEqual((stats['total_processed'], stats['total_inserted'], stats['total_skipped']), (5, 2, 3))
+            rs_baru = db.query(Hospital).filter(Hospital.name == 'RS Baru').one()
+            self.assertEqual((rs_baru.class_, rs_baru.total_beds, rs_baru.available_beds), ('B', 150, 75))
+            self.assertEqual(feed.version(rs_baru.id), 1)
+            self.assertEqual(feed.sequence, 2)
+        finally:
+            os.unlink(csv_path)
+    
+    def test_bulk_load_upserts_rows_at_existing_location(self):
+        """Test a row matching a hospital's name and coordinates but not its address updates it"""
+        import tempfile
+        import pandas as pd
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from src.database import Base
+        from src.models import Hospital
+        from src.change_feed import CapacityChangeFeed
+        
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        db.add(Hospital(name='RS A', address='Jl. Lama', latitude=-6.2, longitude=106.8, total_beds=80))
+        db.commit()
+        
+        rows = [
+            ('RS B', 'Jl. B', '?q=-6.3,106.9', 'Rumah Sakit'),
+            ('RS A', 'Jl. Baru', '?q=-6.2,106.8', 'Rumah Sakit Tipe C'),
+            ('RS C', 'Jl. C', '?q=-6.4,107.0', 'Rumah Sakit'),
+        ]
+        df = pd.DataFrame(rows, columns=['NamaFaskes', 'AlamatFaskes', 'LatLongFaskes', 'TipeFaskes'])
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            df.to_csv(f.name, index=False)
+            csv_path = f.name
+        
+        try:
+            feed = CapacityChangeFeed()
+            loader = CSVDataLoader(db, change_feed=feed)
+            self.assertEqual(loader._load_single_csv(csv_path), 3)
+            stats = loader.get_stats()
+            self.assertEqual(stats['errors'], [])
+            self.assertEqual((stats['total_inserted'], stats['total_updated']), (2, 1))
+            self.assertEqual(db.query(Hospital).count(), 3)
+            rs_a = db.query(Hospital).filter(Hospital.name == 'RS A').one()
+            db.refresh(rs_a)
+            self.assertEqual((rs_a.address, rs_a.class_, rs_a.total_beds), ('Jl. Baru', 'C', 80))
+            self.assertEqual(feed.sequence, 2)  # only the new hospitals
+        finally:
+            os.unlink(csv_path)
+    
+    def test_streaming_load_matches_whole_file(self):
+        """Test chunked streaming gives the same result as reading the whole file"""
+        import tempfile
+        import pandas as pd
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from src.database import Base
+        from src.models import Hospital
+        from src.change_feed import CapacityChangeFeed
+        
+        rows = [{
+            'Provinsi': 'Bali' if i % 2 else 'Jawa Barat',
+            'TipeFaskes': 'Rumah Sakit' if i % 3 else 'Puskesmas',
+            'NamaFaskes': f'Faskes {i % 40}',  # repeats span chunks
+            'AlamatFaskes': f'Jl. {i % 40}',
+            'LatLongFaskes': f'http://maps.google.co.id/?q=-8.{i},115.{i}',
+            'Link': 'unused',
+        } for i in range(1, 60)]
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            pd.DataFrame(rows).to_csv(f.name, index=False)
+            csv_path = f.name
+        
+        def load(chunk_size):
+            engine = create_engine('sqlite:///:memory:')
+            Base.metadata.create_all(engine)
+            db = sessionmaker(bind=engine)()
+            loader = CSVDataLoader(db, change_feed=CapacityChangeFeed(), chunk_size=chunk_size)
+            count = loader._load_single_csv(csv_path, province='bali')
+            return count, _counts(loader.get_stats()), sorted((h.name, h.class_) for h in db.query(Hospital))
+        
+        try:
+            whole, streamed = load(None), load(7)
+            self.assertEqual(whole, streamed)
+            self.assertEqual(whole[0], 20)
+        finally:
+            os.unlink(csv_path)
+    
+    def test_parallel_directory_load_matches_sequential(self):
+        """Test parallel parsing with a single writer gives the sequential result"""
+        import shutil
+        import tempfile
+        import pandas as pd
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from src.database import Base
+        from src.models import Hospital
+        from src.change_feed import CapacityChangeFeed
+        
+        temp_dir = tempfile.mkdtemp()
+        for p in range(3):
+            pd.DataFrame([{
+                'NamaFaskes': f'Faskes {(p * 5 + i) % 12}',  # names repeat across files
+                'AlamatFaskes': 'Jl. Utama',
+                'LatLongFaskes': f'http://maps.google.co.id/?q=-6.{p}{i},106.{i}',
+                'TipeFaskes': 'Rumah Sakit',
+            } for i in range(8)]).to_csv(f'{temp_dir}/faskes_{p}.csv', index=False)
+        
+        def load(n_jobs):
+            engine = create_engine('sqlite:///:memory:')
+            Base.metadata.create_all(engine)
+            db = sessionmaker(bind=engine)()
+            loader = CSVDataLoader(db, change_feed=CapacityChangeFeed())
+            results = loader.load_from_directory(temp_dir, n_jobs=n_jobs)
+            rows = [(h.name, h.latitude, h.longitude) for h in db.query(Hospital).order_by(Hospital.id)]
+            return results, _counts(loader.get_stats()), rows
+        
+        try:
+            sequential, parallel = load(1), load(2)
+            self.assertEqual(sequential, parallel)
+            self.assertEqual(sum(parallel[0].values()), 12)
+            self.assertEqual(parallel[1]['total_skipped'], 12)
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_zip_members_streamed_without_extraction(self):
+        """Test ZIP members are read from the archive, never extracted to disk"""
+        import tempfile
+        import zipfile
+        import pandas as pd
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from src.database import Base
+        from src.change_feed import CapacityChangeFeed
+        
+        with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as f:
+            zip_path = f.name
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            for p in range(2):
+                df = pd.DataFrame([{
+                    'NamaFaskes': f'RS {p}-{i}',
+                    'AlamatFaskes': 'Jl. Utama',
+                    'LatLongFaskes': f'http://maps.google.co.id/?q=-6.{p}{i},106.{i}',
+                    'TipeFaskes': 'Rumah Sakit',
+                } for i in range(5)])
+                zf.writestr(f'faskes_{p}.csv', df.to_csv(index=False))
+            zf.writestr('readme.txt', 'not a csv')
+        
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        loader = CSVDataLoader(db, change_feed=CapacityChangeFeed(), chunk_size=2)
+        try:
+            with patch('tempfile.mkdtemp', side_effect=AssertionError('ZIP was extracted')):
+                self.assertEqual(loader.load_bpjs_faskes_csv(zip_path), 10)
+        finally:
+            os.unlink(zip_path)
+    
+    def test_encoding_sniffing(self):
+        """Test encoding is picked from a byte sample"""
+        from src.csv_loader import sniff_encoding
+        self.assertEqual(sniff_encoding('Rumah Sakit Café'.encode('utf-8')), 'utf-8')
+        self.assertEqual(sniff_encoding('Café'.encode('utf-8')[:-1]), 'utf-8')  # cut mid-character
+        self.assertEqual(sniff_encoding(b'\xef\xbb\xbfNamaFaskes'), 'utf-8-sig')
+        self.assertEqual(sniff_encoding('RS \u201cSehat\u201d'.encode('cp1252')), 'cp1252')
+        self.assertEqual(sniff_encoding(b'RS \x81 Sehat \xe9'), 'latin-1')
+    
+    def test_single_pass_decoding_reports_replacements(self):
+        """Test undecodable bytes after the sample are replaced and counted"""
+        import tempfile
+        import src.csv_loader as csv_loader
+        
+        header = 'NamaFaskes,AlamatFaskes,LatLongFaskes,TipeFaskes\n'
+        good = ''.join(f'RS {i},Jl. {i},"?q=-6.{i},106.{i}",Rumah Sakit\n' for i in range(1, 40))
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.csv', delete=False) as f:
+            f.write(header.encode('utf-8') + good.encode('utf-8') + 'RS Café,Jl. X,"?q=-7.1,110.1",Rumah Sakit\n'.encode('latin-1'))
+            csv_path = f.name
+        
+        loader = CSVDataLoader(None, chunk_size=10)
+        try:
+            with patch.object(csv_loader, 'ENCODING_SAMPLE_BYTES', 64):
+                frames = list(loader._read_csv_chunks(csv_path))
+            self.assertEqual(sum(len(df) for df in frames), 40)
+            self.assertEqual(frames[-1]['NamaFaskes'].iloc[-1], 'RS Caf\ufffd')
+            self.assertEqual(loader.get_stats()['encodings'][csv_path], {'encoding': 'utf-8', 'replaced_bytes': 1})
+        finally:
+            os.unlink(csv_path)
 
 
 class TestDataPipelineIntegration(unittest.TestCase):
@@ -1,10 +1,16 @@
 import datetime
+import json
+from unittest.mock import patch
+import numpy as np
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.database import Base
 from src.models import Hospital, WaitTimeHistory, SeverityEnum
-from src.evaluation import evaluate_wait_time_model
+from src.evaluation import evaluate_wait_time_model, benchmark_model_families, run_hyperparameter_tuning
+from src.evaluation import load_wait_time_frame, evaluate_with_geofeatures, synthetic_wait_time_frame
+from src.evaluation import rolling_origin_evaluation
+from src.tuning import _score_candidate as score_candidate, make_cv_folds
 
 
 def create_inmemory_session():
@@ -49,3 +55,126 @@ def test_evaluate_wait_time_model_runs_and_returns_report():
     assert report is not None, "Expected a report dict, got None (insufficient data?)"
     assert 'mae' in report and 'r2' in report and 'n_samples' in report
     assert report['n_samples'] >= 20
+
+
+def test_benchmark_model_families_reports_frontier():
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+
+    report = benchmark_model_families(session, families=['compact_forest', 'hist_gbm'], n_single=10)
+
+    assert report is not None
+    assert set(report['families']) == {'forest', 'compact_forest', 'hist_gbm'}
+    for r in report['families'].values():
+        assert r['model_bytes'] > 0
+        assert r['p99_latency_ms'] >= r['p50_latency_ms']
+        assert 'mae' in r
+    assert report['families']['compact_forest']['model_bytes'] < report['families']['forest']['model_bytes']
+
+
+def test_run_hyperparameter_tuning_resumes_from_checkpoint(tmp_path):
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    checkpoint = str(tmp_path / 'tuning.json')
+
+    first = run_hyperparameter_tuning(session, families=['hist_gbm'], n_iter=4, n_jobs=1, checkpoint_path=checkpoint)
+    assert first is not None
+    assert 'hgb_best_params' in first and first['hgb_best_score'] > 0
+    assert first['families']['hist_gbm']['rounds'][0]['n_candidates'] == 4
+
+    with open(checkpoint) as fh:
+        saved = fh.read()
+    calls = []
+
+    def counting_score(*args):
+        calls.append(args[1])
+        return score_candidate(*args)
+
+    # n_jobs=1 scores in this process, so the patched scorer sees every fit
+    with patch('src.tuning._score_candidate', counting_score):
+        second = run_hyperparameter_tuning(session, families=['hist_gbm'], n_iter=4, n_jobs=1,
+                                           checkpoint_path=checkpoint)
+    assert calls == []
+    with open(checkpoint) as fh:
+        assert fh.read() == saved
+    assert second['hgb_best_params'] == first['hgb_best_params']
+    assert second['hgb_best_score'] == first['hgb_best_score']
+
+    # a candidate missing from the checkpoint is the only one refit
+    state = json.loads(saved)
+    dropped = sorted(state['results']['hist_gbm'])[0]
+    rounds = len(state['results']['hist_gbm'].pop(dropped))
+    with open(checkpoint, 'w') as fh:
+        json.dump(state, fh)
+    with patch('src.tuning._score_candidate', counting_score):
+        third = run_hyperparameter_tuning(session, families=['hist_gbm'], n_iter=4, n_jobs=1,
+                                          checkpoint_path=checkpoint)
+    assert len(calls) == rounds
+    assert third['hgb_best_score'] == first['hgb_best_score']
+
+
+def test_shuffled_folds_subsample_training_rows_at_random():
+    X = np.arange(300, dtype=np.float64).reshape(-1, 1)
+    y = np.arange(300, dtype=np.float64)
+
+    for X_train, y_train, _, _ in make_cv_folds(X, y, cv_splits=3, random_state=1):
+        tail = y_train[-50:]
+        assert not np.array_equal(np.sort(tail), np.sort(y_train)[-50:])
+        assert np.array_equal(X_train[:, 0], y_train)
+    # same seed, same subsets: every candidate is scored on the same rows
+    assert all(np.array_equal(a[1], b[1]) for a, b in zip(make_cv_folds(X, y, random_state=1),
+                                                         make_cv_folds(X, y, random_state=1)))
+    # time-ordered folds keep the most recent rows last
+    for _, y_train, _, _ in make_cv_folds(X, y, cv_splits=3, use_time_series=True):
+        assert np.array_equal(y_train, np.sort(y_train))
+
+
+def test_load_wait_time_frame_is_compactly_typed():
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+
+    df = load_wait_time_frame(session, chunk_size=25, include_timestamp=True)
+
+    assert len(df) == 120
+    assert df['id'].is_monotonic_increasing
+    assert str(df['hospital_id'].dtype) == 'int32'
+    assert {str(df[c].dtype) for c in ('severity', 'hour', 'day_of_week')} == {'int8'}
+    assert set(df['severity']) == {2, 3}
+    assert load_wait_time_frame(create_inmemory_session()).empty
+
+    patient_locations = {int(i): (0.0, 0.0) for i in df['id'][:10]}
+    report = evaluate_with_geofeatures(session, include_patient_distance=True, patient_locations=patient_locations,
+                                       include_kernel=True)
+    assert report['features_used'] == ['hospital_id', 'severity', 'hour', 'day_of_week', 'count_within_1km',
+                                       'count_within_5km', 'count_within_10km', 'kernel_density', 'patient_distance_km']
+
+
+def test_synthetic_wait_time_frame_follows_training_distributions():
+    rows, hospitals = synthetic_wait_time_frame(20000, n_hospitals=50, seed=3)
+
+    assert len(rows) == 20000 and len(hospitals) == 50
+    assert rows['hospital_id'].between(1, 50).all()
+    assert (rows['wait_time'] >= 5).all()
+    means = rows.groupby('severity')['wait_time'].mean()
+    assert means[4] < means[1] < means[2] < means[3]
+    ts = rows['timestamp']
+    assert (ts.dt.hour == rows['hour']).all() and (ts.dt.weekday == rows['day_of_week']).all()
+
+
+def test_rolling_origin_evaluation_never_trains_on_the_future():
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+
+    report = evaluate_wait_time_model(session, split='time_series', n_splits=4, n_jobs=2)
+
+    assert report['split'] == 'time_series' and report['n_samples'] == 120
+    folds = report['folds']
+    assert [f['fold'] for f in folds] == [0, 1, 2, 3]
+    # expanding window: each fold trains on everything before its test block
+    assert [f['train_size'] for f in folds] == [24, 48, 72, 96]
+    assert all(f['test_size'] == 24 for f in folds)
+    assert abs(report['mae'] - sum(f['mae'] for f in folds) / 4) < 1e-9
+
+    X = np.arange(40, dtype=float).reshape(-1, 1)
+    direct = rolling_origin_evaluation(X, X.ravel(), n_splits=3, model_family='hist_gbm', n_jobs=1)
+    assert direct['n_splits'] == 3 and 'mae_std' in direct
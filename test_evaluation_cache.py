@@ -0,0 +1,77 @@
+from datetime import timedelta
+from src.evaluation import evaluate_wait_time_model
+from src.evaluation_cache import EvaluationCache, dataset_fingerprint, value_digest
+from src.models import Hospital, WaitTimeHistory, SeverityEnum
+from test_evaluation import create_inmemory_session, seed_synthetic_data
+
+
+def test_cache_hits_until_tables_change(tmp_path):
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    cache = EvaluationCache(str(tmp_path))
+
+    calls = []
+
+    def evaluate(db, **params):
+        calls.append(params)
+        return evaluate_wait_time_model(db, **params)
+
+    first = cache.cached(session, 'evaluate', evaluate, {'random_state': 1})
+    second = cache.cached(session, 'evaluate', evaluate, {'random_state': 1})
+    assert first == second
+    assert len(calls) == 1
+    assert cache.stats == {'hits': 1, 'misses': 1}
+
+    # different parameters are a different entry
+    cache.cached(session, 'evaluate', evaluate, {'random_state': 2})
+    assert len(calls) == 2
+
+    hospital = session.query(Hospital).first()
+    session.add(WaitTimeHistory(hospital_id=hospital.id, severity_level=SeverityEnum.low, wait_time_minutes=10))
+    session.commit()
+    cache.cached(session, 'evaluate', evaluate, {'random_state': 1})
+    assert len(calls) == 3
+
+
+def test_fingerprint_tracks_updates():
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    before = dataset_fingerprint(session)
+    assert before['wait_time_history']['count'] == session.query(WaitTimeHistory).count()
+
+    hospital = session.query(Hospital).first()
+    hospital.available_beds = (hospital.available_beds or 0) + 1
+    session.commit()
+    after = dataset_fingerprint(session)
+    assert after['hospitals']['count'] == before['hospitals']['count']
+    assert after != before
+
+
+def test_fingerprint_tracks_in_place_wait_time_edits():
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    before = dataset_fingerprint(session)
+
+    row = session.query(WaitTimeHistory).first()
+    row.wait_time_minutes += 1
+    session.commit()
+    edited = dataset_fingerprint(session)
+    assert edited['wait_time_history']['count'] == before['wait_time_history']['count']
+    assert edited['wait_time_history']['max_id'] == before['wait_time_history']['max_id']
+    assert edited != before
+
+    row.severity_level = SeverityEnum.critical if row.severity_level != SeverityEnum.critical else SeverityEnum.low
+    session.commit()
+    recoded = dataset_fingerprint(session)
+    assert recoded != edited
+
+    # a new hour changes the hour feature without touching count or max id
+    row.timestamp = row.timestamp + timedelta(hours=1)
+    session.commit()
+    assert dataset_fingerprint(session) != recoded
+
+
+def test_value_digest_ignores_dict_order():
+    locations = {1: (-6.2, 106.8), 2: (-6.3, 106.9)}
+    assert value_digest(locations) == value_digest({2: (-6.3, 106.9), 1: (-6.2, 106.8)})
+    assert value_digest(locations) != value_digest({1: (-6.2, 106.8), 2: (-6.3, 107.0)})
@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from src.data.faskes_cache import PARSER_VERSION, ParsedFaskesCache, parse_faskes_columns
+from src.features.geospatial import neighbor_features, neighbor_features_from_arrays
+from types import SimpleNamespace
+
+
+def _write_faskes(path, n):
+    pd.DataFrame([{
+        'Provinsi': 'Bali',
+        'KotaKab': 'Denpasar',
+        'KodeFaskes': f'0101R{i:03d}',
+        'TipeFaskes': 'Rumah Sakit Tipe B' if i % 2 else 'Puskesmas',
+        'NamaFaskes': f'Faskes {i}',
+        'AlamatFaskes': f'Jl. {i}' if i != 3 else None,
+        'LatLongFaskes': f'http://maps.google.co.id/?q=-8.{i + 10},115.{i + 10}' if i != 5 else '?q=0.0,0.0',
+    } for i in range(n)]).to_csv(path, index=False)
+
+
+def test_parsed_columns_are_cached_and_memory_mapped():
+    temp_dir = tempfile.mkdtemp()
+    source = os.path.join(temp_dir, 'faskes.csv')
+    try:
+        _write_faskes(source, 12)
+        cache = ParsedFaskesCache(os.path.join(temp_dir, 'cache'))
+        first = cache.load(source)
+        second = cache.load(source)
+        assert cache.stats == {'hits': 1, 'misses': 1}
+        assert isinstance(second['name'], np.memmap)
+
+        # rows without address or coordinates are dropped, as in the loader
+        assert len(second['name']) == 10
+        assert list(second['class'][:2]) == ['Puskesmas', 'B']
+        assert second['latitude'].dtype == np.float64 and second['code'][0] == '0101R000'
+        for column, values in parse_faskes_columns(source).items():
+            assert np.array_equal(first[column], values)
+
+        # a changed file gets a new entry, replacing the superseded one
+        _write_faskes(source, 14)
+        assert len(cache.load(source)['name']) == 12
+        assert cache.stats['misses'] == 2
+        entries = [name for name in os.listdir(cache.path) if name.endswith(f'-v{PARSER_VERSION}')]
+        assert entries == [os.path.basename(cache.entry_path(cache.source_hash(source)))]
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_neighbor_features_from_arrays_matches_objects():
+    rng = np.random.default_rng(0)
+    lat, lon = -6.2 + rng.uniform(0, 0.3, 40), 106.8 + rng.uniform(0, 0.3, 40)
+    hospitals = [SimpleNamespace(id=i, latitude=a, longitude=o) for i, (a, o) in enumerate(zip(lat, lon))]
+    expected = neighbor_features(hospitals, [2.0, 5.0], [3.0])
+    actual = neighbor_features_from_arrays(np.arange(40), lat, lon, [2.0, 5.0], [3.0])
+    for key in expected:
+        assert np.array_equal(expected[key], actual[key])
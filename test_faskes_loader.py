@@ -0,0 +1,82 @@
+import csv
+import os
+import tempfile
+from sqlalchemy import event
+from src.change_feed import CapacityChangeFeed
+from src.data.faskes_loader import load_faskes_csv
+from src.models import Hospital
+from test_evaluation import create_inmemory_session
+
+FIELDS = ['name', 'address', 'latitude', 'longitude', 'type', 'class', 'total_beds', 'available_beds', 'phone']
+
+
+def _write_csv(rows):
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(fd, 'w', newline='', encoding='utf-8') as fh:
+        writer = csv.DictWriter(fh, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def _row(i, **overrides):
+    row = {'name': f'RS {i}', 'address': f'Jl. {i}', 'latitude': -6.2 + i * 0.001, 'longitude': 106.8,
+           'type': 'Rumah Sakit', 'class': 'C', 'total_beds': 100, 'available_beds': 40, 'phone': '021'}
+    row.update(overrides)
+    return row
+
+
+def test_load_faskes_csv_upserts_on_name_and_location():
+    session = create_inmemory_session()
+    feed = CapacityChangeFeed()
+    rows = [_row(i) for i in range(5)]
+    path = _write_csv(rows)
+    try:
+        assert load_faskes_csv(session, path, change_feed=feed, batch_size=2) == \
+            {'inserted': 5, 'updated': 0, 'skipped': 0}
+        assert feed.sequence == 5
+    finally:
+        os.remove(path)
+
+    rows[1]['total_beds'] = 250
+    rows[2]['address'] = ''
+    rows[2]['total_beds'] = ''
+    rows.append(_row(9))
+    rows.append(_row(10, latitude='n/a'))
+    path = _write_csv(rows)
+    try:
+        assert load_faskes_csv(session, path, change_feed=feed, batch_size=2) == \
+            {'inserted': 1, 'updated': 5, 'skipped': 1}
+    finally:
+        os.remove(path)
+
+    assert session.query(Hospital).count() == 6
+    assert feed.sequence == 6
+    assert session.query(Hospital).filter(Hospital.name == 'RS 1').one().total_beds == 250
+    # empty CSV fields keep the stored values
+    kept = session.query(Hospital).filter(Hospital.name == 'RS 2').one()
+    assert (kept.address, kept.total_beds) == ('Jl. 2', 100)
+
+
+def test_load_faskes_csv_writes_each_batch_in_one_statement():
+    session = create_inmemory_session()
+    rows = [_row(i) for i in range(6)]
+    path = _write_csv(rows)
+    try:
+        load_faskes_csv(session, path, change_feed=CapacityChangeFeed(), batch_size=2)
+        rows[0]['phone'] = ''
+        rows.append(_row(7))
+        os.remove(path)
+        path = _write_csv(rows)
+
+        statements = []
+        event.listen(session.get_bind(), 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        assert load_faskes_csv(session, path, change_feed=CapacityChangeFeed(), batch_size=2) == \
+            {'inserted': 1, 'updated': 6, 'skipped': 0}
+    finally:
+        os.remove(path)
+
+    assert len(statements) == 4
+    assert all(s.lstrip().upper().startswith('INSERT') for s in statements)
+    assert session.query(Hospital).filter(Hospital.name == 'RS 0').one().phone == '021'
@@ -0,0 +1,120 @@
+import datetime
+
+from src.features.store import WaitTimeFeatureStore, radius_column
+from src.models import WaitTimeHistory, SeverityEnum
+from src.predictor import WaitTimePredictor
+from src.evaluation import (
+    evaluate_wait_time_model,
+    evaluate_wait_time_model_augmented,
+    evaluate_with_geofeatures,
+    sweep_geofeatures,
+)
+from test_evaluation import create_inmemory_session, seed_synthetic_data
+
+
+def test_feature_store_appends_incrementally(tmp_path):
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    store = WaitTimeFeatureStore(str(tmp_path / 'store'))
+
+    assert store.refresh(session) == 120
+    assert store.refresh(session) == 0
+
+    session.add(WaitTimeHistory(hospital_id=1, severity_level=SeverityEnum.critical,
+                                timestamp=datetime.datetime(2024, 1, 1, 9), wait_time_minutes=15))
+    session.commit()
+
+    reopened = WaitTimeFeatureStore(str(tmp_path / 'store'))
+    assert reopened.refresh(session) == 1
+    rows = reopened.rows()
+    assert rows['id'].shape[0] == 121
+    assert rows['severity'].dtype.itemsize == 1
+    assert rows['severity'][-1] == 4 and rows['hour'][-1] == 9 and rows['day_of_week'][-1] == 0
+
+    reopened.compact()
+    assert WaitTimeFeatureStore(str(tmp_path / 'store')).rows()['id'].shape[0] == 121
+
+
+def test_interrupted_compact_keeps_rows_once(tmp_path, monkeypatch):
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    store = WaitTimeFeatureStore(str(tmp_path / 'store'))
+    store.refresh(session)
+    session.add(WaitTimeHistory(hospital_id=1, severity_level=SeverityEnum.low, wait_time_minutes=15))
+    session.commit()
+    store.refresh(session)
+
+    def crash(*args):
+        raise OSError('interrupted')
+
+    # crash before the merged segment is in place, then after it but before the old ones are removed
+    for step in ('replace', 'remove'):
+        monkeypatch.setattr(f'src.features.store.os.{step}', crash)
+        try:
+            store.compact()
+        except OSError:
+            pass
+        monkeypatch.undo()
+        assert WaitTimeFeatureStore(str(tmp_path / 'store')).rows()['id'].shape[0] == 121
+
+    reopened = WaitTimeFeatureStore(str(tmp_path / 'store'))
+    assert reopened.rows()['id'].shape[0] == 121
+    reopened.compact()
+    assert len(list((tmp_path / 'store').glob('rows-*.npz'))) == 1
+    assert WaitTimeFeatureStore(str(tmp_path / 'store')).rows()['id'].shape[0] == 121
+
+
+def test_feature_store_matches_orm_features(tmp_path):
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    store = WaitTimeFeatureStore(str(tmp_path / 'store'))
+
+    from_db = evaluate_wait_time_model(session, random_state=1)
+    from_store = evaluate_wait_time_model(session, random_state=1, feature_store=store)
+    assert from_store['mae'] == from_db['mae']
+
+    aug_db = evaluate_wait_time_model_augmented(session, radius_km=5.0)
+    aug_store = evaluate_wait_time_model_augmented(session, radius_km=5.0, feature_store=store)
+    assert aug_store['mae'] == aug_db['mae']
+
+    geo_db = evaluate_with_geofeatures(session, include_kernel=True)
+    geo_store = evaluate_with_geofeatures(session, include_kernel=True, feature_store=store)
+    assert geo_store['features_used'] == geo_db['features_used']
+
+    sweep_db = sweep_geofeatures(session, [[1.0], [1.0, 5.0]], [5.0], n_jobs=1)
+    sweep_store = sweep_geofeatures(session, [[1.0], [1.0, 5.0]], [5.0], n_jobs=1, feature_store=store)
+    assert [r['mae'] for r in sweep_store['results']] == [r['mae'] for r in sweep_db['results']]
+
+    predictor = WaitTimePredictor()
+    assert predictor.train(session, feature_store=store)
+    assert predictor.predict_wait_time(1, 'high') >= 5
+
+
+def test_fractional_radii_get_distinct_columns(tmp_path):
+    assert [radius_column(r) for r in (0.5, 2, 2.5, 10.0)] == [
+        'count_within_0_5km', 'count_within_2km', 'count_within_2_5km', 'count_within_10km']
+
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    store = WaitTimeFeatureStore(str(tmp_path / 'store'), radii_km=[2.0, 2.5, 50.0])
+    store.refresh(session)
+    geo = store.geofeatures()
+    assert {'count_within_2km', 'count_within_2_5km', 'count_within_50km'} <= set(geo)
+    assert (geo['count_within_2km'] <= geo['count_within_2_5km']).all()
+    assert (geo['count_within_2_5km'] <= geo['count_within_50km']).all()
+
+
+def test_store_patient_distances_match_direct_path(tmp_path):
+    import numpy as np
+    from src.evaluation import _geofeature_dataframe, _geofeature_store_dataframe
+
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    store = WaitTimeFeatureStore(str(tmp_path / 'store'))
+    ids = [r[0] for r in session.query(WaitTimeHistory.id).order_by(WaitTimeHistory.id).limit(30)]
+    patient_locations = {i: (-6.2 + 0.01 * k, 106.8) for k, i in enumerate(ids)}
+
+    direct = _geofeature_dataframe(session, True, patient_locations, [5.0], False)
+    stored = _geofeature_store_dataframe(session, store, True, patient_locations, [5.0], False)
+    assert np.allclose(stored['patient_distance_km'].to_numpy(), direct['patient_distance_km'].to_numpy())
+    assert (stored['patient_distance_km'] > 0).sum() == 30
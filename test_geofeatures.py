@@ -22,3 +22,35 @@ def test_multi_radius_counts_and_kernel():
     kd = kernel_density_feature(hospitals, bandwidth_km=5.0)
     assert isinstance(kd, dict)
     assert all(k in kd for k in [1,2,3])
+
+
+def test_neighbor_features_match_pairwise_loop():
+    import random
+    from math import exp
+    from src.features.geospatial import neighbor_features
+
+    rng = random.Random(0)
+    hospitals = [DummyHospital(i, -6.2 + rng.uniform(0, 0.2), 106.8 + rng.uniform(0, 0.2)) for i in range(1, 60)]
+    radii, bandwidths = [2.5, 1.0, 5.0], [1.0, 5.0]
+    features = neighbor_features(hospitals, radii, bandwidths, block_size=16)
+
+    for i, h in enumerate(hospitals):
+        dists = [haversine_km(h.longitude, h.latitude, o.longitude, o.latitude) for o in hospitals if o.id != h.id]
+        assert list(features['counts'][i]) == [sum(d <= r for d in dists) for r in radii]
+        for j, bw in enumerate(bandwidths):
+            expected = sum(exp(-0.5 * (d / (bw + 1e-9)) ** 2) for d in dists)
+            assert abs(features['densities'][i, j] - expected) < 1e-9
+
+
+def test_sweep_geofeatures_reports_every_combination():
+    from test_evaluation import create_inmemory_session, seed_synthetic_data
+    from src.evaluation import sweep_geofeatures
+
+    session = create_inmemory_session()
+    seed_synthetic_data(session)
+    sweep = sweep_geofeatures(session, [[1.0], [1.0, 5.0]], [2.0, 5.0], n_jobs=1)
+    assert sweep['n_combinations'] == 5
+    assert len(sweep['results']) == 5
+    maes = [r['mae'] for r in sweep['results']]
+    assert maes == sorted(maes)
+    assert {(tuple(r['radii_km']), r['bandwidth_km']) for r in sweep['results']} >= {((1.0, 5.0), 5.0), ((), None)}
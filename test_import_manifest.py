@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+import pandas as pd
+from src.change_feed import CapacityChangeFeed
+from src.csv_loader import CSVDataLoader
+from src.import_manifest import ImportTracker
+from src.models import Hospital, ImportManifest
+from test_evaluation import create_inmemory_session
+
+
+def _faskes_frame(n, offset=0):
+    return pd.DataFrame([{
+        'NamaFaskes': f'RS {i}',
+        'AlamatFaskes': f'Jl. {i}',
+        'LatLongFaskes': f'http://maps.google.co.id/?q=-6.{i + 10},106.{i + 10}',
+        'TipeFaskes': 'Rumah Sakit',
+    } for i in range(offset, offset + n)])
+
+
+def _loader(session, **kwargs):
+    return CSVDataLoader(session, change_feed=CapacityChangeFeed(), manifest=ImportTracker(session, **kwargs))
+
+
+def test_unchanged_files_are_skipped_and_changed_files_diffed():
+    session = create_inmemory_session()
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, 'faskes.csv')
+    try:
+        _faskes_frame(20).to_csv(path, index=False)
+        assert _loader(session).load_bpjs_faskes_csv(path) == 20
+
+        loader = _loader(session)
+        assert loader.load_bpjs_faskes_csv(path) == 0
+        assert loader.get_stats()['unchanged_files'] == 1
+        assert loader.get_stats()['encodings'] == {}  # not even opened
+
+        # same bytes, new mtime: hashed once and skipped
+        os.utime(path, ns=(0, 10 ** 18))
+        loader = _loader(session)
+        assert loader.load_bpjs_faskes_csv(path) == 0
+        assert loader.get_stats()['unchanged_files'] == 1
+
+        # 3 new rows, the first 2 rows dropped: only the new rows are processed
+        pd.concat([_faskes_frame(18, offset=2), _faskes_frame(3, offset=50)]).to_csv(path, index=False)
+        loader = _loader(session)
+        assert loader.load_bpjs_faskes_csv(path) == 3
+        stats = loader.get_stats()
+        assert (stats['unchanged_rows'], stats['total_processed']) == (18, 3)
+
+        entry = session.query(ImportManifest).one()
+        assert (entry.status, entry.row_count, entry.inserted, entry.removed) == ('success', 21, 3, 2)
+        assert session.query(Hospital).count() == 23
+
+        # force reloads in full; existing rows are still de-duplicated
+        loader = _loader(session, force=True)
+        assert loader.load_bpjs_faskes_csv(path) == 0
+        assert loader.get_stats()['total_processed'] == 21
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_changed_file_updates_edited_rows():
+    session = create_inmemory_session()
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, 'faskes.csv')
+    try:
+        df = _faskes_frame(5)
+        df.to_csv(path, index=False)
+        assert _loader(session).load_bpjs_faskes_csv(path) == 5
+
+        # row 1 moves and changes type, row 2 changes address, one row is added
+        df.loc[1, ['LatLongFaskes', 'TipeFaskes']] = ['http://maps.google.co.id/?q=-7.5,110.5', 'Rumah Sakit Tipe A']
+        df.loc[2, 'AlamatFaskes'] = 'Jl. Baru 2'
+        pd.concat([df, _faskes_frame(1, offset=50)]).to_csv(path, index=False)
+        loader = _loader(session)
+        assert loader.load_bpjs_faskes_csv(path) == 3
+        stats = loader.get_stats()
+        assert (stats['errors'], stats['total_inserted'], stats['total_updated']) == ([], 1, 2)
+
+        session.expire_all()
+        moved = session.query(Hospital).filter(Hospital.name == 'RS 1').one()
+        assert (moved.latitude, moved.longitude, moved.type, moved.class_) == (-7.5, 110.5, 'Rumah Sakit Tipe A', 'A')
+        assert session.query(Hospital).filter(Hospital.name == 'RS 2').one().address == 'Jl. Baru 2'
+        assert session.query(Hospital).count() == 6
+        entry = session.query(ImportManifest).one()
+        assert (entry.status, entry.inserted, entry.updated) == ('success', 1, 2)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_parallel_directory_load_uses_manifest():
+    session = create_inmemory_session()
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for p in range(2):
+            _faskes_frame(5, offset=p * 5).to_csv(os.path.join(temp_dir, f'faskes_{p}.csv'), index=False)
+        assert _loader(session).load_from_directory(temp_dir, n_jobs=2) == {'faskes_0.csv': 5, 'faskes_1.csv': 5}
+
+        _faskes_frame(6, offset=5).to_csv(os.path.join(temp_dir, 'faskes_1.csv'), index=False)
+        loader = _loader(session)
+        assert loader.load_from_directory(temp_dir, n_jobs=2) == {'faskes_0.csv': 0, 'faskes_1.csv': 1}
+        stats = loader.get_stats()
+        assert (stats['unchanged_files'], stats['unchanged_rows']) == (1, 5)
+        assert session.query(ImportManifest).filter(ImportManifest.status == 'success').count() == 2
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_interrupted_import_resumes_from_checkpoint():
+    session = create_inmemory_session()
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, 'faskes.csv')
+    _faskes_frame(30).to_csv(path, index=False)
+    snapshots = []
+
+    def crash_after_two_chunks(stats):
+        snapshots.append(stats)
+        if stats['rows_read'] >= 20:
+            raise KeyboardInterrupt  # not caught by the loader, like a killed container
+
+    try:
+        loader = CSVDataLoader(session, change_feed=CapacityChangeFeed(), chunk_size=10,
+                               manifest=ImportTracker(session), progress=crash_after_two_chunks)
+        try:
+            loader.load_bpjs_faskes_csv(path)
+        except KeyboardInterrupt:
+            pass
+        session.rollback()
+        entry = session.query(ImportManifest).one()
+        assert (entry.status, entry.checkpoint_source, entry.checkpoint_row) == ('running', 0, 20)
+        assert session.query(Hospital).count() == 20
+        last = snapshots[-1]
+        assert last['batches_committed'] == 2 and last['rows_per_second'] > 0 and last['bytes_per_second'] > 0
+
+        loader = _loader(session)
+        loader.chunk_size = 10
+        assert loader.load_bpjs_faskes_csv(path) == 10
+        stats = loader.get_stats()
+        assert (stats['resumed_rows'], stats['total_processed'], stats['rows_read']) == (20, 10, 30)
+        session.refresh(entry)
+        assert entry.status == 'success'
+        assert session.query(Hospital).count() == 30
+
+        # the resumed run recorded hashes of every row, so the file is now unchanged
+        os.utime(path, ns=(0, 10 ** 18))
+        assert _loader(session).load_bpjs_faskes_csv(path) == 0
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import pandas as pd
+from src.csv_loader import CSVDataLoader
+from src.change_feed import CapacityChangeFeed
+from src.data.name_index import HospitalNameIndex, normalize_name
+from src.models import Hospital
+from test_evaluation import create_inmemory_session
+
+
+def test_normalize_name_strips_prefixes_and_punctuation():
+    assert normalize_name('RSUD Dr. Soetomo') == 'dr soetomo'
+    assert normalize_name('Rumah Sakit Umum Daerah dr. Soetomo') == 'dr soetomo'
+    assert normalize_name('R.S. Harapan-Kita') == 'r s harapan kita'
+    assert normalize_name('  rs  PELNI ') == 'pelni'
+
+
+def test_index_exact_fuzzy_and_ambiguous():
+    index = HospitalNameIndex([
+        (1, 'RSUD Dr. Soetomo'),
+        (2, 'RS Harapan Kita'),
+        (3, 'RS Jantung Harapan Kita'),
+        (4, 'RSIA Bunda'),
+        (5, 'RS Bunda'),
+    ])
+    assert index.match('Dr Soetomo') == (1, 'exact')
+    assert index.match('RSUP Harapan Kita') == (2, 'exact')
+    assert index.match('Jantung Harapan Kitaa') == (3, 'fuzzy')
+    assert index.match('Bunda') == (None, 'ambiguous')
+    assert index.match('Siloam') == (None, 'none')
+
+
+def test_bed_ratio_load_updates_in_bulk():
+    session = create_inmemory_session()
+    for name in ['RSUD Dr. Soetomo', 'RS Harapan Kita', 'RS Jantung Harapan Kita']:
+        session.add(Hospital(name=name, address='-', latitude=-6.2, longitude=106.8, total_beds=10, available_beds=5))
+    session.commit()
+
+    df = pd.DataFrame([
+        {'nama_rs': 'Rumah Sakit Umum Daerah Dr Soetomo', 'jumlah_bed': 400, 'provinsi': 'Jawa Timur'},
+        {'nama_rs': 'Harapan Kita', 'jumlah_bed': 200, 'provinsi': 'DKI Jakarta'},
+        {'nama_rs': 'RS Tidak Ada', 'jumlah_bed': 50, 'provinsi': 'DKI Jakarta'},
+    ])
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+        df.to_csv(f.name, index=False)
+        csv_path = f.name
+
+    feed = CapacityChangeFeed()
+    loader = CSVDataLoader(session, change_feed=feed)
+    try:
+        assert loader.load_bed_ratio_csv(csv_path) == 2
+    finally:
+        os.unlink(csv_path)
+
+    session.expire_all()
+    beds = {h.name: (h.total_beds, h.available_beds) for h in session.query(Hospital)}
+    assert beds == {'RSUD Dr. Soetomo': (400, 200), 'RS Harapan Kita': (200, 100), 'RS Jantung Harapan Kita': (10, 5)}
+    assert loader.get_stats()['total_updated'] == 2
+    assert feed.sequence == 2
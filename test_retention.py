@@ -0,0 +1,86 @@
+import datetime
+
+import numpy as np
+from sqlalchemy import func
+
+from src.models import CapacityHistory, WaitTimeHistory, HistoryArchive, CapacityRollup, SeverityEnum
+from src.retention import archive_history, load_archive, retention_cutoff, _encode_chunk
+from src.rollups import refresh_rollups
+from test_capacity import create_inmemory_session, seed_capacity_history
+
+
+def test_retention_cutoff_is_month_aligned():
+    assert retention_cutoff(2, now=datetime.datetime(2024, 3, 15, 10)) == datetime.datetime(2024, 1, 1)
+    assert retention_cutoff(0, now=datetime.datetime(2024, 1, 31)) == datetime.datetime(2024, 1, 1)
+
+
+def test_archive_history_exports_and_drops_old_months(tmp_path):
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session, n_hospitals=3, hours=1)
+    for day in range(0, 90, 3):
+        ts = datetime.datetime(2024, 1, 1) + datetime.timedelta(days=day)
+        for h in hospitals:
+            session.add(CapacityHistory(hospital_id=h.id, available_beds=40, occupied_beds=60, timestamp=ts))
+            session.add(WaitTimeHistory(hospital_id=h.id, severity_level=SeverityEnum.high,
+                                        wait_time_minutes=day, timestamp=ts))
+    session.commit()
+    before = session.query(CapacityHistory).count()
+    jan_feb = session.query(CapacityHistory).filter(CapacityHistory.timestamp < datetime.datetime(2024, 3, 1)).count()
+
+    now = datetime.datetime(2024, 4, 10)
+    planned = archive_history(session, str(tmp_path), keep_months=1, now=now, dry_run=True)
+    assert sum(planned['capacity_history'].values()) == jan_feb
+    assert session.query(CapacityHistory).count() == before
+
+    result = archive_history(session, str(tmp_path), keep_months=1, now=now, chunk_size=25)
+    assert set(result['capacity_history']) == {'2024-01', '2024-02'}
+    assert session.query(CapacityHistory).count() == before - jan_feb
+    assert session.query(func.min(WaitTimeHistory.timestamp)).scalar() >= datetime.datetime(2024, 3, 1)
+    assert session.query(HistoryArchive).filter(HistoryArchive.table_name == 'capacity_history').count() > 2
+    # rollups of the dropped months survive
+    assert session.query(CapacityRollup).filter(CapacityRollup.bucket_start < datetime.datetime(2024, 3, 1)).count() > 0
+
+    archived = load_archive(str(tmp_path), 'wait_time_history', months=['2024-01'])
+    assert len(archived) == 11 * len(hospitals)
+    assert set(archived['severity_level']) == {'high'}
+    assert archived['id'].is_monotonic_increasing
+    assert np.all(archived['timestamp'] < np.datetime64('2024-02-01'))
+
+    # nothing left to archive
+    again = archive_history(session, str(tmp_path), keep_months=1, now=now)
+    assert again == {'capacity_history': {}, 'wait_time_history': {}}
+
+
+def test_late_rows_in_archived_months_keep_their_rollups(tmp_path):
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session, n_hospitals=2, hours=0)
+    for day in range(0, 60, 2):
+        ts = datetime.datetime(2024, 1, 1) + datetime.timedelta(days=day)
+        session.add(CapacityHistory(hospital_id=hospitals[0].id, available_beds=40, occupied_beds=60, timestamp=ts))
+    session.commit()
+    archive_history(session, str(tmp_path), keep_months=1, now=datetime.datetime(2024, 3, 10))
+    january = CapacityRollup.bucket_start < datetime.datetime(2024, 2, 1)
+    kept = session.query(CapacityRollup).filter(january).count()
+    assert kept > 0
+
+    # a late reading for January, plus a current one
+    session.add(CapacityHistory(hospital_id=hospitals[0].id, available_beds=50, occupied_beds=50,
+                                timestamp=datetime.datetime(2024, 1, 15, 12)))
+    session.add(CapacityHistory(hospital_id=hospitals[0].id, available_beds=50, occupied_beds=50,
+                                timestamp=datetime.datetime(2024, 3, 5)))
+    session.commit()
+    refresh_rollups(session)
+    assert session.query(CapacityRollup).filter(january).count() == kept
+    assert session.query(CapacityRollup).filter(CapacityRollup.bucket_start >= datetime.datetime(2024, 3, 1)).count() == 2
+
+
+def test_missing_severity_round_trips_as_null(tmp_path):
+    rows = [(1, 5, SeverityEnum.critical, 30, datetime.datetime(2024, 1, 1)),
+            (2, 5, None, 40, datetime.datetime(2024, 1, 2)),
+            (3, 5, SeverityEnum.medium, 50, datetime.datetime(2024, 1, 3))]
+    chunk = _encode_chunk(rows, ['id', 'hospital_id', 'severity_level', 'wait_time_minutes', 'timestamp'])
+    assert chunk['severity_level'].tolist() == [4, 0, 2]
+
+    (tmp_path / 'wait_time_history').mkdir()
+    np.savez(tmp_path / 'wait_time_history' / '2024-01-1-3.npz', **chunk)
+    assert load_archive(str(tmp_path), 'wait_time_history')['severity_level'].tolist() == ['critical', None, 'medium']
@@ -0,0 +1,111 @@
+import datetime
+
+import numpy as np
+
+from src.models import CapacityHistory, WaitTimeHistory, WaitTimeRollup, CapacityRollup, RollupWatermark, SeverityEnum
+from src.predictor import CapacityAnalyzer, WaitTimePredictor
+from src.rollups import refresh_rollups, rollups_available, resolve_source, CAPACITY_SOURCE, WAIT_TIME_SOURCE
+from test_capacity import create_inmemory_session, seed_capacity_history
+
+
+def _rollup_snapshot(session, model):
+    rows = session.query(model).order_by(model.granularity, model.hospital_id, model.bucket_start).all()
+    skip = {'_sa_instance_state', 'id'}
+    return [{k: v for k, v in vars(r).items() if k not in skip} for r in rows]
+
+
+def test_capacity_rollups_are_incremental_and_exact():
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session)
+    assert not rollups_available(session, CAPACITY_SOURCE)
+
+    refresh_rollups(session)
+    assert rollups_available(session, CAPACITY_SOURCE)
+
+    hourly = session.query(CapacityRollup).filter(CapacityRollup.granularity == 'hour',
+                                                  CapacityRollup.hospital_id == hospitals[2].id).all()
+    raw = session.query(CapacityHistory).filter(CapacityHistory.hospital_id == hospitals[2].id).all()
+    assert len(hourly) == len(raw) == 30
+    by_hour = {r.timestamp: r.occupied_beds / (r.available_beds + r.occupied_beds) for r in raw}
+    for bucket in hourly:
+        assert bucket.count == 1
+        assert np.isclose(bucket.mean_occupancy, by_hour[bucket.bucket_start])
+
+    daily = session.query(CapacityRollup).filter(CapacityRollup.granularity == 'day',
+                                                 CapacityRollup.hospital_id == hospitals[2].id).all()
+    assert sorted(b.count for b in daily) == [6, 24]
+
+    # new readings only touch their hospital, and match a full rebuild
+    late = datetime.datetime(2024, 1, 2, 5, 30)
+    session.add(CapacityHistory(hospital_id=hospitals[2].id, available_beds=10, occupied_beds=90, timestamp=late))
+    session.commit()
+    assert refresh_rollups(session)[CAPACITY_SOURCE] == 1
+    assert refresh_rollups(session)[CAPACITY_SOURCE] == 0
+    incremental = _rollup_snapshot(session, CapacityRollup)
+
+    session.query(CapacityRollup).delete()
+    session.query(RollupWatermark).delete()
+    session.commit()
+    refresh_rollups(session)
+    assert _rollup_snapshot(session, CapacityRollup) == incremental
+
+
+def test_trends_from_rollups_match_raw_trends():
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session)
+    analyzer = CapacityAnalyzer()
+    refresh_rollups(session)
+
+    raw = analyzer.predict_capacity_trends(session, source='raw')
+    rolled = analyzer.predict_capacity_trends(session)
+
+    assert list(rolled['hospital_id']) == list(raw['hospital_id'])
+    # the last hospital has empty snapshots, which leave hourly buckets out
+    assert list(rolled['trend'][:-1]) == list(raw['trend'][:-1])
+    assert np.allclose(rolled['diff'][:-1], raw['diff'][:-1], atol=1e-6)
+
+
+def test_wait_time_training_reads_hourly_rollups():
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session, n_hospitals=3, hours=1)
+    start = datetime.datetime(2024, 1, 1)
+    for t in range(48):
+        for h in hospitals:
+            for sev, base in ((SeverityEnum.low, 40), (SeverityEnum.critical, 15)):
+                for k in range(3):
+                    session.add(WaitTimeHistory(hospital_id=h.id, severity_level=sev, wait_time_minutes=base + k,
+                                                timestamp=start + datetime.timedelta(hours=t, minutes=10 * k)))
+    session.commit()
+    refresh_rollups(session)
+
+    buckets = session.query(WaitTimeRollup).filter(WaitTimeRollup.granularity == 'hour').all()
+    assert len(buckets) == 48 * 3 * 2
+    assert all(b.count == 3 and b.min_wait + 1 == b.mean_wait for b in buckets)
+    assert session.query(WaitTimeRollup).filter(WaitTimeRollup.granularity == 'day').first().count == 72
+
+    predictor = WaitTimePredictor()
+    assert predictor.train(session, source='rollup')
+    assert abs(predictor.predict_wait_time(hospitals[0].id, 'low') - 41) <= 1
+
+    # rollup training is opt-in: the default still fits raw rows
+    default, raw = WaitTimePredictor(), WaitTimePredictor()
+    assert default.train(session) and raw.train(session, source='raw')
+    assert [default.predict_wait_time(h.id, s) for h in hospitals for s in ('low', 'critical')] == \
+        [raw.predict_wait_time(h.id, s) for h in hospitals for s in ('low', 'critical')]
+    assert rollups_available(session, WAIT_TIME_SOURCE)
+
+
+def test_auto_source_reads_raw_while_rollups_are_stale():
+    session = create_inmemory_session()
+    hospitals = seed_capacity_history(session)
+    assert resolve_source(session, 'auto', CAPACITY_SOURCE) == 'raw'
+    refresh_rollups(session)
+    assert resolve_source(session, 'auto', CAPACITY_SOURCE) == 'rollup'
+
+    session.add(CapacityHistory(hospital_id=hospitals[2].id, available_beds=10, occupied_beds=90,
+                                timestamp=datetime.datetime(2024, 1, 3)))
+    session.commit()
+    assert resolve_source(session, 'auto', CAPACITY_SOURCE) == 'raw'
+    assert resolve_source(session, 'rollup', CAPACITY_SOURCE) == 'rollup'
+    refresh_rollups(session)
+    assert resolve_source(session, 'auto', CAPACITY_SOURCE) == 'rollup'
@@ -13,12 +13,15 @@ import os
 import tempfile
 import pandas as pd
 import zipfile
-from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.csv_loader import CSVDataLoader
+from src.database import Base
+from src.models import Hospital
 
 
 def create_kaggle_dataset_zip():
@@ -112,20 +115,13 @@ def test_fix():
         print("Testing CSV Loader with Multi-File ZIP")
         print("="*70)
         
-        # Create mock database
-        mock_db = MagicMock()
-        mock_query = MagicMock()
-        mock_db.query.return_value = mock_query
-        mock_query.filter.return_value.first.return_value = None
-        
-        # Track added hospitals
-        added_hospitals = []
-        def track_add(hospital):
-            added_hospitals.append(hospital)
-        mock_db.add = track_add
+        # Create in-memory database (the loader inserts in bulk)
+        engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
         
         # Create loader
-        loader = CSVDataLoader(mock_db)
+        loader = CSVDataLoader(db)
         
         # Load the ZIP file - THIS IS THE KEY TEST
         print("\n🔄 Loading ZIP file...")
@@ -133,6 +129,7 @@ def test_fix():
         print()
         
         count = loader.load_bpjs_faskes_csv(zip_path)
+        added_hospitals = db.query(Hospital).order_by(Hospital.id).all()
         
         print("\n" + "="*70)
         print("Results")
@@ -12,7 +12,9 @@ from src.models import (
     Patient, Referral, Hospital, WaitTimeHistory, CapacityHistory,
     SeverityEnum, StatusEnum
 )
-from src.predictor import WaitTimePredictor, CapacityAnalyzer
+from src.predictor import WaitTimePredictor, CapacityAnalyzer, TREND_LABELS
+from src.features.store import WaitTimeFeatureStore, DEFAULT_STORE_PATH
+from src.rollups import refresh_rollups
 from sqlalchemy import func
 
 print("=" * 80)
@@ -139,11 +141,19 @@ except Exception as e:
     print(f"   ✗ Error generating capacity history: {str(e)}")
     db.rollback()
 
+# Fold new history into the hourly/daily rollups used by analytics and forecasting
+print("\n   Refreshing history rollups...")
+rollup_result = refresh_rollups(db)
+for source, advanced in rollup_result.items():
+    print(f"   ✓ {source}: {advanced} new rows rolled up")
+
 # Train wait time prediction model
 print("\n5. Training wait time prediction model...")
 try:
     predictor = WaitTimePredictor()
-    success = predictor.train(db)
+    # features are appended to the shared store incrementally instead of recomputed
+    feature_store = WaitTimeFeatureStore(DEFAULT_STORE_PATH)
+    success = predictor.train(db, feature_store=feature_store)
     
     if success:
         print("   ✓ Model trained successfully")
@@ -173,11 +183,13 @@ print("\n6. Analyzing hospital capacity...")
 try:
     analyzer = CapacityAnalyzer()
     hospitals = db.query(Hospital).all()
+    trends = analyzer.predict_capacity_trends(db)
+    trend_by_id = {int(t['hospital_id']): TREND_LABELS[int(t['trend'])] for t in trends}
     
     print("\n   Hospital capacity analysis:")
     for hospital in hospitals:
         utilization = analyzer.calculate_utilization(hospital)
-        trend = analyzer.predict_capacity_trend(db, hospital.id)
+        trend = trend_by_id.get(hospital.id, 'stable')
         
         print(f"\n     {hospital.name}:")
         print(f"       - Utilization: {utilization:.1%}")